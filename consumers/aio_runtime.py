@@ -0,0 +1,253 @@
+# consumers/aio_runtime.py
+# -*- coding: utf-8 -*-
+"""
+asyncio runtime for the consumers (alternative to pika.BlockingConnection).
+
+    python aio_runtime.py user     # pos.user  – handlers from consumer.py
+    python aio_runtime.py event    # pos.event – handlers from consumer_event.py
+
+AMQP runs on `pika.adapters.asyncio_connection.AsyncioConnection` and all
+Odoo calls go through `odoo_rpc.AsyncOdooClient`, so neither a slow Odoo
+call nor a busy handler ever blocks heartbeats or the other deliveries.
+
+Each delivery is processed by a coroutine.  The existing handlers are
+synchronous, so a coroutine runs its handler on a bounded worker pool;
+the handler's `models.execute_kw` calls are bridged back onto the loop
+and awaited on the async client.  ASYNC_MAX_INFLIGHT (default 32) bounds
+prefetch, concurrent handlers and Odoo connections alike.  Messages with
+the same key (user UID / event UID) are still processed in arrival order.
+"""
+import asyncio
+import functools
+import importlib
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+import pika
+from pika.adapters.asyncio_connection import AsyncioConnection
+from dotenv import dotenv_values
+
+import dedup
+import odoo_rpc
+
+_logger = logging.getLogger(__name__)
+
+cfg          = dotenv_values()
+MAX_INFLIGHT = int(cfg.get("ASYNC_MAX_INFLIGHT") or 32)
+ODOO_URL     = f"http://{cfg.get('ODOO_HOST', 'web')}:{cfg.get('ODOO_PORT', 8069)}/xmlrpc/2/"
+
+
+# ────────────────────────────────────────────────────────────────────────
+# handler targets
+# ────────────────────────────────────────────────────────────────────────
+@dataclass
+class Target:
+    module: object
+    exchange: str
+    queue: str
+    routing_keys: list
+    parse: Callable       # body -> (ordering key, dispatch args)
+    dispatch: Callable
+    extra_bindings: list = field(default_factory=list)   # (exchange, routing key)
+
+
+def _user_target() -> Target:
+    mod = importlib.import_module("consumer")
+
+    def parse(body):
+        msg = mod.attendify.parse(body)
+        return mod.safe(msg.payload and msg.payload.get("uid")), (msg,)
+
+    return Target(mod, mod.EXCHANGE_MAIN, mod.QUEUE_MAIN, [], parse, mod._dispatch)
+
+
+def _event_target() -> Target:
+    mod = importlib.import_module("consumer_event")
+
+    def parse(body):
+        msg = mod._parse(body)
+        return mod._lane_key(msg), (msg,)
+
+    return Target(mod, mod.exchange, mod.queue, mod.routing_keys, parse, mod._dispatch,
+                  mod.extra_bindings)
+
+
+TARGETS = {"user": _user_target, "event": _event_target}
+
+
+class _LoopBoundModels:
+    """Stands in for the blocking `models` proxy inside handler threads."""
+
+    def __init__(self, client: odoo_rpc.AsyncOdooClient, loop):
+        self._client = client
+        self._loop   = loop
+
+    def execute_kw(self, *args):
+        return asyncio.run_coroutine_threadsafe(
+            self._client.call("object", "execute_kw", *args), self._loop
+        ).result()
+
+
+# ────────────────────────────────────────────────────────────────────────
+# consumer
+# ────────────────────────────────────────────────────────────────────────
+class AsyncConsumer:
+
+    def __init__(self, target: Target, params: pika.ConnectionParameters,
+                 max_inflight: int = MAX_INFLIGHT):
+        self.target       = target
+        self.params       = params
+        self.max_inflight = max_inflight
+        self.acked = self.nacked = 0
+        self._pool  = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="handler")
+        self._keys  = {}          # ordering key -> [asyncio.Lock, users]
+        self._tasks = set()
+        self._conn = self._ch = self._closed = None
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._closed = loop.create_future()
+        opened = loop.create_future()
+        self._conn = AsyncioConnection(
+            self.params,
+            on_open_callback=lambda c: opened.set_result(c),
+            on_open_error_callback=lambda c, exc: opened.set_exception(
+                exc if isinstance(exc, BaseException) else ConnectionError(exc)
+            ),
+            on_close_callback=self._on_close,
+            custom_ioloop=loop,
+        )
+        await opened
+        self._ch = await self._wait(self._conn.channel, cb="on_open_callback")
+
+        t = self.target
+        await self._wait(self._ch.exchange_declare, exchange=t.exchange,
+                         exchange_type="direct", durable=True)
+        await self._wait(self._ch.queue_declare, queue=t.queue, durable=True)
+        for rk in t.routing_keys:
+            await self._wait(self._ch.queue_bind, queue=t.queue, exchange=t.exchange, routing_key=rk)
+        for ex, rk in t.extra_bindings:
+            await self._wait(self._ch.exchange_declare, exchange=ex,
+                             exchange_type="direct", durable=True)
+            await self._wait(self._ch.queue_bind, queue=t.queue, exchange=ex, routing_key=rk)
+        await self._wait(self._ch.basic_qos, prefetch_count=self.max_inflight)
+        self._ch.basic_consume(t.queue, self._on_message, auto_ack=False)
+        _logger.info("Consuming %s asynchronously (max %d in flight)", t.queue, self.max_inflight)
+
+        try:
+            await self._closed
+        finally:
+            self._pool.shutdown(wait=False)
+
+    def stop(self) -> None:
+        if self._conn and not self._conn.is_closed:
+            self._conn.close()
+
+    @staticmethod
+    def _wait(method, cb: str = "callback", **kwargs):
+        fut = asyncio.get_running_loop().create_future()
+        method(**{cb: lambda frame: fut.done() or fut.set_result(frame)}, **kwargs)
+        return fut
+
+    def _on_close(self, conn, reason) -> None:
+        _logger.warning("AMQP connection closed: %s", reason)
+        if self._closed and not self._closed.done():
+            self._closed.set_result(reason)
+
+    # ------------------------------------------------------------------
+    # deliveries
+    # ------------------------------------------------------------------
+    def _on_message(self, ch, method, props, body) -> None:
+        store = self.target.module.DEDUP
+        key   = dedup.message_key(props, body)
+        if store.seen(key):
+            _logger.info("Duplicate message %s (%s); acking", method.delivery_tag, key)
+            return self._settle(method.delivery_tag, ok=True)
+        task = asyncio.get_running_loop().create_task(
+            self._process(method.delivery_tag, body, key)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, tag: int, body: bytes, key: str) -> None:
+        try:
+            lane_key, args = self.target.parse(body)
+        except Exception:
+            _logger.exception("Unparseable message %s", tag)
+            return self._settle(tag, ok=False)
+
+        entry = self._keys.setdefault(lane_key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await asyncio.get_running_loop().run_in_executor(
+                    self._pool, functools.partial(self.target.dispatch, *args)
+                )
+        except Exception:
+            _logger.exception("Message %s failed", tag)
+            self._settle(tag, ok=False)
+        else:
+            self.target.module.DEDUP.mark(key)
+            self._settle(tag, ok=True)        # ACK only after the Odoo writes
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self._keys.pop(lane_key, None)
+
+    def _settle(self, tag: int, ok: bool) -> None:
+        if not (self._ch and self._ch.is_open):
+            return                             # broker will redeliver
+        if ok:
+            self._ch.basic_ack(delivery_tag=tag)
+            self.acked += 1
+        else:
+            self._ch.basic_nack(delivery_tag=tag, requeue=False)
+            self.nacked += 1
+
+
+# ────────────────────────────────────────────────────────────────────────
+# STARTUP
+# ────────────────────────────────────────────────────────────────────────
+async def serve(target: Target, max_inflight: int = MAX_INFLIGHT) -> None:
+    loop   = asyncio.get_running_loop()
+    client = odoo_rpc.AsyncOdooClient(ODOO_URL, max_connections=max_inflight)
+    target.module.models = _LoopBoundModels(client, loop)
+
+    params = pika.ConnectionParameters(
+        host=cfg["RABBITMQ_HOST"],
+        port=int(cfg.get("RABBITMQ_PORT", 5672)),
+        virtual_host=cfg.get("RABBITMQ_VHOST", "/"),
+        credentials=pika.PlainCredentials(cfg["RABBITMQ_USERNAME"], cfg["RABBITMQ_PASSWORD"]),
+    )
+    consumer = AsyncConsumer(target, params, max_inflight)
+    try:
+        await consumer.run()
+    finally:
+        consumer.stop()
+        await client.close()
+        _logger.info(
+            "Async runtime stopped: %d acked, %d nacked, Odoo %s, dedup %s",
+            consumer.acked, consumer.nacked, client.stats(), target.module.DEDUP.stats(),
+        )
+
+
+def main(argv=None) -> None:
+    args = sys.argv[1:] if argv is None else argv
+    name = args[0] if args else "user"
+    if name not in TARGETS:
+        raise SystemExit(f"usage: aio_runtime.py [{'|'.join(TARGETS)}]")
+    logging.basicConfig(level=logging.INFO)
+    # importing the handler module runs its one-off startup RPCs (auth,
+    # reference data) on the blocking client before the loop starts
+    target = TARGETS[name]()
+    try:
+        asyncio.run(serve(target))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# consumers/batching.py
+# -*- coding: utf-8 -*-
+"""
+Micro-batching for pika BlockingConnection consumers.
+
+`MessageBatcher.on_message` is used as `on_message_callback`.  Deliveries
+are buffered until `max_size` messages are waiting or `max_wait_ms` has
+passed since the first one arrived; the batch is then handed to
+`handle_batch`, which returns the delivery tags that failed.  Failed
+messages are nacked one by one (no requeue, like the single-message
+path), after which everything else is acked with a single
+`basic_ack(multiple=True)`.
+"""
+import logging
+from typing import Callable, Iterable, NamedTuple
+
+_logger = logging.getLogger(__name__)
+
+
+class Delivery(NamedTuple):
+    delivery_tag: int
+    routing_key: str
+    properties: object
+    body: bytes
+
+
+class MessageBatcher:
+
+    def __init__(self, connection, channel,
+                 handle_batch: Callable[[list], Iterable[int]],
+                 max_size: int = 50, max_wait_ms: int = 200):
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        self.connection   = connection
+        self.channel      = channel
+        self.handle_batch = handle_batch
+        self.max_size     = max_size
+        self.max_wait     = max_wait_ms / 1000.0
+        self._buffer: list[Delivery] = []
+        self._timer = None
+
+    def start(self, queue: str) -> None:
+        """Raise prefetch to the batch size and register the callback."""
+        self.channel.basic_qos(prefetch_count=self.max_size)
+        self.channel.basic_consume(
+            queue=queue, on_message_callback=self.on_message, auto_ack=False
+        )
+
+    # ------------------------------------------------------------------
+    # pika callbacks
+    # ------------------------------------------------------------------
+    def on_message(self, ch, method, props, body) -> None:
+        self._buffer.append(
+            Delivery(method.delivery_tag, getattr(method, "routing_key", ""), props, body)
+        )
+        if len(self._buffer) >= self.max_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = self.connection.call_later(self.max_wait, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self.flush()
+
+    # ------------------------------------------------------------------
+    # batch resolution
+    # ------------------------------------------------------------------
+    def flush(self) -> None:
+        if self._timer is not None:
+            self.connection.remove_timeout(self._timer)
+            self._timer = None
+        batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+
+        try:
+            failed = set(self.handle_batch(batch))
+        except Exception:
+            _logger.exception("Batch of %d message(s) failed as a whole", len(batch))
+            failed = {d.delivery_tag for d in batch}
+
+        for d in batch:
+            if d.delivery_tag in failed:
+                self.channel.basic_nack(delivery_tag=d.delivery_tag, requeue=False)
+
+        ok = [d.delivery_tag for d in batch if d.delivery_tag not in failed]
+        if ok:
+            # failures are already nacked, so this only covers successes
+            self.channel.basic_ack(delivery_tag=max(ok), multiple=True)
+        _logger.info(
+            "Batch resolved: %d acked, %d nacked", len(ok), len(batch) - len(ok)
+        )
@@ -0,0 +1,188 @@
+# consumers/bench_parser.py
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark: Attendify message parsing and encoding.
+
+    PYTHONPATH=../odoo/addons/pos_custom/customer_rabbit_connector/tools \
+        python bench_parser.py [iterations]
+
+Parsing: the old consumer path (decode → ElementTree → xmltodict
+fallback, as the removed `_parse_with_user_support` monkeypatch did),
+plain `xmltodict.parse`, and `attendify.parse` on the same AMQP bodies.
+Encoding: the old EventSync builder (ElementTree → minidom pretty-print
+→ CDATA regex) against `attendify.encode`, compact (the wire format) and
+indented.  Debug logging: `minidom.toprettyxml` against `attendify.pretty`
+on the compact body.
+Reports time per message, the size of the produced body and the
+allocations one call leaves behind plus its peak, as measured by
+tracemalloc.
+"""
+import re
+import sys
+import timeit
+import tracemalloc
+import xml.etree.ElementTree as ET
+from xml.dom import minidom
+
+import xmltodict
+
+import attendify
+
+BODIES = {
+    "user": b"""<?xml version="1.0" encoding="UTF-8"?>
+<attendify>
+  <info><sender>frontend</sender><operation>create</operation></info>
+  <user>
+    <uid>GC1718000000000</uid>
+    <first_name>Jane</first_name>
+    <last_name>Doe</last_name>
+    <email>jane.doe@example.com</email>
+    <password>$2b$12$abcdefghijklmnopqrstuv</password>
+    <title>Mrs</title>
+    <country>BE</country>
+    <is_admin>false</is_admin>
+    <date_of_birth>1990-01-01</date_of_birth>
+    <phone_number>+32470000000</phone_number>
+  </user>
+</attendify>""",
+    "event": b"""<?xml version="1.0" encoding="UTF-8"?>
+<attendify>
+  <info><sender>frontend</sender><operation>update</operation></info>
+  <event>
+    <uid>GC1718000000001</uid>
+    <gcid>abc123</gcid>
+    <title>Summer party</title>
+    <description><![CDATA[Drinks & food <included>]]></description>
+    <location>Main hall</location>
+    <start_date>2025-07-01</start_date>
+    <end_date>2025-07-01</end_date>
+    <start_time>18:00</start_time>
+    <end_time>23:00</end_time>
+    <organizer_name>Jane Doe</organizer_name>
+    <organizer_uid>GC1718000000000</organizer_uid>
+    <entrance_fee>12.50</entrance_fee>
+    <registration_limit>150</registration_limit>
+  </event>
+</attendify>""",
+    "event_attendee": b"""<?xml version="1.0" encoding="UTF-8"?>
+<attendify>
+  <info><sender>frontend</sender><operation>register</operation></info>
+  <event_attendee>
+    <uid>GC1718000000000</uid>
+    <event_id>GC1718000000001</event_id>
+  </event_attendee>
+</attendify>""",
+}
+
+
+def legacy_parse(body):
+    """What consumer.py did before: decode, ElementTree, xmltodict fallback."""
+    if isinstance(body, (bytes, bytearray)):
+        body = body.decode()
+    root = ET.fromstring(body)
+    op   = (root.findtext("./info/operation") or "").strip().lower()
+    user_elem = root.find("user")
+    if user_elem is not None:
+        user = {c.tag: c.text or "" for c in user_elem}
+        return {"attendify": {"info": {"operation": op}, "user": user}}
+    return xmltodict.parse(body)
+
+
+def legacy_event_xml(ev):
+    """What EventSync._build_event_xml did before."""
+    root = ET.Element("attendify")
+    root.set("xmlns:xsi", "http://www.w3.org/2001/XMLSchema-instance")
+    root.set("xsi:noNamespaceSchemaLocation", "event.xsd")
+    info = ET.SubElement(root, "info")
+    ET.SubElement(info, "sender").text    = "odoo"
+    ET.SubElement(info, "operation").text = "update"
+    node = ET.SubElement(root, "event")
+    for name in ("uid", "gcid", "title", "location", "start_date", "end_date",
+                 "start_time", "end_time", "organizer_name", "organizer_uid",
+                 "entrance_fee"):
+        ET.SubElement(node, name).text = getattr(ev, name) or ""
+    ET.SubElement(node, "description")
+    pretty = minidom.parseString(ET.tostring(root, encoding="utf-8")).toprettyxml(indent="  ")
+    return re.sub(r"<description>\s*</description>",
+                  f"<description><![CDATA[{ev.description}]]></description>",
+                  pretty, count=1).encode("utf-8")
+
+
+def encode_event(ev):
+    return attendify.encode(attendify.Message("update", "odoo", ev))
+
+
+def encode_event_indented(ev):
+    return attendify.encode(attendify.Message("update", "odoo", ev), indent="  ")
+
+
+def minidom_pretty(body):
+    return minidom.parseString(body).toprettyxml(indent="  ")
+
+
+PARSERS = {
+    "legacy":    legacy_parse,
+    "xmltodict": xmltodict.parse,
+    "attendify": attendify.parse,
+}
+
+
+ENCODERS = {
+    "legacy":    legacy_event_xml,
+    "compact":   encode_event,
+    "indented":  encode_event_indented,
+}
+
+
+PRETTY = {
+    "minidom":   minidom_pretty,
+    "attendify": attendify.pretty,
+}
+
+
+def _time_us(fn, body, number) -> float:
+    best = min(timeit.repeat(lambda: fn(body), number=number, repeat=5))
+    return best / number * 1e6
+
+
+def _allocs(fn, body):
+    """(blocks, bytes) still held by the result, and peak bytes during parse."""
+    fn(body)                                  # warm caches
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    result = fn(body)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    del result
+    return (sum(d.count_diff for d in diff),
+            sum(d.size_diff for d in diff), peak - base)
+
+
+def main(argv=None) -> None:
+    args   = sys.argv[1:] if argv is None else argv
+    number = int(args[0]) if args else 5000
+    print(f"{'payload':<15}{'parser':<11}{'µs/msg':>9}{'blocks':>9}{'bytes':>9}{'peak':>9}")
+    for kind, body in BODIES.items():
+        for name, fn in PARSERS.items():
+            us = _time_us(fn, body, number)
+            blocks, size, peak = _allocs(fn, body)
+            print(f"{kind:<15}{name:<11}{us:>9.1f}{blocks:>9}{size:>9}{peak:>9}")
+
+    event = attendify.parse(BODIES["event"]).payload
+    compact = encode_event(event)
+    rows = [("encode", name, fn, event) for name, fn in ENCODERS.items()]
+    rows += [("pretty", name, fn, compact) for name, fn in PRETTY.items()]
+    print(f"\n{'event':<15}{'builder':<11}{'µs/msg':>9}{'size':>9}{'blocks':>9}{'bytes':>9}{'peak':>9}")
+    for what, name, fn, arg in rows:
+        us = _time_us(fn, arg, number)
+        out = fn(arg)
+        size = len(out if isinstance(out, bytes) else out.encode("utf-8"))
+        blocks, retained, peak = _allocs(fn, arg)
+        print(f"{what:<15}{name:<11}{us:>9.1f}{size:>9}{blocks:>9}{retained:>9}{peak:>9}")
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,39 @@
 # consumers/consumer.py
 # -*- coding: utf-8 -*-
+import itertools
 import logging
 import xmlrpc.client
-import xmltodict
+
 import pika
 from dotenv import dotenv_values
 
-def _parse_with_user_support(body: str | bytes):
-    import xml.etree.ElementTree as ET
-    if isinstance(body, (bytes, bytearray)):
-        body = body.decode()
-
-    root = ET.fromstring(body)
-    op   = (root.findtext("./info/operation") or "").strip().lower()
-
-    user_elem = root.find("user")
-    if user_elem is not None:
-        user = {c.tag: c.text or "" for c in user_elem}
-        return {"attendify": {"info": {"operation": op}, "user": user}}
-
-    # fall back to whatever stub (or real lib) was there originally
-    return _orig_xmltodict_parse(body)
-
-# keep a reference to the stub / real parser that the tests injected
-_orig_xmltodict_parse = xmltodict.parse
-xmltodict.parse = _parse_with_user_support
+import attendify
+import batching
+import dedup
+import odoo_rpc
+import refdata
 
 # ────────────────────────────────────────────────────────────────────────
 # HELPERS FOR TEST-SUITE HOOKS
 # ────────────────────────────────────────────────────────────────────────
-def _handle_user_create(parsed):
-    user = parsed['attendify']['user']
+def _handle_user_create(msg):
+    user = msg.payload
     ref  = (user.get('uid') or '').strip()
     if not ref:
         raise ValueError('UID missing in create message')
     # call into your "create user" logic:
     _create_user_logic(user)
 
-def _handle_user_update(parsed):
-    user = parsed['attendify']['user']
+def _handle_user_update(msg):
+    user = msg.payload
     ref  = (user.get('uid') or '').strip()
     if not ref:
         raise ValueError('UID missing in update message')
     # call into your "update user" logic:
     _update_user_logic(user)
 
-def _handle_user_delete(parsed):
-    ref = (parsed['attendify']['user'].get('uid') or '').strip()
+def _handle_user_delete(msg):
+    ref = (msg.payload.get('uid') or '').strip()
     if not ref:
         raise ValueError('UID missing in delete message')
     delete_user(ref)
@@ -64,30 +51,48 @@ RABBIT_PORT = int(config['RABBITMQ_PORT'])
 RABBIT_USER = config['RABBITMQ_USERNAME']
 RABBIT_PWD  = config['RABBITMQ_PASSWORD']
 RABBIT_VHOST= config['RABBITMQ_VHOST']
+RPC_POOL    = int(config.get('ODOO_RPC_POOL_SIZE') or odoo_rpc.DEFAULT_POOL_SIZE)
+REFDATA_TTL = float(config.get('REFDATA_TTL') or refdata.DEFAULT_TTL)
+BATCH_SIZE  = int(config.get('USER_BATCH_SIZE') or 0)      # 0/1 = one message at a time
+BATCH_MS    = int(config.get('USER_BATCH_MS') or 200)
+# "server": res.partner.attendify_upsert_users, "client": per-field RPCs
+USER_INGEST = (config.get('USER_INGEST') or 'server').strip().lower()
+# processed message keys survive restarts in this SQLite file
+DEDUP_DB    = config.get('DEDUP_DB') or 'state/dedup-user.sqlite3'
 
 # ────────────────────────────────────────────────────────────────────────
 # ODOO RPC SETUP
 # ────────────────────────────────────────────────────────────────────────
-common = xmlrpc.client.ServerProxy(f"{ODOO_URL}xmlrpc/2/common")
+common = odoo_rpc.server_proxy(f"{ODOO_URL}xmlrpc/2/common", RPC_POOL)
 UID    = common.authenticate(ODOO_DB, ODOO_EMAIL, ODOO_API, {})
-models = xmlrpc.client.ServerProxy(f"{ODOO_URL}xmlrpc/2/object")
+models = odoo_rpc.server_proxy(f"{ODOO_URL}xmlrpc/2/object", RPC_POOL)
+
+def _odoo(model, method, args, kwargs=None):
+    return models.execute_kw(ODOO_DB, UID, ODOO_API, model, method, args, kwargs or {})
+
+REFDATA = refdata.ReferenceCache(_odoo, ttl=REFDATA_TTL)
+REFDATA.warm()
+
+DEDUP = dedup.DedupStore(DEDUP_DB)
 
 # ────────────────────────────────────────────────────────────────────────
 # RABBITMQ SETUP
 # ────────────────────────────────────────────────────────────────────────
-creds  = pika.PlainCredentials(RABBIT_USER, RABBIT_PWD)
-params = pika.ConnectionParameters(
-    host=RABBIT_HOST, port=RABBIT_PORT,
-    virtual_host=RABBIT_VHOST,
-    credentials=creds,
-)
-conn   = pika.BlockingConnection(params)
-ch     = conn.channel()
-
 EXCHANGE_MAIN = 'user-management'
 QUEUE_MAIN    = 'pos.user'
-ch.exchange_declare(exchange=EXCHANGE_MAIN, exchange_type="direct", durable=True)
-ch.queue_declare   (queue=QUEUE_MAIN, durable=True)
+
+def connect():
+    creds  = pika.PlainCredentials(RABBIT_USER, RABBIT_PWD)
+    params = pika.ConnectionParameters(
+        host=RABBIT_HOST, port=RABBIT_PORT,
+        virtual_host=RABBIT_VHOST,
+        credentials=creds,
+    )
+    conn   = pika.BlockingConnection(params)
+    ch     = conn.channel()
+    ch.exchange_declare(exchange=EXCHANGE_MAIN, exchange_type="direct", durable=True)
+    ch.queue_declare   (queue=QUEUE_MAIN, durable=True)
+    return conn, ch
 
 # ────────────────────────────────────────────────────────────────────────
 # UTILITY HELPERS
@@ -358,22 +363,10 @@ def get_country_id(country_name: str):
     code = COUNTRY_NAME_TO_CODE.get(safe(country_name).title())
     if not code:
         return False
-    res = models.execute_kw(
-        ODOO_DB, UID, ODOO_API,
-        'res.country', 'search_read',
-        [[['code', '=', code]]],
-        {'fields': ['id'], 'limit': 1, 'context': {'skip_rabbit': True}}
-    )
-    return res[0]['id'] if res else False
+    return REFDATA.country_id(code)
 
 def get_title_id(shortcut: str):
-    res = models.execute_kw(
-        ODOO_DB, UID, ODOO_API,
-        'res.partner.title', 'search_read',
-        [[('shortcut', '=', safe(shortcut))]],
-        {'fields': ['id'], 'limit': 1, 'context': {'skip_rabbit': True}}
-    )
-    return res[0]['id'] if res else False
+    return REFDATA.title_id(safe(shortcut))
 
 def get_or_create_company_id(vals: dict):
     domain = [['name','=',vals['name']], ['is_company','=',True]]
@@ -412,21 +405,9 @@ def delete_user(ref: str):
 # ────────────────────────────────────────────────────────────────────────
 # ACTUAL CREATE / UPDATE LOGIC
 # ────────────────────────────────────────────────────────────────────────
-def _create_user_logic(user: dict):
-    ref = safe(user.get('uid'))
-    # 1) Skip if already exists
-    exists = models.execute_kw(
-        ODOO_DB, UID, ODOO_API,
-        'res.partner','search_read',
-        [[['ref','=',ref]]],
-        {'limit':1,'context':{'skip_rabbit':True}}
-    )
-    if exists:
-        logging.info("User %s already exists", ref)
-        return
-    # 2) Build partner vals
+def _create_vals(user: dict) -> dict:
     vals = {
-        'ref':           ref,
+        'ref':           safe(user.get('uid')),
         'name':          f"{safe(user.get('first_name'))} {safe(user.get('last_name'))}",
         'email':         safe(user.get('email')),
         'integration_pw_hash': safe(user.get('password')),
@@ -440,15 +421,82 @@ def _create_user_logic(user: dict):
     title_id = get_title_id(user.get('title'))
     if title_id:
         vals['title'] = title_id
-    # 3) Create
+    return vals
+
+def _update_vals(user: dict) -> dict:
+    vals = {
+        'name':  f"{safe(user.get('first_name'))} {safe(user.get('last_name'))}",
+        'email': safe(user.get('email')),
+    }
+    pw = safe(user.get('password'))
+    if pw:
+        vals['integration_pw_hash'] = pw
+    title_id = get_title_id(user.get('title'))
+    if title_id:
+        vals['title'] = title_id
+    return vals
+
+def _user_payload(user) -> dict:
+    """Declared fields plus nested extras ("address/street", …) for XML-RPC."""
+    return {**(user.extra or {}), **user.to_dict()}
+
+_MISSING_UPSERT = "The method 'attendify_upsert_users' does not exist on the model 'res.partner'"
+
+def upsert_users_on_server(users: list, mode: str) -> bool:
+    """
+    Resolve `users` with one res.partner.attendify_upsert_users call.
+
+    Returns False when the server has no such method (customer_rabbit_connector
+    not upgraded yet); the consumer then stays on the client-side path.
+    """
+    global USER_INGEST
+    if USER_INGEST != 'server':
+        return False
+    try:
+        result = models.execute_kw(
+            ODOO_DB, UID, ODOO_API,
+            'res.partner', 'attendify_upsert_users',
+            [[_user_payload(u) for u in users]],
+            {'mode': mode, 'context': {'skip_rabbit': True}}
+        )
+    except xmlrpc.client.Fault as fault:
+        # only a missing method means "not upgraded"; the traceback of any
+        # other server error names attendify_upsert_users too
+        if _MISSING_UPSERT not in fault.faultString:
+            raise
+        logging.warning("res.partner.attendify_upsert_users unavailable; "
+                        "falling back to client-side user sync")
+        USER_INGEST = 'client'
+        return False
+    logging.info("Server %s of %d user(s): %d created, %d updated, %d skipped",
+                 mode, len(users), result['created'], result['updated'], result['skipped'])
+    return True
+
+def _create_user_logic(user: dict):
+    if upsert_users_on_server([user], 'create'):
+        return
+    ref = safe(user.get('uid'))
+    # 1) Skip if already exists
+    exists = models.execute_kw(
+        ODOO_DB, UID, ODOO_API,
+        'res.partner','search_read',
+        [[['ref','=',ref]]],
+        {'limit':1,'context':{'skip_rabbit':True}}
+    )
+    if exists:
+        logging.info("User %s already exists", ref)
+        return
+    # 2) Create
     partner_id = models.execute_kw(
         ODOO_DB, UID, ODOO_API,
-        'res.partner','create',[vals],
+        'res.partner','create',[_create_vals(user)],
         {'context':{'skip_rabbit':True}}
     )
     logging.info("Created user %s → %s", ref, partner_id)
 
 def _update_user_logic(user: dict):
+    if upsert_users_on_server([user], 'update'):
+        return
     ref = safe(user.get('uid'))
     ids = models.execute_kw(
         ODOO_DB, UID, ODOO_API,
@@ -458,41 +506,175 @@ def _update_user_logic(user: dict):
     if not ids:
         logging.info("User %s not found (update skipped)", ref)
         return
-    vals = {
-        'name':  f"{safe(user.get('first_name'))} {safe(user.get('last_name'))}",
-        'email': safe(user.get('email')),
-    }
-    pw = safe(user.get('password'))
-    if pw:
-        vals['integration_pw_hash'] = pw
-    title_id = get_title_id(user.get('title'))
-    if title_id:
-        vals['title'] = title_id
     models.execute_kw(
         ODOO_DB, UID, ODOO_API,
-        'res.partner','write',[ids, vals],
+        'res.partner','write',[ids, _update_vals(user)],
         {'context':{'skip_rabbit':True}}
     )
     logging.info("Updated user %s", ref)
 
+# ────────────────────────────────────────────────────────────────────────
+# BATCHED CREATE / UPDATE / DELETE (opt-in, see USER_BATCH_SIZE)
+# ────────────────────────────────────────────────────────────────────────
+def _create_users_bulk(users: list):
+    if upsert_users_on_server(users, 'create'):
+        return
+    refs = [safe(u.get('uid')) for u in users]
+    existing = {
+        r['ref'] for r in models.execute_kw(
+            ODOO_DB, UID, ODOO_API,
+            'res.partner','search_read',
+            [[['ref','in',refs]]],
+            {'fields':['ref'],'context':{'skip_rabbit':True}}
+        )
+    }
+    vals_list, seen = [], set(existing)
+    for user, ref in zip(users, refs):
+        if ref in seen:
+            logging.info("User %s already exists", ref)
+            continue
+        seen.add(ref)
+        vals_list.append(_create_vals(user))
+    if not vals_list:
+        return
+    # res.partner.create is model_create_multi: one RPC for the whole batch
+    partner_ids = models.execute_kw(
+        ODOO_DB, UID, ODOO_API,
+        'res.partner','create',[vals_list],
+        {'context':{'skip_rabbit':True}}
+    )
+    logging.info("Created %d user(s) in one call → %s", len(vals_list), partner_ids)
+
+def _update_users_bulk(users: list):
+    if upsert_users_on_server(users, 'update'):
+        return
+    refs = [safe(u.get('uid')) for u in users]
+    ids_by_ref = {}
+    for r in models.execute_kw(
+        ODOO_DB, UID, ODOO_API,
+        'res.partner','search_read',
+        [[['ref','in',refs]]],
+        {'fields':['ref'],'context':{'active_test':False,'skip_rabbit':True}}
+    ):
+        ids_by_ref.setdefault(r['ref'], []).append(r['id'])
+
+    # later updates of the same user win, field by field
+    merged = {}
+    for user, ref in zip(users, refs):
+        if ref not in ids_by_ref:
+            logging.info("User %s not found (update skipped)", ref)
+            continue
+        merged.setdefault(ref, {}).update(_update_vals(user))
+
+    # records that end up with identical values share one write
+    groups = {}
+    for ref, vals in merged.items():
+        key = tuple(sorted(vals.items()))
+        groups.setdefault(key, []).extend(ids_by_ref[ref])
+    for key, ids in groups.items():
+        models.execute_kw(
+            ODOO_DB, UID, ODOO_API,
+            'res.partner','write',[ids, dict(key)],
+            {'context':{'skip_rabbit':True}}
+        )
+    logging.info("Updated %d user(s) in %d write(s)", len(merged), len(groups))
+
+def _delete_users_bulk(users: list):
+    refs = [safe(u.get('uid')) for u in users]
+    partner_ids = models.execute_kw(
+        ODOO_DB, UID, ODOO_API,
+        'res.partner','search',[[['ref','in',refs]]],
+        {'context':{'active_test':False,'skip_rabbit':True}}
+    )
+    if partner_ids:
+        models.execute_kw(
+            ODOO_DB, UID, ODOO_API,
+            'res.partner','unlink',[partner_ids],
+            {'context':{'skip_rabbit':True}}
+        )
+    logging.info("Deleted %d partner(s) for %d user(s)", len(partner_ids), len(refs))
+
+_BULK_OPS = {
+    'create': (_create_users_bulk, _create_user_logic),
+    'update': (_update_users_bulk, _update_user_logic),
+    'delete': (_delete_users_bulk, lambda user: delete_user(safe(user.get('uid')))),
+}
+
+def process_batch(deliveries: list) -> list:
+    """
+    Resolve a batch of pos.user deliveries; return the failed delivery tags.
+
+    Consecutive messages with the same operation are resolved with one
+    bulk call.  If that call fails, its messages are retried one by one
+    so a single bad message only fails itself.
+    """
+    failed, parsed, keys = [], [], {}
+    for d in deliveries:
+        key = dedup.message_key(d.properties, d.body)
+        if DEDUP.seen(key) or key in keys.values():
+            logging.info("Duplicate message %s (%s); acking", d.delivery_tag, key)
+            continue
+        keys[d.delivery_tag] = key
+        try:
+            msg  = attendify.parse(d.body)
+            op, user = msg.operation, msg.payload
+            if msg.kind != 'user':
+                raise ValueError(f"Unexpected payload: {msg.kind or 'none'}")
+            if op not in _BULK_OPS:
+                raise ValueError(f"Unknown operation: {op}")
+            if not safe(user.get('uid')):
+                raise ValueError(f'UID missing in {op} message')
+            parsed.append((d.delivery_tag, op, user))
+        except Exception:
+            logging.exception("Rejecting message %s", d.delivery_tag)
+            failed.append(d.delivery_tag)
+
+    for op, run in itertools.groupby(parsed, key=lambda p: p[1]):
+        run = list(run)
+        bulk, single = _BULK_OPS[op]
+        try:
+            bulk([user for _, _, user in run])
+            continue
+        except Exception:
+            logging.exception("Bulk %s of %d message(s) failed; isolating", op, len(run))
+        for tag, _, user in run:
+            try:
+                single(user)
+            except Exception:
+                logging.exception("Message %s failed (%s)", tag, op)
+                failed.append(tag)
+
+    for tag, key in keys.items():
+        if tag not in failed:
+            DEDUP.mark(key)
+    return failed
+
 # ────────────────────────────────────────────────────────────────────────
 # MESSAGE DISPATCHER
 # ────────────────────────────────────────────────────────────────────────
+def _dispatch(msg: attendify.Message):
+    op = msg.operation
+    if msg.kind != 'user':
+        raise ValueError(f"Unexpected payload: {msg.kind or 'none'}")
+
+    if   op == 'create':
+        _handle_user_create(msg)
+    elif op == 'update':
+        _handle_user_update(msg)
+    elif op == 'delete':
+        _handle_user_delete(msg)
+    else:
+        raise ValueError(f"Unknown operation: {op}")
+
 def process_message(ch, method, props, body):
-    text = body.decode() if isinstance(body, (bytes, bytearray)) else body
+    key = dedup.message_key(props, body)
+    if DEDUP.seen(key):
+        logging.info("Duplicate message %s (%s); acking", method.delivery_tag, key)
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+        return
     try:
-        data = xmltodict.parse(text)
-        op   = data['attendify']['info']['operation'].strip().lower()
-
-        if   op == 'create':
-            _handle_user_create(data)
-        elif op == 'update':
-            _handle_user_update(data)
-        elif op == 'delete':
-            _handle_user_delete(data)
-        else:
-            raise ValueError(f"Unknown operation: {op}")
-
+        _dispatch(attendify.parse(body))
+        DEDUP.mark(key)
         ch.basic_ack(delivery_tag=method.delivery_tag)
     except Exception:
         ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
@@ -502,13 +684,24 @@ def process_message(ch, method, props, body):
 # ────────────────────────────────────────────────────────────────────────
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
-    ch.basic_consume(queue=QUEUE_MAIN,
-                     on_message_callback=process_message,
-                     auto_ack=False)
+    conn, ch = connect()
+    if BATCH_SIZE > 1:
+        batching.MessageBatcher(
+            conn, ch, process_batch, max_size=BATCH_SIZE, max_wait_ms=BATCH_MS
+        ).start(QUEUE_MAIN)
+        logging.info("Batch mode: up to %d message(s) / %d ms", BATCH_SIZE, BATCH_MS)
+    else:
+        ch.basic_consume(queue=QUEUE_MAIN,
+                         on_message_callback=process_message,
+                         auto_ack=False)
     logging.info("Waiting for user messages…")
     try:
         ch.start_consuming()
     except KeyboardInterrupt:
         ch.stop_consuming()
     finally:
+        logging.info("Reference cache: %s", REFDATA.stats())
+        logging.info("Dedup store: %s", DEDUP.stats())
+        DEDUP.close()
+        odoo_rpc.shared_transport().log_stats()
         conn.close()
\ No newline at end of file
@@ -1,10 +1,19 @@
 import socket
-import pika
-import xmltodict
+import logging
+import functools
 import xmlrpc.client
+import pika
 import re
 from dotenv import dotenv_values
 
+import attendify
+import dedup
+import identity
+import odoo_rpc
+import refdata
+import schema
+from keyed_executor import KeyedExecutor
+
 # ────────────────────────────────────────────────────────────────────────
 # ODOO RPC SETUP
 # ────────────────────────────────────────────────────────────────────────
@@ -14,13 +23,49 @@ USER       = cfg["EMAIL"]
 PWD        = cfg["API_KEY"]
 ODOO_HOST  = cfg.get("ODOO_HOST", "web")
 ODOO_PORT  = int(cfg.get("ODOO_PORT", 8069))
+RPC_POOL   = int(cfg.get("ODOO_RPC_POOL_SIZE") or odoo_rpc.DEFAULT_POOL_SIZE)
+REFDATA_TTL = float(cfg.get("REFDATA_TTL") or refdata.DEFAULT_TTL)
+SCHEMA_CHECK_SECS = float(cfg.get("SCHEMA_CHECK_SECS") or schema.DEFAULT_CHECK_INTERVAL)
+# EVENT_WORKERS > 0 spreads messages over that many serial lanes keyed by event UID
+EVENT_WORKERS  = int(cfg.get("EVENT_WORKERS") or 0)
+EVENT_PREFETCH = int(cfg.get("EVENT_PREFETCH") or max(1, EVENT_WORKERS * 4))
+# "server": one attendify.ingest RPC per message (event_sync addon);
+# "client": the handlers below, one RPC per lookup / write
+EVENT_INGEST   = (cfg.get("EVENT_INGEST") or "server").strip().lower()
+# processed message keys survive restarts in this SQLite file
+DEDUP_DB       = cfg.get("DEDUP_DB") or "state/dedup-event.sqlite3"
+IDENTITY_SIZE  = int(cfg.get("IDENTITY_MAP_SIZE") or identity.DEFAULT_CAPACITY)
 
 socket.create_connection((ODOO_HOST, ODOO_PORT), timeout=5).close()
 
 url    = f"http://{ODOO_HOST}:{ODOO_PORT}/xmlrpc/2/"
-common = xmlrpc.client.ServerProxy(url + "common")
+common = odoo_rpc.server_proxy(url + "common", RPC_POOL)
 uid    = common.authenticate(DB, USER, PWD, {})
-models = xmlrpc.client.ServerProxy(url + "object")
+models = odoo_rpc.server_proxy(url + "object", RPC_POOL)
+
+
+def _odoo(model, method, args, kwargs=None):
+    return models.execute_kw(DB, uid, PWD, model, method, args, kwargs or {})
+
+
+REFDATA = refdata.ReferenceCache(_odoo, ttl=REFDATA_TTL)
+REFDATA.warm()
+
+DEDUP = dedup.DedupStore(DEDUP_DB)
+
+# external UID → Odoo id for partners / events, event id → first ticket;
+# only the client-side handlers look ids up, so only they pay for the warm-up
+IDS = identity.IdentityMap(_odoo, capacity=IDENTITY_SIZE)
+if EVENT_INGEST == "client":
+    IDS.warm()
+
+# every model whose optional fields the handlers probe – one RPC for all
+SCHEMA = schema.SchemaCache(
+    _odoo,
+    ["event.event", "event.event.ticket", "product.template"],
+    check_interval=SCHEMA_CHECK_SECS,
+)
+SCHEMA.load()
 
 
 def to_dt(date_str: str | None, time_str: str | None = None):
@@ -45,145 +90,125 @@ def to_dt(date_str: str | None, time_str: str | None = None):
 # ────────────────────────────────────────────────────────────────────────
 # RABBITMQ SETUP
 # ────────────────────────────────────────────────────────────────────────
-creds  = pika.PlainCredentials(cfg["RABBITMQ_USERNAME"], cfg["RABBITMQ_PASSWORD"])
-params = pika.ConnectionParameters(
-    host=cfg["RABBITMQ_HOST"],
-    port=int(cfg.get("RABBITMQ_PORT", 5672)),
-    virtual_host=cfg.get("RABBITMQ_VHOST", "/"),
-    credentials=creds,
-)
-conn = pika.BlockingConnection(params)
-ch   = conn.channel()
-
 exchange, queue = "event", "pos.event"
 routing_keys = [
     "event.create", "event.update", "event.delete",
     "event.register", "event.unregister",
 ]
+# user deletes only evict IDS entries (no Odoo writes), so they are only
+# needed when the client-side handlers keep partner ids in IDS
+extra_bindings = [("user-management", "user.delete")] if EVENT_INGEST == "client" else []
+
+
+def connect():
+    creds  = pika.PlainCredentials(cfg["RABBITMQ_USERNAME"], cfg["RABBITMQ_PASSWORD"])
+    params = pika.ConnectionParameters(
+        host=cfg["RABBITMQ_HOST"],
+        port=int(cfg.get("RABBITMQ_PORT", 5672)),
+        virtual_host=cfg.get("RABBITMQ_VHOST", "/"),
+        credentials=creds,
+    )
+    conn = pika.BlockingConnection(params)
+    ch   = conn.channel()
 
-ch.exchange_declare(exchange=exchange, exchange_type="direct", durable=True)
-ch.queue_declare(queue=queue, durable=True)
-for rk in routing_keys:
-    ch.queue_bind(queue=queue, exchange=exchange, routing_key=rk)
-ch.basic_qos(prefetch_count=1)
+    ch.exchange_declare(exchange=exchange, exchange_type="direct", durable=True)
+    ch.queue_declare(queue=queue, durable=True)
+    for rk in routing_keys:
+        ch.queue_bind(queue=queue, exchange=exchange, routing_key=rk)
+    for ex, rk in extra_bindings:
+        ch.exchange_declare(exchange=ex, exchange_type="direct", durable=True)
+        ch.queue_bind(queue=queue, exchange=ex, routing_key=rk)
+    ch.basic_qos(prefetch_count=EVENT_PREFETCH)
+    return conn, ch
 
 
 # ────────────────────────────────────────────────────────────────────────
 # HELPER: check if model has field
 # ────────────────────────────────────────────────────────────────────────
 def model_has_field(model: str, field: str) -> bool:
-    return bool(models.execute_kw(
-        DB, uid, PWD,
-        "ir.model.fields", "search",
-        [[("model", "=", model), ("name", "=", field)]],
-        {"limit": 1}
-    ))
-
-HAS_FEE        = model_has_field("event.event", "entrance_fee")
-HAS_GCID       = model_has_field("event.event", "gcid")
-HAS_TICKET_UOM = model_has_field("event.event.ticket", "product_uom_id")
+    return SCHEMA.has(model, field)   # cached, no RPC
 
 
 # ────────────────────────────────────────────────────────────────────────
 # HELPER: product.template for event
 # ────────────────────────────────────────────────────────────────────────
-def find_or_create_event_product(ev: dict) -> int:
+def _pos_product_vals(pos_categ_id: int) -> dict:
+    """POS category + availability, in whatever shape this database has."""
+    # point_of_sale defines these on product.template; variants inherit them
+    if model_has_field("product.template", "pos_categ_id"):
+        vals = {"pos_categ_id": pos_categ_id}
+    elif model_has_field("product.template", "pos_categ_ids"):
+        vals = {"pos_categ_ids": [(6, 0, [pos_categ_id])]}
+    else:
+        vals = {}
+    if model_has_field("product.template", "available_in_pos"):
+        vals["available_in_pos"] = True
+    return vals
+
+
+def _same_values(row: dict, vals: dict) -> bool:
+    for name, value in vals.items():
+        current = row.get(name)
+        if isinstance(value, list):                      # [(6, 0, ids)]
+            if sorted(current or []) != sorted(value[0][2]):
+                return False
+        elif isinstance(current, (list, tuple)):         # many2one: [id, name]
+            if current[0] != value:
+                return False
+        elif current != value:
+            return False
+    return True
+
+
+def upsert_event_product(ev: attendify.Event) -> int:
+    """
+    Create or update the event's ticket product in at most two RPCs:
+    one search_read, then one create or write that also carries the POS
+    fields.  Nothing is written when the template is already in sync.
+    """
     title        = ev.get("title") or "Unnamed Event"
-    event_uid    = ev.get("uid")
-    gcid         = ev.get("gcid")
     fee          = float(ev.get("entrance_fee") or 0.0)
-    default_code = event_uid or gcid or title or "event"
-
-    # Build the full product name with "Ticket: " prefix
-    full_name = f"Ticket: {title}"
-
-    # 1) Search for an existing template
-    existing = models.execute_kw(
-        DB, uid, PWD,
-        "product.template", "search_read",
-        [[("default_code", "=", default_code)]],
-        {"limit": 1, "fields": ["id", "name"]}
-    )
-    if existing:
-        template_id = existing[0]["id"]
-        print(f"Product template exists: {existing[0]['name']} (id={template_id})")
-    else:
-        template_id = None
+    default_code = ev.get("uid") or ev.get("gcid") or title or "event"
 
-    # 2) Locate Drinks/Tickets POS category
-    pos_cat = models.execute_kw(
-        DB, uid, PWD,
-        "pos.category", "search_read",
-        [[("name", "=", "Drinks/Tickets")]],
-        {"limit": 1, "fields": ["id"]}
-    )
-    if not pos_cat:
+    # Locate Drinks/Tickets POS category (cached reference data)
+    pos_categ_id = REFDATA.pos_category_id("Drinks/Tickets")
+    if not pos_categ_id:
         raise RuntimeError("POS category ‘Drinks/Tickets’ not found")
-    pos_categ_id = pos_cat[0]["id"]
 
-    # 3) Prepare the template values (no POS fields here)
     vals = {
-        "name":             full_name,
+        "name":             f"Ticket: {title}",
         "type":             "service",
         "default_code":     default_code,
         "list_price":       fee,
         "sale_ok":          True,
         "purchase_ok":      False,
         "description_sale": (ev.get("description") or "") + "\nLocation: " + (ev.get("location") or ""),
+        **_pos_product_vals(pos_categ_id),
     }
 
-    # 4) Create or update the template
-    if template_id:
-        models.execute_kw(DB, uid, PWD,
-            "product.template", "write",
-            [[template_id], vals]
-        )
-        print(f"Updated template {template_id} to '{full_name}'")
-    else:
+    # 1) existing template, with the values we would write
+    existing = models.execute_kw(DB, uid, PWD,
+        "product.template", "search_read",
+        [[("default_code", "=", default_code)]],
+        {"limit": 1, "fields": list(vals)}
+    )
+
+    # 2) create or write (template + POS fields in one call)
+    if not existing:
         template_id = models.execute_kw(DB, uid, PWD,
-            "product.template", "create",
-            [vals]
+            "product.template", "create", [vals]
         )
-        print(f"Created template {default_code} as '{full_name}' (id={template_id})")
-
-    # 5) Fetch its variants
-    variant_ids = models.execute_kw(DB, uid, PWD,
-        "product.product", "search",
-        [[("product_tmpl_id", "=", template_id)]]
-    )
-    if not variant_ids:
-        print("No variants found, skipping POS setup")
+        print(f"Created template {default_code} as '{vals['name']}' (id={template_id})")
         return template_id
 
-    # 6) Determine POS field type and set both category + availability
-    has_m2o = model_has_field("product.product", "pos_categ_id")
-    has_m2m = model_has_field("product.product", "pos_categ_ids")
-
-    if has_m2o:
-        write_vals = {
-            "pos_categ_id":     pos_categ_id,
-            "available_in_pos": True,
-        }
-    elif has_m2m:
-        write_vals = {
-            "pos_categ_ids":    [(6, 0, [pos_categ_id])],
-            "available_in_pos": True,
-        }
+    template_id = existing[0]["id"]
+    if _same_values(existing[0], vals):
+        print(f"Product template {template_id} already in sync")
     else:
-        # fallback: only toggle available_in_pos if it exists
-        if model_has_field("product.product", "available_in_pos"):
-            write_vals = {"available_in_pos": True}
-        else:
-            print("No POS-category or availability field on product.product; skipping")
-            return template_id
-
-    # 7) Apply to all variants
-    models.execute_kw(DB, uid, PWD,
-        "product.product", "write",
-        [variant_ids, write_vals]
-    )
-    print(f"→ Prefixed name and set POS category + availability on variants {variant_ids}")
-
+        models.execute_kw(DB, uid, PWD,
+            "product.template", "write", [[template_id], vals]
+        )
+        print(f"Updated template {template_id} to '{vals['name']}'")
     return template_id
 
 
@@ -213,15 +238,10 @@ PRODUCT_ID = find_or_create_ticket_product()
 # HELPER: UoM lookup (Unit)
 # ────────────────────────────────────────────────────────────────────────
 def get_unit_uom_id() -> int:
-    uom_ids = models.execute_kw(
-        DB, uid, PWD,
-        "uom.uom", "search",
-        [[("category_id.name", "=", "Unit")]],
-        {"limit": 1}
-    )
-    if not uom_ids:
+    uom_id = REFDATA.uom_id_for_category("Unit")
+    if not uom_id:
         raise RuntimeError("No UoM 'Unit' found")
-    return uom_ids[0]
+    return uom_id
 
 
 UOM_UNIT_ID = get_unit_uom_id()
@@ -250,32 +270,212 @@ def find_or_create_venue_partner(name: str) -> int:
 # ────────────────────────────────────────────────────────────────────────
 # MESSAGE HANDLER
 # ────────────────────────────────────────────────────────────────────────
+def _parse(body) -> attendify.Message:
+    return attendify.parse(body)
+
+
+def ingest_on_server(msg: attendify.Message) -> dict:
+    """Whole message in one RPC / one Odoo transaction."""
+    return models.execute_kw(
+        DB, uid, PWD,
+        "attendify.ingest", "ingest",
+        [{"operation": msg.operation, "kind": msg.kind, "payload": msg.payload.to_dict()}],
+    )
+
+
+def _track_ids(msg: attendify.Message, result: dict):
+    """Keep IDS current from a server-side ingestion result."""
+    if msg.kind != "event":
+        return
+    if result.get("status") == "created":
+        IDS.events.put(msg.payload.get("uid"), result["id"])
+    elif result.get("status") == "deleted":
+        IDS.forget_event(msg.payload.get("uid"))
+
+
+# Odoo's answer when event_sync is not upgraded to the ingestion model yet
+_MISSING_INGEST = "Object attendify.ingest doesn't exist"
+
+
+def _dispatch(msg: attendify.Message):
+    global EVENT_INGEST
+    if msg.kind == "user":
+        if msg.operation == "delete":
+            IDS.forget_partner(msg.payload.get("uid"))
+        return
+    if EVENT_INGEST == "server" and msg.payload is not None:
+        try:
+            result = ingest_on_server(msg)
+            print(f"\n{msg.kind.upper()} {msg.operation.upper()} → {result}")
+            _track_ids(msg, result)
+            return
+        except xmlrpc.client.Fault as fault:
+            if _MISSING_INGEST not in fault.faultString:
+                raise
+            # event_sync without the ingestion model: nothing was written
+            print("attendify.ingest unavailable; falling back to client-side handlers")
+            EVENT_INGEST = "client"
+
+    if msg.kind == "event":
+        handle_event(msg.payload, msg.operation)
+    elif msg.kind == "event_attendee":
+        handle_attendee(msg.payload, msg.operation)
+    else:
+        print("Unknown payload type")
+
+
+def _lane_key(msg: attendify.Message) -> str:
+    """Event UID a message belongs to – messages sharing it stay in order."""
+    if msg.kind == "event":
+        return msg.payload.get("uid") or ""
+    if msg.kind == "event_attendee":
+        return msg.payload.get("event_id") or ""
+    return ""
+
+
+def _is_duplicate(ch, tag, key) -> bool:
+    if not DEDUP.seen(key):
+        return False
+    print(f"Duplicate message {tag} ({key}); acking")
+    ch.basic_ack(delivery_tag=tag)
+    return True
+
+
 def process_message(ch, method, props, body):
+    key = dedup.message_key(props, body)
+    if _is_duplicate(ch, method.delivery_tag, key):
+        return
     try:
-        msg  = xmltodict.parse(body)
-        root = msg.get("attendify", {})
-        op   = root["info"]["operation"].lower()
-
-        if "event" in root:
-            handle_event(root["event"], op)
-        elif "event_attendee" in root:
-            handle_attendee(root["event_attendee"], op)
-        else:
-            print("Unknown payload type")
+        _dispatch(_parse(body))
 
+        DEDUP.mark(key)
         ch.basic_ack(delivery_tag=method.delivery_tag)  # ACK only after success
     except Exception as e:
         print("Error processing message:", e)
         ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)  # drop bad one
 
 
+# ────────────────────────────────────────────────────────────────────────
+# PARALLEL MODE: one serial lane per event-UID hash
+# ────────────────────────────────────────────────────────────────────────
+LANES = None      # KeyedExecutor, created by main() when EVENT_WORKERS > 0
+
+
+def _settle(ch, tag, key, fut):
+    # runs on the connection thread (pika channels are not thread-safe)
+    exc = fut.exception()
+    if exc is None:
+        DEDUP.mark(key)
+        ch.basic_ack(delivery_tag=tag)  # ACK only after the Odoo writes succeeded
+    else:
+        print("Error processing message:", exc)
+        ch.basic_nack(delivery_tag=tag, requeue=False)
+
+
+def process_message_parallel(ch, method, props, body):
+    tag = method.delivery_tag
+    key = dedup.message_key(props, body)
+    if _is_duplicate(ch, tag, key):
+        return
+    try:
+        msg = _parse(body)
+    except Exception as e:
+        print("Error processing message:", e)
+        ch.basic_nack(delivery_tag=tag, requeue=False)
+        return
+
+    fut = LANES.submit(_lane_key(msg), _dispatch, msg)
+    fut.add_done_callback(
+        lambda f: ch.connection.add_callback_threadsafe(functools.partial(_settle, ch, tag, key, f))
+    )
+
+
 
 # ────────────────────────────────────────────────────────────────────────
 # EVENT CRUD
 # ────────────────────────────────────────────────────────────────────────
-def handle_event(ev: dict, op: str):
+def _event_patch_vals(ev: attendify.Event) -> dict:
+    """
+    Odoo values for a "patch" message: only the fields it carries, and
+    venue / organizer lookups only when those fields changed.
+    """
+    vals = {}
+    if ev.title is not None:
+        vals["name"] = ev.title
+    if ev.description is not None:
+        vals["description"] = ev.description
+    if ev.start_date is not None:
+        vals["date_begin"] = to_dt(ev.start_date, ev.start_time)
+    if ev.end_date is not None:
+        vals["date_end"] = to_dt(ev.end_date, ev.end_time)
+    if ev.gcid is not None and model_has_field("event.event", "gcid"):
+        vals["gcid"] = ev.gcid.strip() or False
+    if ev.location is not None:
+        vals["address_id"] = find_or_create_venue_partner(ev.location) if ev.location else False
+    if ev.organizer_uid is not None:
+        if ev.organizer_uid:
+            org_id = IDS.partner_id(ev.organizer_uid)
+            if org_id:
+                vals["organizer_id"] = org_id
+        else:
+            vals["organizer_id"] = False
+    if ev.entrance_fee is not None and model_has_field("event.event", "entrance_fee"):
+        try:
+            vals["entrance_fee"] = float(ev.entrance_fee or 0.0)
+        except ValueError:
+            print("entrance_fee parse error:", ev.entrance_fee)
+    return vals
+
+
+def _product_patch_vals(ev: attendify.Event) -> dict:
+    """Ticket product values fed by the fields a "patch" carries."""
+    vals = {}
+    if ev.title is not None:
+        vals["name"] = f"Ticket: {ev.title or 'Unnamed Event'}"
+    if ev.entrance_fee is not None:
+        try:
+            vals["list_price"] = float(ev.entrance_fee or 0.0)
+        except ValueError:
+            print("entrance_fee parse error:", ev.entrance_fee)
+    if ev.description is not None or ev.location is not None:
+        vals["description_sale"] = (ev.description or "") + "\nLocation: " + (ev.location or "")
+    return vals
+
+
+def patch_event(ev: attendify.Event):
+    """
+    Apply a field-level update with one targeted write, plus one on the
+    ticket product when the patch changes its name, price or description.
+    """
+    rec_id = IDS.event_id(ev.get("uid"))
+    if not rec_id:
+        print("patch skipped - uid unknown")
+        return
+    vals = _event_patch_vals(ev)
+    if vals:
+        models.execute_kw(
+            DB, uid, PWD,
+            "event.event", "write", [[rec_id], vals], {"context": {"skip_rabbit": True}}
+        )
+    product_vals = _product_patch_vals(ev)
+    if product_vals:
+        template_ids = models.execute_kw(
+            DB, uid, PWD,
+            "product.template", "search", [[("default_code", "=", ev.get("uid"))]], {"limit": 1}
+        )
+        if template_ids:
+            models.execute_kw(
+                DB, uid, PWD, "product.template", "write", [template_ids, product_vals]
+            )
+    print(f"Event patched  id={rec_id} fields={sorted(vals)}")
+
+
+def handle_event(ev: attendify.Event, op: str):
     event_uid = ev.get("uid")
     print(f"\nEVENT {op.upper()}  uid={event_uid}")
+    if op == "patch":
+        patch_event(ev)
+        return
 
     vals = {
         "external_uid": event_uid,
@@ -290,12 +490,12 @@ def handle_event(ev: dict, op: str):
     if fee_str:
         try:
             fee = float(fee_str)
-            if HAS_FEE:
+            if model_has_field("event.event", "entrance_fee"):
                 vals["entrance_fee"] = fee
         except ValueError:
             print("entrance_fee parse error:", fee_str)
 
-    if HAS_GCID and ev.get("gcid"):
+    if model_has_field("event.event", "gcid") and ev.get("gcid"):
         vals["gcid"] = ev["gcid"].strip()
 
     location = ev.get("location")
@@ -304,14 +504,9 @@ def handle_event(ev: dict, op: str):
 
     org_uid = ev.get("organizer_uid")
     if org_uid:
-        org = models.execute_kw(
-            DB, uid, PWD,
-            "res.partner", "search_read",
-            [[("ref", "=", org_uid)]],
-            {"limit": 1, "fields": ["id"]}
-        )
-        if org:
-            vals["organizer_id"] = org[0]["id"]
+        org_id = IDS.partner_id(org_uid)
+        if org_id:
+            vals["organizer_id"] = org_id
 
     # registration limit
     limit_val = ev.get("registration_limit") or ev.get("seats_max") or ev.get("limit")
@@ -323,13 +518,7 @@ def handle_event(ev: dict, op: str):
         except ValueError:
             print("seats_max parse error:", limit_val)
 
-    existing = models.execute_kw(
-        DB, uid, PWD,
-        "event.event", "search_read",
-        [[("external_uid", "=", event_uid)]],
-        {"limit": 1, "fields": ["id"]}
-    )
-    rec_id = existing and existing[0]["id"]
+    rec_id = IDS.event_id(event_uid)
     ctx = {"context": {"skip_rabbit": True}}
 
     if op == "create":
@@ -344,9 +533,10 @@ def handle_event(ev: dict, op: str):
         print(f"Event created  id={new_id}")
 
         # product.template
-        find_or_create_event_product(ev)
+        upsert_event_product(ev)
 
         # create ticket if fee > 0
+        tkt_id = False
         if fee > 0:
             ticket_vals = {
                 "event_id":  new_id,
@@ -354,7 +544,7 @@ def handle_event(ev: dict, op: str):
                 "price":     fee,
                 "product_id": PRODUCT_ID,
             }
-            if HAS_TICKET_UOM:
+            if model_has_field("event.event.ticket", "product_uom_id"):
                 ticket_vals["product_uom_id"] = UOM_UNIT_ID
 
             tkt_id = models.execute_kw(
@@ -362,6 +552,7 @@ def handle_event(ev: dict, op: str):
                 "event.event.ticket", "create", [ticket_vals], ctx
             )
             print(f"Ticket created  id={tkt_id}")
+        IDS.event_created(event_uid, new_id, tkt_id)
 
     elif op == "update":
         if rec_id:
@@ -370,6 +561,7 @@ def handle_event(ev: dict, op: str):
                 "event.event", "write", [[rec_id], vals], ctx
             )
             print(f"Event updated  id={rec_id}")
+            upsert_event_product(ev)       # keep ticket name / price in sync
         else:
             print("update skipped - uid unknown")
 
@@ -379,6 +571,7 @@ def handle_event(ev: dict, op: str):
                 DB, uid, PWD,
                 "event.event", "unlink", [[rec_id]], ctx
             )
+            IDS.forget_event(event_uid)
             print(f"Event deleted  id={rec_id}")
         else:
             print("delete skipped - uid unknown")
@@ -387,32 +580,41 @@ def handle_event(ev: dict, op: str):
 # ────────────────────────────────────────────────────────────────────────
 # REGISTRATION CRUD
 # ────────────────────────────────────────────────────────────────────────
-def handle_attendee(ea: dict, op: str):
+def handle_attendee(ea: attendify.EventAttendee, op: str):
     user_uid  = ea.get("uid")
     event_uid = ea.get("event_id")
     print(f"\nATTENDEE {op.upper()} user={user_uid} event={event_uid}")
+    try:
+        _handle_attendee(user_uid, event_uid, op)
+    except xmlrpc.client.Fault as fault:
+        if not _is_stale_id_fault(fault):
+            raise
+        # a cached id points at a record deleted from the Odoo UI:
+        # drop the cached ids and try once more with fresh lookups
+        print("attendee write hit a deleted record; retrying with fresh ids")
+        IDS.forget_partner(user_uid)
+        IDS.forget_event(event_uid)
+        _handle_attendee(user_uid, event_uid, op)
 
-    partner = models.execute_kw(
-        DB, uid, PWD,
-        "res.partner", "search_read",
-        [[("ref", "=", user_uid)]],
-        {"limit": 1, "fields": ["id"]}
-    )
-    if not partner:
+
+# what Odoo reports for a write that refers to a deleted partner / event
+_STALE_ID_FAULTS = ("MissingError", "ForeignKeyViolation", "does not exist or has been deleted")
+
+
+def _is_stale_id_fault(fault: xmlrpc.client.Fault) -> bool:
+    return any(marker in fault.faultString for marker in _STALE_ID_FAULTS)
+
+
+def _handle_attendee(user_uid: str, event_uid: str, op: str):
+    partner_id = IDS.partner_id(user_uid)
+    if not partner_id:
         print("user UID not found")
         return
-    partner_id = partner[0]["id"]
 
-    event = models.execute_kw(
-        DB, uid, PWD,
-        "event.event", "search_read",
-        [[("external_uid", "=", event_uid)]],
-        {"limit": 1, "fields": ["id"]}
-    )
-    if not event:
+    event_id = IDS.event_id(event_uid)
+    if not event_id:
         print("event UID not found")
         return
-    event_id = event[0]["id"]
 
     existing = models.execute_kw(
         DB, uid, PWD,
@@ -423,22 +625,12 @@ def handle_attendee(ea: dict, op: str):
     reg_id = existing and existing[0]["id"]
     ctx    = {"context": {"skip_rabbit": True}}
 
-    # Helper: fetch first ticket (if any) to link sale order / price
-    def _get_first_ticket_id(ev_id: int):
-        tix = models.execute_kw(
-            DB, uid, PWD,
-            "event.event.ticket", "search_read",
-            [[("event_id", "=", ev_id)]],
-            {"limit": 1, "fields": ["id"], "order": "id ASC"}
-        )
-        return tix[0]["id"] if tix else False
-
     if op == "register":
         if reg_id:
             print(f"Already registered (id={reg_id})")
             return
 
-        ticket_id = _get_first_ticket_id(event_id)
+        ticket_id = IDS.first_ticket_id(event_id)
         reg_vals  = {"event_id": event_id, "partner_id": partner_id}
         if ticket_id:
             reg_vals["event_ticket_id"] = ticket_id
@@ -462,6 +654,30 @@ def handle_attendee(ea: dict, op: str):
         print(f"Ignored attendee op '{op}' (unsupported)")
 
 
-print("Waiting for RabbitMQ messages …")
-ch.basic_consume(queue=queue, on_message_callback=process_message, auto_ack=False)
-ch.start_consuming()
\ No newline at end of file
+def main():
+    global LANES
+    logging.basicConfig(level=logging.INFO)
+    if EVENT_WORKERS > 0:
+        LANES = KeyedExecutor(EVENT_WORKERS, name="event-lane")
+    conn, ch = connect()
+    print("Waiting for RabbitMQ messages …")
+    if LANES:
+        print(f"Parallel mode: {LANES.lanes} lane(s), prefetch {EVENT_PREFETCH}")
+        ch.basic_consume(queue=queue, on_message_callback=process_message_parallel, auto_ack=False)
+    else:
+        ch.basic_consume(queue=queue, on_message_callback=process_message, auto_ack=False)
+    try:
+        ch.start_consuming()
+    finally:
+        if LANES:
+            LANES.shutdown(wait=False)
+        logging.info("Reference cache: %s", REFDATA.stats())
+        logging.info("Dedup store: %s", DEDUP.stats())
+        logging.info("Identity map: %s", IDS.stats())
+        DEDUP.close()
+        odoo_rpc.shared_transport().log_stats()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# consumers/dedup.py
+# -*- coding: utf-8 -*-
+"""
+Idempotency store for the consumers: skip messages that were already
+processed.
+
+RabbitMQ redelivers unacked messages after a crash, and producers resend
+freely, so the same message can reach a consumer more than once.  Every
+message gets a key: its AMQP `message_id`, or a SHA-256 of the body when
+the producer did not set one.  A key is recorded only after the message
+was processed successfully; a later delivery with a recorded key is acked
+without touching Odoo.
+
+Recent keys sit in an in-memory LRU; every key is also written to a small
+SQLite file, so the history survives a restart.  Keys expire: after
+`retention` seconds for message ids and after `hash_window` seconds
+(redelivery scale, 30 s by default) for content hashes.  Two identical
+bodies are not always a redelivery (register → unregister → register
+again), so a content hash only suppresses copies that arrive right after
+the first one.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CAPACITY    = 10_000
+DEFAULT_RETENTION   = 7 * 24 * 3600.0
+DEFAULT_HASH_WINDOW = 30.0
+_PRUNE_EVERY        = 1000          # marks between two purges of expired rows
+
+
+def message_key(props, body: bytes | str) -> str:
+    """AMQP message_id when set, otherwise a hash of the body."""
+    message_id = getattr(props, "message_id", None)
+    if message_id:
+        return f"id:{message_id}"
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return f"sha256:{hashlib.sha256(body).hexdigest()}"
+
+
+class DedupStore:
+    """
+    `path` is the SQLite file (":memory:" keeps nothing across restarts).
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: str, capacity: int = DEFAULT_CAPACITY,
+                 retention: float = DEFAULT_RETENTION,
+                 hash_window: float = DEFAULT_HASH_WINDOW,
+                 clock: Callable[[], float] = time.time):
+        self.path        = path
+        self.capacity    = capacity
+        self.retention   = retention
+        self.hash_window = hash_window
+        self._clock      = clock
+        self._lock       = threading.Lock()
+        self._recent: OrderedDict[str, float] = OrderedDict()   # key -> expires_at
+        self._marks      = 0
+        self.hits        = 0
+        self.misses      = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS processed ("
+            " key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+        )
+        self._prune()
+
+    # ------------------------------------------------------------------
+    # queries
+    # ------------------------------------------------------------------
+    def seen(self, key: str) -> bool:
+        """True when `key` was recorded and has not expired yet."""
+        now = self._clock()
+        with self._lock:
+            expires_at = self._recent.get(key)
+            if expires_at is None:
+                row = self._db.execute(
+                    "SELECT expires_at FROM processed WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    expires_at = row[0]
+                    self._remember(key, expires_at)
+            else:
+                self._recent.move_to_end(key)
+
+            if expires_at is not None and expires_at > now:
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def mark(self, key: str) -> None:
+        """Record `key` as processed."""
+        ttl = self.hash_window if key.startswith("sha256:") else self.retention
+        expires_at = self._clock() + ttl
+        with self._lock:
+            self._remember(key, expires_at)
+            self._db.execute(
+                "INSERT OR REPLACE INTO processed (key, expires_at) VALUES (?, ?)",
+                (key, expires_at),
+            )
+            self._marks += 1
+            if self._marks % _PRUNE_EVERY == 0:
+                self._prune()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits":     self.hits,
+            "misses":   self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "cached":   len(self._recent),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # ------------------------------------------------------------------
+    # internals (lock held)
+    # ------------------------------------------------------------------
+    def _remember(self, key: str, expires_at: float) -> None:
+        self._recent[key] = expires_at
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.capacity:
+            self._recent.popitem(last=False)
+
+    def _prune(self) -> None:
+        removed = self._db.execute(
+            "DELETE FROM processed WHERE expires_at <= ?", (self._clock(),)
+        ).rowcount
+        if removed:
+            _logger.info("Dedup store: purged %d expired key(s)", removed)
@@ -0,0 +1,187 @@
+# consumers/identity.py
+# -*- coding: utf-8 -*-
+"""
+Identity map: external (Attendify) IDs → Odoo record IDs.
+
+`handle_attendee` used to resolve the user (`res.partner.ref`), the event
+(`event.event.external_uid`) and the event's first ticket with one
+`search_read` each, for every register / unregister.  Those IDs never
+change once a record exists, so they are kept here:
+
+    IDS.partners   ref           → res.partner id
+    IDS.events     external_uid  → event.event id
+    IDS.tickets    event id      → first event.event.ticket id (False: none)
+
+Only hits are cached; an unknown key is looked up again next time, so
+records created elsewhere are found.  The consumer keeps the map current
+from the messages it handles (event create / delete, user delete) and
+calls `forget_*` when a cached ID turns out to be stale.  Every table is
+an LRU bounded by `capacity`.  `warm()` preloads the most recent records
+with paged `search_read`s.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CAPACITY  = 20_000
+DEFAULT_PAGE_SIZE = 2_000
+_MISSING = object()
+
+
+class LruTable:
+    """Bounded mapping; thread-safe, least recently used entries go first."""
+
+    def __init__(self, name: str, capacity: int):
+        self.name     = name
+        self.capacity = capacity
+        self._data: OrderedDict = OrderedDict()
+        self._lock    = threading.Lock()
+        self.hits     = 0
+        self.misses   = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+
+class IdentityMap:
+    """
+    `execute_kw(model, method, args, kwargs)` must be bound to the
+    database/uid/password of the calling consumer.
+    """
+
+    def __init__(self, execute_kw: Callable, capacity: int = DEFAULT_CAPACITY):
+        self._execute_kw = execute_kw
+        self.partners = LruTable("res.partner", capacity)
+        self.events   = LruTable("event.event", capacity)
+        self.tickets  = LruTable("event.event.ticket", capacity)
+
+    # ------------------------------------------------------------------
+    # warm-up
+    # ------------------------------------------------------------------
+    def warm(self, page_size: int = DEFAULT_PAGE_SIZE) -> None:
+        """Preload the newest partners, events and their first tickets."""
+        for ref, rec_id in self._paged("res.partner", "ref", self.partners.capacity, page_size):
+            self.partners.put(ref, rec_id)
+        event_ids = []
+        for ext_uid, rec_id in self._paged("event.event", "external_uid",
+                                           self.events.capacity, page_size):
+            self.events.put(ext_uid, rec_id)
+            event_ids.append(rec_id)
+        if event_ids:
+            first = {}
+            for row in self._execute_kw(
+                "event.event.ticket", "search_read",
+                [[("event_id", "in", event_ids)]],
+                {"fields": ["event_id"], "order": "id asc"},
+            ) or []:
+                first.setdefault(row["event_id"][0], row["id"])
+            for ev_id in event_ids:
+                self.tickets.put(ev_id, first.get(ev_id, False))
+        _logger.info(
+            "Identity map warmed: %d partner(s), %d event(s), %d ticket entr(y/ies)",
+            len(self.partners), len(self.events), len(self.tickets),
+        )
+
+    def _paged(self, model: str, key: str, limit: int, page_size: int):
+        """(key, id) pairs of the newest records that have `key` set."""
+        # newest first: those are the ones messages refer to; inserted
+        # in reverse so the newest also end up most recently used
+        pairs, offset = [], 0
+        while offset < limit:
+            rows = self._execute_kw(
+                model, "search_read", [[(key, "!=", False)]],
+                {"fields": [key], "order": "id desc",
+                 "limit": min(page_size, limit - offset), "offset": offset},
+            ) or []
+            pairs.extend((row[key], row["id"]) for row in rows)
+            if len(rows) < page_size:
+                break
+            offset += len(rows)
+        return reversed(pairs)
+
+    # ------------------------------------------------------------------
+    # lookups (read-through)
+    # ------------------------------------------------------------------
+    def partner_id(self, ref: str):
+        return self._resolve(self.partners, "res.partner", "ref", ref)
+
+    def event_id(self, external_uid: str):
+        return self._resolve(self.events, "event.event", "external_uid", external_uid)
+
+    def first_ticket_id(self, event_id: int):
+        ticket_id = self.tickets.get(event_id)
+        if ticket_id is None:
+            rows = self._execute_kw(
+                "event.event.ticket", "search_read",
+                [[("event_id", "=", event_id)]],
+                {"limit": 1, "fields": ["id"], "order": "id ASC"},
+            )
+            ticket_id = rows[0]["id"] if rows else False
+            if ticket_id:
+                self.tickets.put(event_id, ticket_id)
+        return ticket_id
+
+    def _resolve(self, table: LruTable, model: str, field: str, key):
+        if not key:
+            return False
+        rec_id = table.get(key)
+        if rec_id is None:
+            rows = self._execute_kw(
+                model, "search_read", [[(field, "=", key)]], {"limit": 1, "fields": ["id"]}
+            )
+            rec_id = rows[0]["id"] if rows else False
+            if rec_id:
+                table.put(key, rec_id)
+        return rec_id
+
+    # ------------------------------------------------------------------
+    # maintenance
+    # ------------------------------------------------------------------
+    def event_created(self, external_uid: str, event_id: int, ticket_id=False) -> None:
+        if external_uid:
+            self.events.put(external_uid, event_id)
+        self.tickets.put(event_id, ticket_id)
+
+    def forget_event(self, external_uid: str) -> None:
+        event_id = self.events.get(external_uid)
+        self.events.pop(external_uid)
+        if event_id:
+            self.tickets.pop(event_id)
+
+    def forget_partner(self, ref: str) -> None:
+        self.partners.pop(ref)
+
+    def stats(self) -> dict:
+        return {
+            t.name: {"size": len(t), "hits": t.hits, "misses": t.misses}
+            for t in (self.partners, self.events, self.tickets)
+        }
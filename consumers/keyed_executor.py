@@ -0,0 +1,72 @@
+# consumers/keyed_executor.py
+# -*- coding: utf-8 -*-
+"""
+Fixed pool of serial lanes.
+
+Every job is submitted with a key; jobs with the same key always land on
+the same lane and therefore run in submission order, while jobs for
+different keys run concurrently on other lanes.  Used by consumer_event
+to process unrelated events in parallel without reordering
+create → update → register for a single event.
+"""
+import logging
+import queue
+import threading
+import zlib
+from concurrent.futures import Future
+
+_logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class KeyedExecutor:
+
+    def __init__(self, lanes: int, name: str = "lane"):
+        if lanes < 1:
+            raise ValueError("lanes must be >= 1")
+        self._queues  = [queue.SimpleQueue() for _ in range(lanes)]
+        self._threads = [
+            threading.Thread(target=self._run, args=(q,), name=f"{name}-{i}", daemon=True)
+            for i, q in enumerate(self._queues)
+        ]
+        self._shutdown = False
+        for t in self._threads:
+            t.start()
+
+    @property
+    def lanes(self) -> int:
+        return len(self._queues)
+
+    def lane_for(self, key) -> int:
+        # crc32 rather than hash(): stable across processes and restarts
+        return zlib.crc32(str(key or "").encode()) % len(self._queues)
+
+    def submit(self, key, fn, *args, **kwargs) -> Future:
+        if self._shutdown:
+            raise RuntimeError("executor is shut down")
+        fut = Future()
+        self._queues[self.lane_for(key)].put((fut, fn, args, kwargs))
+        return fut
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._shutdown = True
+        for q in self._queues:
+            q.put(_STOP)
+        if wait:
+            for t in self._threads:
+                t.join()
+
+    @staticmethod
+    def _run(q: queue.SimpleQueue) -> None:
+        while True:
+            item = q.get()
+            if item is _STOP:
+                return
+            fut, fn, args, kwargs = item
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(fn(*args, **kwargs))
+            except BaseException as exc:
+                fut.set_exception(exc)
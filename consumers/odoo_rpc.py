@@ -0,0 +1,363 @@
+# consumers/odoo_rpc.py
+# -*- coding: utf-8 -*-
+"""
+Pooled keep-alive XML-RPC transport for the Odoo consumers.
+
+`xmlrpc.client.ServerProxy` opens a fresh TCP connection per call unless
+the transport is reused, and the stock `Transport` is not thread-safe.
+`PooledTransport` keeps a bounded set of HTTP/1.1 connections per host,
+hands them out one request at a time and counts how often each socket is
+reused, so the handshake savings can be checked under load.
+
+`AsyncOdooClient` is the asyncio counterpart used by `aio_runtime.py`:
+the same keep-alive pooling over asyncio streams, so one event loop can
+keep many Odoo calls in flight.
+"""
+import asyncio
+import http.client
+import itertools
+import logging
+import threading
+import time
+import urllib.parse
+import xmlrpc.client
+from collections import deque
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_TIMEOUT   = 60.0
+CLOSED_HISTORY    = 64       # closed connections kept for stats()
+
+# errors that mean "the server closed an idle keep-alive socket"
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+class _PooledConnection:
+    __slots__ = ("id", "host", "http", "requests", "created")
+
+    def __init__(self, conn_id: int, host: str, conn: http.client.HTTPConnection):
+        self.id       = conn_id
+        self.host     = host
+        self.http     = conn
+        self.requests = 0
+        self.created  = time.monotonic()
+
+    @property
+    def reuses(self) -> int:
+        return max(self.requests - 1, 0)
+
+
+class PooledTransport(xmlrpc.client.Transport):
+    """Thread-safe XML-RPC transport with a bounded keep-alive pool."""
+
+    def __init__(self, max_connections: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT, use_builtin_types=False):
+        super().__init__(use_builtin_types=use_builtin_types)
+        if max_connections < 1:
+            raise ValueError("max_connections must be >= 1")
+        self.max_connections = max_connections
+        self.timeout         = timeout
+        self._slots  = threading.BoundedSemaphore(max_connections)
+        self._lock   = threading.Lock()
+        self._idle   = {}            # host -> deque[_PooledConnection]
+        self._live   = {}            # conn id -> _PooledConnection
+        self._ids    = itertools.count(1)
+        self._closed = deque(maxlen=CLOSED_HISTORY)   # stats of the last dropped ones
+
+    # ------------------------------------------------------------------
+    # pool management
+    # ------------------------------------------------------------------
+    def _acquire(self, host: str) -> _PooledConnection:
+        self._slots.acquire()
+        with self._lock:
+            idle = self._idle.get(host)
+            if idle:
+                return idle.pop()
+        chost, _, x509 = self.get_host_info(host)
+        conn = _PooledConnection(
+            next(self._ids), host,
+            http.client.HTTPConnection(chost, timeout=self.timeout),
+        )
+        with self._lock:
+            self._live[conn.id] = conn
+        return conn
+
+    def _release(self, conn: _PooledConnection, reusable: bool) -> None:
+        try:
+            if reusable:
+                with self._lock:
+                    self._idle.setdefault(conn.host, deque()).append(conn)
+            else:
+                self._discard(conn)
+        finally:
+            self._slots.release()
+
+    def _discard(self, conn: _PooledConnection) -> None:
+        conn.http.close()
+        with self._lock:
+            if self._live.pop(conn.id, None) is not None:
+                self._closed.append((conn.id, conn.host, conn.requests))
+
+    # ------------------------------------------------------------------
+    # xmlrpc.client.Transport API
+    # ------------------------------------------------------------------
+    def request(self, host, handler, request_body, verbose=False):
+        conn = self._acquire(host)
+        try:
+            reused = conn.requests > 0
+            try:
+                resp = self._post(conn, host, handler, request_body)
+            except _STALE_ERRORS:
+                if not reused:
+                    raise
+                # idle socket was closed server-side; retry once on a new one
+                self._discard(conn)
+                self._slots.release()
+                conn = self._acquire(host)
+                resp = self._post(conn, host, handler, request_body)
+
+            if resp.status != 200:
+                resp.read()
+                raise xmlrpc.client.ProtocolError(
+                    host + handler, resp.status, resp.reason,
+                    dict(resp.getheaders()),
+                )
+            self.verbose = verbose
+            result = self.parse_response(resp)
+        except xmlrpc.client.Fault:
+            # an application error: the response was read in full
+            self._release(conn, reusable=not resp.will_close)
+            raise
+        except Exception:
+            self._release(conn, reusable=False)
+            raise
+        self._release(conn, reusable=not resp.will_close)
+        return result
+
+    def _post(self, conn: _PooledConnection, host, handler, request_body):
+        http_conn = conn.http
+        conn.requests += 1
+        headers = [
+            ("Content-Type", "text/xml"),
+            ("User-Agent", self.user_agent),
+            ("Connection", "keep-alive"),
+        ]
+        _, extra_headers, _ = self.get_host_info(host)
+        headers.extend(extra_headers or [])
+
+        http_conn.putrequest("POST", handler, skip_accept_encoding=True)
+        for key, val in headers:
+            http_conn.putheader(key, val)
+        http_conn.putheader("Content-Length", str(len(request_body)))
+        http_conn.endheaders(request_body)
+        return http_conn.getresponse()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                self._discard(conn)
+
+    # ------------------------------------------------------------------
+    # reporting
+    # ------------------------------------------------------------------
+    def stats(self) -> list[dict]:
+        """Per-connection request/reuse counts, live and recently closed."""
+        with self._lock:
+            live   = [(c.id, c.host, c.requests, True) for c in self._live.values()]
+            closed = [(cid, host, n, False) for cid, host, n in self._closed]
+        return [
+            {"id": cid, "host": host, "requests": n,
+             "reuses": max(n - 1, 0), "open": is_open}
+            for cid, host, n, is_open in sorted(live + closed)
+        ]
+
+    def log_stats(self, level=logging.INFO) -> None:
+        rows = self.stats()
+        total = sum(r["requests"] for r in rows)
+        _logger.log(
+            level, "Odoo RPC pool: %d request(s) over %d connection(s)",
+            total, len(rows),
+        )
+        for r in rows:
+            _logger.log(
+                level, "  conn #%d %s: %d request(s), %d reuse(s)%s",
+                r["id"], r["host"], r["requests"], r["reuses"],
+                "" if r["open"] else " (closed)",
+            )
+
+
+# ────────────────────────────────────────────────────────────────────────
+# process-wide shared transport
+# ────────────────────────────────────────────────────────────────────────
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_transport(max_connections: int = DEFAULT_POOL_SIZE) -> PooledTransport:
+    """Return the transport every ServerProxy in this process shares."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = PooledTransport(max_connections=max_connections)
+        return _shared
+
+
+def server_proxy(url: str, max_connections: int = DEFAULT_POOL_SIZE):
+    """`xmlrpc.client.ServerProxy` bound to the shared keep-alive pool."""
+    return xmlrpc.client.ServerProxy(
+        url, transport=shared_transport(max_connections)
+    )
+
+
+# ────────────────────────────────────────────────────────────────────────
+# asyncio client
+# ────────────────────────────────────────────────────────────────────────
+class AsyncOdooClient:
+    """
+    XML-RPC over asyncio streams for Odoo's `/xmlrpc/2/<service>`
+    endpoints.  At most `max_connections` calls are in flight; each one
+    borrows an idle keep-alive stream or opens a new one.
+    """
+
+    def __init__(self, url: str, max_connections: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT):
+        parts = urllib.parse.urlsplit(url)
+        self.host    = parts.hostname
+        self.port    = parts.port or 80
+        self.path    = parts.path.rstrip("/") + "/"
+        self.timeout = timeout
+        self._slots  = asyncio.Semaphore(max_connections)
+        self._idle: list[tuple] = []
+        self.requests       = 0
+        self.connections    = 0
+        self.in_flight      = 0
+        self.peak_in_flight = 0
+
+    async def call(self, service: str, method: str, *params):
+        body = xmlrpc.client.dumps(params, method).encode()
+        async with self._slots:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                data = await asyncio.wait_for(self._roundtrip(service, body), self.timeout)
+            finally:
+                self.in_flight -= 1
+        # raises xmlrpc.client.Fault for server-side errors, like ServerProxy
+        return xmlrpc.client.loads(data)[0][0]
+
+    async def execute_kw(self, db, uid, password, model, method, args, kwargs=None):
+        return await self.call(
+            "object", "execute_kw", db, uid, password, model, method, args, kwargs or {}
+        )
+
+    async def authenticate(self, db, login, password):
+        return await self.call("common", "authenticate", db, login, password, {})
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for stream in idle:
+            self._close(stream)
+
+    def stats(self) -> dict:
+        return {
+            "requests":       self.requests,
+            "connections":    self.connections,
+            "reuses":         self.requests - self.connections,
+            "peak_in_flight": self.peak_in_flight,
+        }
+
+    # ------------------------------------------------------------------
+    # HTTP/1.1
+    # ------------------------------------------------------------------
+    async def _open(self):
+        stream = await asyncio.open_connection(self.host, self.port)
+        self.connections += 1
+        return stream
+
+    @staticmethod
+    def _close(stream) -> None:
+        stream[1].close()
+
+    async def _roundtrip(self, service: str, body: bytes) -> bytes:
+        reused = bool(self._idle)
+        stream = self._idle.pop() if reused else await self._open()
+        try:
+            try:
+                status, reason, keep_alive, data = await self._post(stream, service, body)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if not reused:
+                    raise
+                # idle stream was closed server-side; retry once on a new one
+                self._close(stream)
+                stream = await self._open()
+                status, reason, keep_alive, data = await self._post(stream, service, body)
+        except BaseException:
+            self._close(stream)
+            raise
+
+        if keep_alive:
+            self._idle.append(stream)
+        else:
+            self._close(stream)
+        if status != 200:
+            raise xmlrpc.client.ProtocolError(
+                f"{self.host}:{self.port}{self.path}{service}", status, reason, {}
+            )
+        return data
+
+    async def _post(self, stream, service: str, body: bytes):
+        reader, writer = stream
+        self.requests += 1
+        writer.write(
+            (
+                f"POST {self.path}{service} HTTP/1.1\r\n"
+                f"Host: {self.host}:{self.port}\r\n"
+                "User-Agent: attendify-consumer (asyncio)\r\n"
+                "Content-Type: text/xml\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: keep-alive\r\n\r\n"
+            ).encode("latin-1") + body
+        )
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by server")
+        version, status, *reason = status_line.decode("latin-1").rstrip().split(" ", 2)
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, val = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = val.strip()
+
+        conn_hdr   = headers.get("connection", "").lower()
+        keep_alive = conn_hdr == "keep-alive" or (version == "HTTP/1.1" and conn_hdr != "close")
+        if "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            data = await self._read_chunked(reader)
+        else:
+            data, keep_alive = await reader.read(), False
+        return int(status), (reason[0] if reason else ""), keep_alive, data
+
+    @staticmethod
+    async def _read_chunked(reader) -> bytes:
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0], 16)
+            if size == 0:
+                await reader.readline()
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
@@ -0,0 +1,180 @@
+# consumers/refdata.py
+# -*- coding: utf-8 -*-
+"""
+Read-through cache for Odoo reference data used by the consumers.
+
+Countries, partner titles, POS categories and units of measure change
+rarely but were looked up with a `search_read` on every message.  Each
+table is loaded in full with one `search_read`, indexed by the key the
+consumers query on, and reloaded lazily once its TTL expires.  Because a
+fresh table is complete, a key that is absent from it is answered
+without an RPC as well.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Generic, TypeVar
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 3600.0
+
+
+@dataclass(frozen=True, slots=True)
+class Country:
+    id: int
+    code: str
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class PartnerTitle:
+    id: int
+    shortcut: str
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class PosCategory:
+    id: int
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class Uom:
+    id: int
+    name: str
+    category: str
+
+
+T = TypeVar("T")
+
+
+class _Table(Generic[T]):
+    """One fully-loaded Odoo model, indexed on a single key."""
+
+    def __init__(self, model: str, fields: list[str],
+                 build: Callable[[dict], T], key: Callable[[T], str]):
+        self.model     = model
+        self.fields    = fields
+        self.build     = build
+        self.key       = key
+        self.index: dict[str, T] = {}
+        self.loaded_at: float | None = None
+
+    def load(self, rows: list[dict], now: float) -> None:
+        index: dict[str, T] = {}
+        for row in rows:
+            rec = self.build(row)
+            k = self.key(rec)
+            # keep the first row per key: rows arrive in the model's _order,
+            # which is what a `limit=1` search used to return
+            if k and k not in index:
+                index[k] = rec
+        self.index     = index
+        self.loaded_at = now
+
+
+def _m2o_name(value) -> str:
+    return value[1] if isinstance(value, (list, tuple)) and len(value) > 1 else ""
+
+
+class ReferenceCache:
+    """
+    `execute_kw(model, method, args, kwargs)` must be bound to the
+    database/uid/password of the calling consumer.
+    """
+
+    def __init__(self, execute_kw: Callable, ttl: float = DEFAULT_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self._execute_kw = execute_kw
+        self.ttl         = ttl
+        self._clock      = clock
+        self._lock       = threading.Lock()
+        self.hits        = 0
+        self.misses      = 0
+
+        self.countries = _Table(
+            "res.country", ["id", "code", "name"],
+            lambda r: Country(r["id"], (r.get("code") or "").upper(), r.get("name") or ""),
+            lambda c: c.code,
+        )
+        self.titles = _Table(
+            "res.partner.title", ["id", "shortcut", "name"],
+            lambda r: PartnerTitle(r["id"], r.get("shortcut") or "", r.get("name") or ""),
+            lambda t: t.shortcut,
+        )
+        self.pos_categories = _Table(
+            "pos.category", ["id", "name"],
+            lambda r: PosCategory(r["id"], r.get("name") or ""),
+            lambda c: c.name,
+        )
+        self.uoms = _Table(
+            "uom.uom", ["id", "name", "category_id"],
+            lambda r: Uom(r["id"], r.get("name") or "", _m2o_name(r.get("category_id"))),
+            lambda u: u.category,
+        )
+        self._tables = (self.countries, self.titles, self.pos_categories, self.uoms)
+
+    # ------------------------------------------------------------------
+    # loading
+    # ------------------------------------------------------------------
+    def warm(self) -> None:
+        """Load every table now (one `search_read` per model)."""
+        with self._lock:
+            for table in self._tables:
+                self._load(table)
+        _logger.info(
+            "Reference data loaded: %s",
+            ", ".join(f"{t.model}={len(t.index)}" for t in self._tables),
+        )
+
+    def invalidate(self) -> None:
+        with self._lock:
+            for table in self._tables:
+                table.loaded_at = None
+
+    def _load(self, table: _Table) -> None:
+        rows = self._execute_kw(
+            table.model, "search_read", [[]], {"fields": table.fields}
+        )
+        table.load(rows or [], self._clock())
+
+    def _get(self, table: _Table[T], key: str) -> T | None:
+        with self._lock:
+            if table.loaded_at is None or self._clock() - table.loaded_at >= self.ttl:
+                self.misses += 1
+                self._load(table)
+            else:
+                self.hits += 1
+            return table.index.get(key)
+
+    # ------------------------------------------------------------------
+    # lookups – return the Odoo id or False, like the helpers they replace
+    # ------------------------------------------------------------------
+    def country_id(self, code: str):
+        rec = self._get(self.countries, (code or "").strip().upper())
+        return rec.id if rec else False
+
+    def title_id(self, shortcut: str):
+        rec = self._get(self.titles, (shortcut or "").strip())
+        return rec.id if rec else False
+
+    def pos_category_id(self, name: str):
+        rec = self._get(self.pos_categories, (name or "").strip())
+        return rec.id if rec else False
+
+    def uom_id_for_category(self, category: str):
+        rec = self._get(self.uoms, (category or "").strip())
+        return rec.id if rec else False
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits":     self.hits,
+            "misses":   self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
@@ -0,0 +1,121 @@
+# consumers/schema.py
+# -*- coding: utf-8 -*-
+"""
+Schema capability cache for the consumers.
+
+The consumers adapt to optional fields (`event.event.entrance_fee`,
+`product.product.pos_categ_ids`, …) that only exist when certain modules
+are installed.  Instead of one `ir.model.fields` search per question, the
+field names of every model a consumer touches are loaded with a single
+`search_read` and kept as frozensets, so `has(model, field)` is a dict
+and set lookup.
+
+The cache is only reloaded by `refresh()` or when a module upgrade is
+detected: at most every `check_interval` seconds it compares the latest
+`ir.module.module.write_date` (bumped on install / upgrade / uninstall)
+with the one seen at load time.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Iterable
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CHECK_INTERVAL = 300.0
+
+
+class SchemaCache:
+    """
+    `execute_kw(model, method, args, kwargs)` must be bound to the
+    database/uid/password of the calling consumer.
+    """
+
+    def __init__(self, execute_kw: Callable, models: Iterable[str],
+                 check_interval: float | None = DEFAULT_CHECK_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic):
+        self._execute_kw    = execute_kw
+        self.models         = list(dict.fromkeys(models))
+        self.check_interval = check_interval
+        self._clock         = clock
+        self._lock          = threading.Lock()
+        self._fields: dict[str, frozenset[str]] = {}
+        self._fingerprint   = None
+        self._checked_at: float | None = None
+        self.loads          = 0
+
+    # ------------------------------------------------------------------
+    # loading
+    # ------------------------------------------------------------------
+    def load(self) -> None:
+        """(Re)load every known model: one `search_read` on ir.model.fields."""
+        with self._lock:
+            self._load(self.models)
+            self._fingerprint = self._module_fingerprint()
+            self._checked_at  = self._clock()
+        _logger.info(
+            "Schema loaded: %s",
+            ", ".join(f"{m}={len(self._fields.get(m, ()))}" for m in self.models),
+        )
+
+    refresh = load
+
+    def refresh_if_upgraded(self) -> bool:
+        """Reload when a module was installed/upgraded since the last load."""
+        with self._lock:
+            return self._check_upgrade()
+
+    def _check_upgrade(self) -> bool:
+        self._checked_at = self._clock()
+        fingerprint = self._module_fingerprint()
+        if fingerprint == self._fingerprint:
+            return False
+        _logger.info("Module upgrade detected; reloading schema")
+        self._load(self.models)
+        self._fingerprint = fingerprint
+        return True
+
+    def _load(self, models: list[str]) -> None:
+        rows = self._execute_kw(
+            "ir.model.fields", "search_read",
+            [[("model", "in", models)]], {"fields": ["model", "name"]},
+        )
+        found = {m: set() for m in models}
+        for row in rows or []:
+            found.setdefault(row["model"], set()).add(row["name"])
+        self._fields.update({m: frozenset(names) for m, names in found.items()})
+        self.loads += 1
+
+    def _module_fingerprint(self):
+        rows = self._execute_kw(
+            "ir.module.module", "search_read", [[]],
+            {"fields": ["write_date"], "order": "write_date desc", "limit": 1},
+        )
+        return rows[0]["write_date"] if rows else None
+
+    def _maybe_check(self) -> None:
+        if not self.check_interval or self._checked_at is None:
+            return
+        if self._clock() - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            # another lane may have checked while we waited for the lock
+            if self._clock() - self._checked_at >= self.check_interval:
+                self._check_upgrade()
+
+    # ------------------------------------------------------------------
+    # queries
+    # ------------------------------------------------------------------
+    def has(self, model: str, field: str) -> bool:
+        self._maybe_check()
+        names = self._fields.get(model)
+        if names is None:
+            # a model nobody declared up front: load it once, then cached
+            with self._lock:
+                if model not in self._fields:
+                    self.models.append(model)
+                    self._load([model])
+                names = self._fields[model]
+        return field in names
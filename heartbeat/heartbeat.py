@@ -1,56 +1,136 @@
 # heartbeat/heartbeat.py
+"""
+One heartbeat process for a set of containers.
+
+    HEARTBEAT_TARGETS=odoo-db,odoo-web,adminer,consumer_user,consumer_event
+
+Each entry is `target` or `container_name=target` (the name that goes
+into <container_name>, and the Docker container that has to be healthy).
+Without HEARTBEAT_TARGETS the old single-target variables
+CONTAINER_NAME / TARGET_CONTAINER are used.
+
+The health of the targets is read once at start-up and then kept in
+memory from the Docker events stream (health_status, start, die, …), so
+there is no `containers.get` per target per second.  Every interval a
+heartbeat is published for each healthy target, all over one RabbitMQ
+connection; a lost connection is reopened on the next tick.
+"""
 import os
 import time
 import logging
+import threading
 import pika
+from pika import exceptions as pika_exc
 import xml.etree.ElementTree as ET
 from datetime import datetime
 import docker
 
-logging.basicConfig(level=logging.INFO)
-
-# RabbitMQ verbinding
-RABBITMQ_HOST = os.environ['RABBITMQ_HOST']
-RABBITMQ_PORT = int(os.environ.get('RABBITMQ_PORT', 5672))
-RABBITMQ_USER = os.environ['RABBITMQ_USERNAME']
-RABBITMQ_PASS = os.environ['RABBITMQ_PASSWORD']
-RABBITMQ_VHOST = os.environ['RABBITMQ_VHOST']
-
 # Heartbeat config
 SENDER         = os.environ.get('SENDER_NAME', 'pos')
-CONTAINER_NAME = os.environ['CONTAINER_NAME']        
 EXCHANGE_NAME  = os.environ.get('HEARTBEAT_EXCHANGE', 'monitoring')
 ROUTING_KEY    = os.environ.get('HEARTBEAT_ROUTING_KEY', 'monitoring.heartbeat')
 INTERVAL       = int(os.environ.get('HEARTBEAT_INTERVAL', '1'))
-TARGET         = os.environ['TARGET_CONTAINER']    
 
-# Docker-client via socket
-docker_client = docker.DockerClient(base_url='unix://var/run/docker.sock')
 
-def is_target_healthy():
-    try:
-        ctr = docker_client.containers.get(TARGET)
-        status = ctr.attrs.get('State', {}) \
-                         .get('Health', {}) \
-                         .get('Status')
-        return status == 'healthy'
-    except Exception:
-        return False
-
-def create_heartbeat_msg():
+def parse_targets(spec: str) -> dict:
+    """'name=target,target2' → {target: container_name}."""
+    targets = {}
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _, target = entry.rpartition("=")
+        targets[target.strip()] = name.strip() or target.strip()
+    return targets
+
+
+def load_targets() -> dict:
+    """HEARTBEAT_TARGETS, or the single TARGET_CONTAINER / CONTAINER_NAME."""
+    return parse_targets(os.environ.get('HEARTBEAT_TARGETS')) or {
+        os.environ['TARGET_CONTAINER']: os.environ['CONTAINER_NAME'],
+    }
+
+
+class HealthTable:
+    """Health per target container, fed by the Docker events stream."""
+
+    DOWN = ("die", "stop", "kill", "destroy", "oom")
+
+    def __init__(self, targets):
+        self.targets = list(targets)
+        self._healthy = dict.fromkeys(self.targets, False)
+        self._lock = threading.Lock()
+
+    def healthy(self) -> list:
+        with self._lock:
+            return [t for t in self.targets if self._healthy[t]]
+
+    def set(self, target, healthy: bool):
+        with self._lock:
+            if self._healthy.get(target) != healthy:
+                logging.info(f"[Heartbeat] '{target}' is nu {'healthy' if healthy else 'niet healthy'}")
+            self._healthy[target] = healthy
+
+    def refresh(self, client, target):
+        try:
+            ctr = client.containers.get(target)
+            status = ctr.attrs.get('State', {}) \
+                              .get('Health', {}) \
+                              .get('Status')
+            self.set(target, status == 'healthy')
+        except Exception:
+            self.set(target, False)
+
+    def refresh_all(self, client):
+        for target in self.targets:
+            self.refresh(client, target)
+
+    def apply(self, client, event: dict):
+        """Update from one Docker event; returns True when it was ours."""
+        name = event.get('Actor', {}).get('Attributes', {}).get('name')
+        if name not in self._healthy:
+            return False
+        action = event.get('Action') or event.get('status') or ''
+        if action.startswith('health_status'):
+            self.set(name, action.split(':', 1)[-1].strip() == 'healthy')
+        elif action == 'start':
+            self.refresh(client, name)      # health of a fresh start: ask once
+        elif action in self.DOWN:
+            self.set(name, False)
+        return True
+
+
+def watch_events(client, table: HealthTable):
+    """Follow the events stream forever; resync after every reconnect."""
+    while True:
+        try:
+            stream = client.events(decode=True, filters={'type': 'container'})
+            table.refresh_all(client)       # nothing missed between streams
+            for event in stream:
+                table.apply(client, event)
+        except Exception as e:
+            logging.warning(f"[Heartbeat] Docker events onderbroken ({e}); opnieuw over 5s")
+            table.refresh_all(client)
+            time.sleep(5)
+
+
+def create_heartbeat_msg(container_name):
     root = ET.Element('heartbeat')
     ET.SubElement(root, 'sender').text         = SENDER
-    ET.SubElement(root, 'container_name').text = CONTAINER_NAME
+    ET.SubElement(root, 'container_name').text = container_name
     ET.SubElement(root, 'timestamp').text      = datetime.utcnow().isoformat() + 'Z'
     return ET.tostring(root, encoding='utf-8', method='xml')
 
-def main():
-    creds = pika.PlainCredentials(RABBITMQ_USER, RABBITMQ_PASS)
+
+def connect():
+    # RabbitMQ verbinding
+    creds = pika.PlainCredentials(os.environ['RABBITMQ_USERNAME'],
+                                  os.environ['RABBITMQ_PASSWORD'])
     conn = pika.BlockingConnection(
         pika.ConnectionParameters(
-            host=RABBITMQ_HOST,
-            port=RABBITMQ_PORT,
-            virtual_host=RABBITMQ_VHOST,
+            host=os.environ['RABBITMQ_HOST'],
+            port=int(os.environ.get('RABBITMQ_PORT', 5672)),
+            virtual_host=os.environ['RABBITMQ_VHOST'],
             credentials=creds
         )
     )
@@ -58,23 +138,45 @@ def main():
     ch.exchange_declare(exchange=EXCHANGE_NAME,
                         exchange_type='topic',
                         durable=True)
+    return conn, ch
 
-    logging.info(f"[Heartbeat] gestart voor container '{CONTAINER_NAME}', target='{TARGET}'")
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    targets = load_targets()
+    # Docker-client via socket
+    docker_client = docker.DockerClient(base_url='unix://var/run/docker.sock')
+
+    table = HealthTable(targets)
+    threading.Thread(target=watch_events, args=(docker_client, table),
+                     name="docker-events", daemon=True).start()
+
+    logging.info(f"[Heartbeat] gestart voor {', '.join(targets.values())}")
+    conn = ch = None
     try:
         while True:
-            if is_target_healthy():
-                msg = create_heartbeat_msg()
-                ch.basic_publish(
-                    exchange=EXCHANGE_NAME,
-                    routing_key=ROUTING_KEY,
-                    body=msg,
-                    properties=pika.BasicProperties(delivery_mode=2)
-                )
-            else:
-                logging.warning(f"[Heartbeat] Sla over: target '{TARGET}' niet healthy")
-            time.sleep(INTERVAL)
+            started = time.monotonic()
+            try:
+                if conn is None or not conn.is_open:
+                    conn, ch = connect()
+                # niet-healthy targets slaan we over (HealthTable logt de overgang)
+                for target in table.healthy():
+                    ch.basic_publish(
+                        exchange=EXCHANGE_NAME,
+                        routing_key=ROUTING_KEY,
+                        body=create_heartbeat_msg(targets[target]),
+                        properties=pika.BasicProperties(delivery_mode=2)
+                    )
+                # sleep() keeps serving the AMQP heartbeats of the connection
+                conn.sleep(max(0.0, INTERVAL - (time.monotonic() - started)))
+            except pika_exc.AMQPError as e:
+                logging.warning(f"[Heartbeat] RabbitMQ-verbinding verloren ({e}); opnieuw verbinden")
+                conn = None
+                time.sleep(INTERVAL)
     finally:
-        conn.close()
+        if conn is not None and conn.is_open:
+            conn.close()
+
 
 if __name__ == "__main__":
     main()
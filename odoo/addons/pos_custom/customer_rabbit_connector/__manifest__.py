@@ -7,7 +7,10 @@
     'category': 'Point of Sale',
     'summary': 'Send POS customer updates/deletes/creates to RabbitMQ',
     'description': 'Sends res.partner (POS customer) updates as XML to RabbitMQ.',
-    'data': [],
+    'data': [
+        'security/ir.model.access.csv',
+        'data/ir_cron.xml',
+    ],
     'installable': True,
     'application': False,
     'auto_install': False,
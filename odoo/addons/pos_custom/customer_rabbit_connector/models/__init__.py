@@ -1 +1,3 @@
-from . import res_partner
\ No newline at end of file
+from . import res_partner
+from . import attendify_outbox
+from . import attendify_uid
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+Transactional outbox for every Odoo → RabbitMQ message.
+
+The ORM hooks (res.partner, event.event, event.registration, pos.order,
+…) no longer talk to the broker themselves; they call
+
+    self.env["attendify.outbox"].enqueue(exchange, routing_key, body)
+
+which inserts a row in the same transaction as the change that caused
+it.  A rollback therefore drops the message too, and no create / write /
+unlink waits on a broker round trip while it holds row locks.
+
+The drain cron publishes the rows in id order, in batches, through the
+worker's confirm pipeline (`tools/rabbit.py`): a whole batch is in
+flight at once and each row is matched to the broker's ack or nack.
+The acked rows of a batch go with one DELETE.  Nacked or unconfirmed
+rows stay and are retried on the next run, so a retried row can go out
+after younger ones.  `enqueue` triggers the cron once per transaction,
+so messages go out right after the commit instead of at the next
+interval.
+
+With `RABBITMQ_PUBLISH_MODE=background` the rows are not left to the
+cron: a post-commit callback hands the committed rows to a bounded
+in-memory queue (`tools/background.py`) and a background thread of the
+worker publishes them in batches.  The thread locks the rows before it
+publishes (SKIP LOCKED, like the cron) and deletes the acked ones, so
+the cron and the thread never send the same row twice.  Rows refused
+by a full queue, or lost with the process, stay in the table for the
+minutely cron.  Saving never waits on the broker in either mode, and a
+rolled-back transaction queues nothing.
+
+The sync hooks do not enqueue per `create` / `write` either: they call
+`defer_changes(records, operation)`, which only remembers the record id
+and the collapsed operation (create + update → create, update + update
+→ update) with the names of the fields written so far.  A precommit
+callback then calls `records._attendify_send(op, written)` (`written`:
+record id → field names) once per model and operation, so a record touched by several writes
+gets one message, built from its final state.  `unlink` hooks call
+`cancel_changes(records)` and publish the delete right away for what it
+returns: records created in the same transaction drop out (create +
+delete → nothing), the others lose their pending update.  Precommit
+callbacks run on every flush (commit, or a flushing savepoint), so a
+savepoint in the middle of a transaction closes one window and opens
+the next.
+"""
+import logging
+import os
+import uuid
+from concurrent.futures import wait
+
+import pika
+from odoo import api, fields, models, registry
+from odoo.addons.customer_rabbit_connector.tools import background, rabbit
+
+_logger = logging.getLogger(__name__)
+
+DRAIN_BATCH     = 500
+CONFIRM_TIMEOUT = 30.0
+SENDER_QUEUE    = 10000
+_TRIGGERED      = "attendify.outbox.triggered"
+_COMMITTED      = "attendify.outbox.committed"
+_CHANGES        = "attendify.outbox.changes"
+_SENDER         = None
+_PUBLISH_MODE   = None
+
+
+def _publish_mode() -> str:
+    """RABBITMQ_PUBLISH_MODE, read once per process."""
+    global _PUBLISH_MODE
+    if _PUBLISH_MODE is None:
+        _PUBLISH_MODE = rabbit.load_config()["publish_mode"]
+    return _PUBLISH_MODE
+
+
+def publish_rows(publisher, rows, timeout=CONFIRM_TIMEOUT) -> list:
+    """
+    Publish outbox rows through the confirm pipeline, all in flight at
+    once; return the ids the broker acked.  Nacked or unconfirmed rows
+    are logged one by one and stay in the outbox for the next run.
+    """
+    futures = [
+        (row, publisher.publish_async(
+            row["exchange"],
+            row["routing_key"],
+            row["body"],
+            queue=row["queue"],
+            properties=pika.BasicProperties(
+                content_type=row["content_type"] or None,
+                message_id=row["message_id"],
+                delivery_mode=2,
+            ),
+        ))
+        for row in rows
+    ]
+    done, _ = wait([f for _, f in futures], timeout=timeout)
+    sent = []
+    for row, future in futures:
+        if future not in done:
+            future.cancel()
+            _logger.warning("Outbox row %s (%s/%s) not confirmed within %ss",
+                            row["id"], row["exchange"], row["routing_key"], timeout)
+        elif future.exception() is not None:
+            _logger.warning("Outbox row %s (%s/%s) rejected: %r",
+                            row["id"], row["exchange"], row["routing_key"], future.exception())
+        else:
+            sent.append(row["id"])
+    return sent
+
+
+def merge_operation(previous, operation):
+    """Collapse two operations on one record within a transaction."""
+    if previous is None:
+        return operation
+    if previous == "create" and operation == "update":
+        return "create"
+    return operation
+
+
+def send_committed(dbname, rows):
+    """
+    Background-thread side: publish rows that were committed in `dbname`.
+    Rows the cron already holds are skipped (it publishes them itself).
+    """
+    with registry(dbname).cursor() as cr:
+        cr.execute(
+            "SELECT id FROM attendify_outbox WHERE id = ANY(%s) FOR UPDATE SKIP LOCKED",
+            ([row["id"] for row in rows],),
+        )
+        locked = {row_id for row_id, in cr.fetchall()}
+        rows = [row for row in rows if row["id"] in locked]
+        sent = publish_rows(rabbit.confirming_publisher(), rows) if rows else []
+        if sent:
+            cr.execute("DELETE FROM attendify_outbox WHERE id = ANY(%s)", (sent,))
+    # leaving the block commits the DELETE and releases the locks
+
+
+def sender() -> background.BatchSender:
+    """The worker's post-commit sender (a forked child gets its own)."""
+    global _SENDER
+    if _SENDER is None or _SENDER.pid != os.getpid():
+        _SENDER = background.BatchSender(
+            send_committed, maxsize=SENDER_QUEUE, batch_size=DRAIN_BATCH
+        )
+    return _SENDER
+
+
+class AttendifyOutbox(models.Model):
+    _name = "attendify.outbox"
+    _description = "Pending RabbitMQ message"
+    _order = "id"
+    _log_access = False
+
+    exchange     = fields.Char(required=True)
+    routing_key  = fields.Char(required=True)
+    queue        = fields.Char(help="Queue to declare and bind before publishing.")
+    content_type = fields.Char()
+    message_id   = fields.Char(required=True, index=True, copy=False)
+    body         = fields.Text(required=True)
+
+    # ------------------------------------------------------------------
+    # producer side
+    # ------------------------------------------------------------------
+    @api.model
+    def enqueue(self, exchange, routing_key, body, queue=None, content_type=None):
+        """Queue one message; it is published only if the transaction commits."""
+        return self.enqueue_many([(exchange, routing_key, body)], queue, content_type)
+
+    @api.model
+    def enqueue_many(self, messages, queue=None, content_type=None):
+        """`messages`: iterable of (exchange, routing_key, body) – one INSERT."""
+        vals_list = [
+            {
+                "exchange":     exchange,
+                "routing_key":  routing_key,
+                "queue":        queue,
+                "content_type": content_type,
+                "message_id":   uuid.uuid4().hex,
+                "body":         body.decode("utf-8") if isinstance(body, bytes) else body,
+            }
+            for exchange, routing_key, body in messages
+        ]
+        rows = self.sudo().create(vals_list)
+        if _publish_mode() == "background":
+            self._send_after_commit(
+                dict(vals, id=row.id) for row, vals in zip(rows, vals_list)
+            )
+        else:
+            self._trigger_drain()
+        return rows
+
+    def _send_after_commit(self, rows):
+        postcommit = self.env.cr.postcommit
+        pending = postcommit.data.get(_COMMITTED)
+        if pending is None:
+            pending = postcommit.data[_COMMITTED] = []
+            dbname = self.env.cr.dbname
+
+            @postcommit.add
+            def _hand_off():
+                if not sender().offer(dbname, pending):
+                    _logger.warning("Outbox sender queue full; %d message(s) left "
+                                    "for the drain cron", len(pending))
+        pending.extend(rows)
+
+    def _trigger_drain(self):
+        data = self.env.cr.precommit.data
+        if data.get(_TRIGGERED):
+            return
+        data[_TRIGGERED] = True
+        cron = self.env.ref(
+            "customer_rabbit_connector.ir_cron_attendify_outbox_drain",
+            raise_if_not_found=False,
+        )
+        if cron:
+            cron.sudo()._trigger()
+
+    # ------------------------------------------------------------------
+    # per-transaction coalescing of the sync hooks
+    # ------------------------------------------------------------------
+    @api.model
+    def defer_changes(self, records, operation, fields=()):
+        """
+        Remember `operation` ("create" / "update") for `records`, plus the
+        names of the fields written (`fields`, accumulated); sent at flush.
+        """
+        if not records:
+            return
+        precommit = self.env.cr.precommit
+        changes = precommit.data.get(_CHANGES)
+        if changes is None:
+            changes = precommit.data[_CHANGES] = {}
+            precommit.add(self._flush_changes)
+        pending = changes.setdefault(records._name, {})
+        fields = frozenset(fields)
+        for record_id in records.ids:
+            previous, written = pending.get(record_id, (None, frozenset()))
+            pending[record_id] = (merge_operation(previous, operation), written | fields)
+
+    @api.model
+    def cancel_changes(self, records):
+        """
+        Forget pending changes of records about to be deleted; return the
+        ones that still need a delete message (not created in this window).
+        """
+        pending = self.env.cr.precommit.data.get(_CHANGES, {}).get(records._name, {})
+        created = {rid for rid in records.ids if pending.pop(rid, (None,))[0] == "create"}
+        return records.filtered(lambda rec: rec.id not in created)
+
+    def _flush_changes(self):
+        changes = self.env.cr.precommit.data.pop(_CHANGES, {})
+        for model, pending in changes.items():
+            by_operation = {}
+            for record_id, (operation, written) in pending.items():
+                by_operation.setdefault(operation, {})[record_id] = written
+            for operation, written in by_operation.items():
+                records = self.env[model].browse(list(written)).exists()
+                if records:
+                    records._attendify_send(operation, written)
+        # precommit runs after the ORM flush: write out what the senders
+        # stored (ref, integration_pw_hash, attendify_sync_hash, …)
+        self.env.flush_all()
+
+    # ------------------------------------------------------------------
+    # drain (cron)
+    # ------------------------------------------------------------------
+    @api.model
+    def _cron_drain(self, batch_size=DRAIN_BATCH):
+        publisher = rabbit.confirming_publisher()
+        if not publisher.configured():
+            _logger.error("RabbitMQ config incomplete; outbox not drained")
+            return
+
+        cr, total = self.env.cr, 0
+        while True:
+            # SKIP LOCKED: a second drain running in parallel takes other rows
+            cr.execute(
+                """
+                SELECT id, exchange, routing_key, queue, content_type, message_id, body
+                  FROM attendify_outbox
+              ORDER BY id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+                """,
+                (batch_size,),
+            )
+            rows = cr.dictfetchall()
+            if not rows:
+                break
+            sent = publish_rows(publisher, rows)
+            if sent:
+                cr.execute("DELETE FROM attendify_outbox WHERE id = ANY(%s)", (sent,))
+            cr.commit()
+            total += len(sent)
+            if len(sent) < len(rows) or len(rows) < batch_size:
+                break
+        if total:
+            _logger.info("Outbox drained: %d message(s) published", total)
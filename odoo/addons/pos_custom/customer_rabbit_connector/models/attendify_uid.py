@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Collision-free Attendify UIDs (`OD…` partner refs, `GC…` event UIDs,
+`SE…` session UIDs).
+
+    refs = self.env["attendify.uid"].allocate("OD", len(vals_list))
+
+The numbers come from one PostgreSQL sequence that moves in steps of
+`BLOCK`: a single `nextval` reserves a whole block for the calling
+process, and the next `BLOCK - 1` UIDs are handed out from memory.
+Sequences ignore rollbacks and are shared by all workers, so two
+processes (or two UIDs of one `create(vals_list)`) never get the same
+number; a rolled-back or abandoned block only leaves a gap.
+
+The sequence starts at the install time in milliseconds × 1000, which
+gives 16-digit numbers.  The older millisecond UIDs have 13 digits, so
+old and new UIDs cannot collide.
+"""
+import os
+import threading
+import time
+
+from odoo import api, models
+
+SEQUENCE = "attendify_uid_seq"
+BLOCK    = 100
+
+_BLOCKS = {}                  # (pid, dbname) -> [next, end)
+_LOCK   = threading.Lock()
+
+
+class AttendifyUid(models.AbstractModel):
+    _name = "attendify.uid"
+    _description = "Attendify UID allocator"
+
+    def init(self):
+        self.env.cr.execute(
+            f"CREATE SEQUENCE IF NOT EXISTS {SEQUENCE} "
+            f"INCREMENT BY {BLOCK} START WITH {int(time.time() * 1000) * 1000}"
+        )
+
+    @api.model
+    def allocate(self, prefix: str, count: int = 1) -> list:
+        """`count` unique UIDs `<prefix><number>`, ascending."""
+        key = (os.getpid(), self.env.cr.dbname)       # a forked child reserves its own
+        numbers = []
+        with _LOCK:
+            block = _BLOCKS.get(key)
+            while len(numbers) < count:
+                if block is None or block[0] >= block[1]:
+                    self.env.cr.execute("SELECT nextval(%s)", (SEQUENCE,))
+                    start = self.env.cr.fetchone()[0]
+                    block = _BLOCKS[key] = [start, start + BLOCK]
+                take = min(count - len(numbers), block[1] - block[0])
+                numbers.extend(range(block[0], block[0] + take))
+                block[0] += take
+        return [f"{prefix}{number}" for number in numbers]
+
+    @api.model
+    def allocate_one(self, prefix: str) -> str:
+        return self.allocate(prefix, 1)[0]
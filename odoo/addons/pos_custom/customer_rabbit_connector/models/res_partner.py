@@ -5,7 +5,8 @@ Odoo extension for res.partner
 * Genereert een stabiele UID (in `ref`)
 * Genereert **exact één keer** een random bcrypt-hash in
   `integration_pw_hash`, bedoeld voor externe systemen
-* Stuurt bij create / update / delete een XML-bericht naar RabbitMQ
+* Zet bij create / update / delete een XML-bericht in de outbox
+  (`attendify.outbox`), die na de commit naar RabbitMQ gaat
 
 !! Plaintext-wachtwoorden worden NIET opgeslagen; alleen de bcrypt-hash.
 """
@@ -31,37 +32,108 @@ except ModuleNotFoundError:
 # ────────────────────────────────────────────────────────────────────
 # 2) stdlib / extern
 # ────────────────────────────────────────────────────────────────────
-import os
-import time
 import string
 import random
+import hashlib
 import logging
-import pika
-from dotenv import load_dotenv, dotenv_values           # fallback voor tests
 
 from odoo import models, fields, api
+from odoo.addons.customer_rabbit_connector.tools import attendify
 
-load_dotenv()
 _logger = logging.getLogger(__name__)
 
 # ────────────────────────────────────────────────────────────────────
-# 3) Helper: RabbitMQ-config ophalen (prod + unit-tests)
+# 3) Attendify-gebruiker → partner-waarden (zuivere functies)
 # ────────────────────────────────────────────────────────────────────
-def _get_rmq_cfg() -> dict[str, str | None]:
-    """
-    Geeft een dict met RabbitMQ-parameters terug.  Eerst wordt de echte
-    omgeving (`os.getenv`) geraadpleegd; ontbrekende keys worden
-    opgevuld met waarden uit `.env` (of – in de unit-tests – het stub-
-    dict `GOOD_ENV`).
-    """
-    env_fallback = dotenv_values()
-    return {
-        "host":  os.getenv("RABBITMQ_HOST")     or env_fallback.get("RABBITMQ_HOST"),
-        "port":  os.getenv("RABBITMQ_PORT")     or env_fallback.get("RABBITMQ_PORT"),
-        "user":  os.getenv("RABBITMQ_USERNAME") or env_fallback.get("RABBITMQ_USERNAME"),
-        "pw":    os.getenv("RABBITMQ_PASSWORD") or env_fallback.get("RABBITMQ_PASSWORD"),
-        "vhost": os.getenv("RABBITMQ_VHOST")    or env_fallback.get("RABBITMQ_VHOST"),
+# Een gebruiker is `attendify.User.to_dict()` aangevuld met `extra`,
+# dus geneste velden komen binnen als pad: "address/street",
+# "company/VAT_number", "payment_details/facturation_address/city", …
+def _s(value) -> str:
+    return value.strip() if isinstance(value, str) else ""
+
+
+def _country_id(countries: dict, value) -> int | None:
+    """`countries` bevat ISO-codes (hoofdletters) én namen (kleine letters)."""
+    value = _s(value)
+    if not value:
+        return None
+    return countries.get(value.upper()) or countries.get(value.lower())
+
+
+def _address_vals(user: dict, prefix: str, countries: dict,
+                  bus_key: str = "bus_number") -> dict:
+    """Adresvelden onder `prefix`; enkel de velden die ingevuld zijn."""
+    vals = {}
+    street = _s(user.get(f"{prefix}/street"))
+    if street:
+        vals["street"] = street
+    number, bus = _s(user.get(f"{prefix}/number")), _s(user.get(f"{prefix}/{bus_key}"))
+    if number or bus:
+        vals["street2"] = f"{number} Bus {bus}" if bus else number
+    city = _s(user.get(f"{prefix}/city"))
+    if city:
+        vals["city"] = city
+    postal = _s(user.get(f"{prefix}/postal_code"))
+    if postal:
+        vals["zip"] = postal
+    country_id = _country_id(countries, user.get(f"{prefix}/country"))
+    if country_id:
+        vals["country_id"] = country_id
+    return vals
+
+
+def _user_partner_vals(user: dict, countries: dict, titles: dict) -> dict:
+    """Waarden voor de partner zelf (zonder ref, bedrijf of factuuradres)."""
+    vals = {
+        "name":  f"{_s(user.get('first_name'))} {_s(user.get('last_name'))}",
+        "email": _s(user.get("email")),
     }
+    pw = _s(user.get("password"))
+    if pw:
+        vals["integration_pw_hash"] = pw
+    phone = _s(user.get("phone_number"))
+    if phone:
+        vals["phone"] = phone
+    title_id = titles.get(_s(user.get("title")))
+    if title_id:
+        vals["title"] = title_id
+    vals.update(_address_vals(user, "address", countries))
+    country_id = _country_id(countries, user.get("country"))
+    if country_id:
+        vals["country_id"] = country_id
+    return vals
+
+
+def _user_invoice_vals(user: dict, countries: dict) -> dict | None:
+    """Factuuradres als kind-contact (`type` invoice), of None."""
+    vals = _address_vals(
+        user, "payment_details/facturation_address", countries,
+        bus_key="company_bus_number",
+    )
+    if not vals:
+        return None
+    vals["type"] = "invoice"
+    return vals
+
+
+def _user_company_vals(user: dict, countries: dict) -> dict | None:
+    """Bedrijf van de gebruiker (alleen als `from_company` true is), of None."""
+    if _s(user.get("from_company")).lower() != "true":
+        return None
+    name = _s(user.get("company/name"))
+    if not name:
+        return None
+    vals = {"name": name, "is_company": True, "company_type": "company"}
+    vat = _s(user.get("company/VAT_number"))
+    if vat:
+        vals["vat"] = vat
+    vals.update(_address_vals(user, "company/address", countries))
+    return vals
+
+
+def _sync_fingerprint(user: attendify.User) -> str:
+    """sha1 over de gesynchroniseerde projectie van een partner."""
+    return hashlib.sha1(repr(sorted(user.to_dict().items())).encode()).hexdigest()
 
 # ────────────────────────────────────────────────────────────────────
 # 4) Het eigenlijke model
@@ -77,12 +149,22 @@ class ResPartner(models.Model):
         help="Eenmalig gegenereerde bcrypt-hash voor externe systemen.",
     )
 
+    # Vingerafdruk van wat laatst naar RabbitMQ ging (uid, naam, e-mail,
+    # hash, titel, admin); een update zonder verschil wordt niet verstuurd
+    attendify_sync_hash = fields.Char(
+        string="Attendify sync fingerprint",
+        readonly=True,
+        copy=False,
+        index=True,
+    )
+
     # ────────────────────────────────────────────────────────────
     # RabbitMQ helper
     # ────────────────────────────────────────────────────────────
     def _send_to_rabbitmq(self, operation: str) -> None:
         """
-        Bouwt en verstuurt een Attendify-compatibel XML-bericht.
+        Bouwt een Attendify-compatibel XML-bericht en zet het in de
+        outbox (zelfde transactie; verzonden na de commit).
 
         • Genereert bij de eerste oproep een random wachtwoord en slaat
           de bcrypt-hash op in `integration_pw_hash`.
@@ -94,25 +176,12 @@ class ResPartner(models.Model):
             )
             return
 
-        # ------------------------------------------------------------------
-        # RabbitMQ-config ophalen
-        # ------------------------------------------------------------------
-        cfg = _get_rmq_cfg()
-        host, port, user, pw, vhost = cfg.values()
-        if not all([host, port, user, pw, vhost]):
-            _logger.error(
-                "RabbitMQ config incomplete; skipping send: host=%r port=%r "
-                "user=%r vhost=%r",
-                host, port, user, vhost,
-            )
-            return
-
         # ------------------------------------------------------------------
         # Stabiele UID in `ref`
         # ------------------------------------------------------------------
         uid = self.ref
         if not uid:
-            uid = f"OD{int(time.time() * 1000)}"
+            uid = self.env["attendify.uid"].allocate_one("OD")
             self.with_context(skip_rabbit=True).write({"ref": uid})
 
         # ------------------------------------------------------------------
@@ -137,48 +206,170 @@ class ResPartner(models.Model):
         # XML-payload bouwen
         # ------------------------------------------------------------------
         title_txt = (self.title.name or "") if self.title else ""
-        xml = f"""<attendify>
-  <info><sender>odoo</sender><operation>{operation}</operation></info>
-  <user>
-    <uid>{uid}</uid>
-    <first_name>{first_name}</first_name>
-    <last_name>{last_name}</last_name>
-    <email>{self.email}</email>
-    <password>{hashed}</password>
-    <title>{title_txt}</title>
-    <is_admin>{"true" if getattr(self, "is_admin", False) else "false"}</is_admin>
-  </user>
-</attendify>"""
+        user = attendify.User(
+            uid=uid,
+            first_name=first_name,
+            last_name=last_name,
+            email=self.email,
+            password=hashed,
+            title=title_txt,
+            is_admin="true" if getattr(self, "is_admin", False) else "false",
+        )
+
+        # ------------------------------------------------------------------
+        # Update zonder verschil in de gesynchroniseerde velden → niets sturen
+        # ------------------------------------------------------------------
+        fingerprint = _sync_fingerprint(user)
+        if operation == "update" and fingerprint == self.attendify_sync_hash:
+            _logger.debug(
+                "Partner %s: no synced field changed; update skipped.", self.id
+            )
+            return
+        body = attendify.encode(attendify.Message(operation, "odoo", user))
 
         _logger.debug(
-            "RabbitMQ XML for partner %s (%s):\n%s", self.id, operation, xml
+            "RabbitMQ XML for partner %s (%s):\n%s", self.id, operation, body
         )
 
         # ------------------------------------------------------------------
-        # Publish naar RabbitMQ
+        # In de outbox; de drain-cron publiceert na de commit
         # ------------------------------------------------------------------
-        try:
-            creds = pika.PlainCredentials(user, pw)
-            params = pika.ConnectionParameters(
-                host=host, port=int(port), virtual_host=vhost, credentials=creds
-            )
-            routing = {
-                "create": "user.register",
-                "update": "user.update",
-                "delete": "user.delete",
-            }.get(operation, "user.update")
-
-            conn = pika.BlockingConnection(params)
-            channel = conn.channel()
-            channel.basic_publish(
-                exchange="user-management",
-                routing_key=routing,
-                body=xml,
+        routing = {
+            "create": "user.register",
+            "update": "user.update",
+            "delete": "user.delete",
+        }.get(operation, "user.update")
+        self.env["attendify.outbox"].enqueue("user-management", routing, body)
+        if operation != "delete" and fingerprint != self.attendify_sync_hash:
+            self.with_context(skip_rabbit=True).write({"attendify_sync_hash": fingerprint})
+        _logger.info("RabbitMQ %s queued for partner %s", operation, self.id)
+
+    def _attendify_send(self, operation, written=None):
+        """Eén bericht per partner; opgeroepen door de outbox-coalescer."""
+        for p in self.with_context(skip_rabbit=True):
+            _logger.info("Triggering RabbitMQ %s for partner %s", operation, p.id)
+            p._send_to_rabbitmq(operation)
+
+    # ────────────────────────────────────────────────────────────
+    # Bulk-upsert van Attendify-gebruikers (één RPC per batch)
+    # ────────────────────────────────────────────────────────────
+    @api.model
+    def attendify_upsert_users(self, users, mode="upsert"):
+        """
+        Maakt of werkt partners bij op `ref` (= Attendify-UID).
+
+        • `users`: lijst van gebruikers zoals hierboven beschreven.
+        • `mode`: "create" slaat bestaande refs over, "update" slaat
+          onbekende refs over, "upsert" doet beide.
+
+        Landen, titels en bedrijven worden hier in-process opgezocht;
+        factuuradressen gaan als one2many-commando mee in dezelfde
+        create/write.  Nooit een echo naar RabbitMQ (`skip_rabbit`).
+        """
+        Partner = self.with_context(skip_rabbit=True, active_test=False)
+
+        # later berichten voor dezelfde UID winnen, veld per veld
+        merged = {}
+        for user in users or []:
+            ref = _s(user.get("uid"))
+            if ref:
+                merged.setdefault(ref, {}).update(user)
+        result = {"created": 0, "updated": 0, "skipped": 0, "ids": {}}
+        if not merged:
+            return result
+
+        countries = {}
+        for c in self.env["res.country"].search_read([], ["code", "name"]):
+            if c["code"]:
+                countries[c["code"].upper()] = c["id"]
+            if c["name"]:
+                countries[c["name"].lower()] = c["id"]
+        titles = {
+            t["shortcut"]: t["id"]
+            for t in self.env["res.partner.title"].search_read(
+                [("shortcut", "!=", False)], ["shortcut"]
             )
-            conn.close()
-            _logger.info("RabbitMQ %s sent for partner %s", operation, self.id)
-        except Exception:
-            _logger.exception("RabbitMQ %s failed for partner %s", operation, self.id)
+        }
+
+        existing = {p.ref: p for p in Partner.search([("ref", "in", list(merged))])}
+        if mode == "create":
+            todo = {r: u for r, u in merged.items() if r not in existing}
+        elif mode == "update":
+            todo = {r: u for r, u in merged.items() if r in existing}
+        else:
+            todo = merged
+        result["skipped"] = len(merged) - len(todo)
+
+        company_ids = self._attendify_company_ids(todo.values(), countries)
+        invoice_ids = {}
+        if existing:
+            for child in Partner.search([
+                ("parent_id", "in", [p.id for p in existing.values()]),
+                ("type", "=", "invoice"),
+            ]):
+                invoice_ids.setdefault(child.parent_id.id, child.id)
+
+        to_create = []
+        for ref, user in todo.items():
+            vals = _user_partner_vals(user, countries, titles)
+            company = _user_company_vals(user, countries)
+            if company:
+                vals["parent_id"] = company_ids[(company["name"], company.get("vat", ""))]
+            invoice = _user_invoice_vals(user, countries)
+            partner = existing.get(ref)
+            if partner:
+                if invoice:
+                    child_id = invoice_ids.get(partner.id)
+                    vals["child_ids"] = [(1, child_id, invoice) if child_id else (0, 0, invoice)]
+                partner.write(vals)
+                result["updated"] += 1
+                result["ids"][ref] = partner.id
+            else:
+                vals.update(ref=ref, customer_rank=1, company_type="person")
+                if invoice:
+                    vals["child_ids"] = [(0, 0, invoice)]
+                to_create.append(vals)
+
+        if to_create:
+            for partner in Partner.create(to_create):
+                result["ids"][partner.ref] = partner.id
+            result["created"] = len(to_create)
+        _logger.info(
+            "Attendify user upsert (%s): %d created, %d updated, %d skipped",
+            mode, result["created"], result["updated"], result["skipped"],
+        )
+        return result
+
+    @api.model
+    def _attendify_company_ids(self, users, countries) -> dict:
+        """(naam, btw) → id; ontbrekende bedrijven in één create."""
+        wanted = {}
+        for user in users:
+            vals = _user_company_vals(user, countries)
+            if vals:
+                wanted.setdefault((vals["name"], vals.get("vat", "")), vals)
+        if not wanted:
+            return {}
+
+        Partner = self.with_context(skip_rabbit=True)
+        found = {}
+        for c in Partner.search_read(
+            [("is_company", "=", True), ("name", "in", [n for n, _ in wanted])],
+            ["name", "vat"], order="id",
+        ):
+            found.setdefault((c["name"], c["vat"] or ""), c["id"])
+            found.setdefault((c["name"], ""), c["id"])     # zonder btw: eerste match
+
+        ids, missing = {}, []
+        for key, vals in wanted.items():
+            if key in found:
+                ids[key] = found[key]
+            else:
+                missing.append((key, vals))
+        if missing:
+            created = Partner.create([vals for _, vals in missing])
+            ids.update(zip((key for key, _ in missing), created.ids))
+        return ids
 
     # ────────────────────────────────────────────────────────────
     # CRUD-overrides
@@ -188,17 +379,16 @@ class ResPartner(models.Model):
         if self.env.context.get("skip_rabbit"):
             return super().create(vals_list)
 
-        # Voeg ref toe voor eventuele duplicates
-        for v in vals_list:
-            v.setdefault("ref", f"OD{int(time.time() * 1000)}")
+        # Unieke ref per nieuwe partner, in één blok gereserveerd
+        missing = [v for v in vals_list if "ref" not in v]
+        for v, ref in zip(missing, self.env["attendify.uid"].allocate("OD", len(missing))):
+            v["ref"] = ref
 
         partners = super(
             ResPartner, self.with_context(skip_rabbit=True)
         ).create(vals_list)
 
-        for p in partners:
-            _logger.info("Triggering RabbitMQ create for partner %s", p.id)
-            p._send_to_rabbitmq("create")
+        self.env["attendify.outbox"].defer_changes(partners, "create")
         return partners
 
     def write(self, vals):
@@ -217,16 +407,13 @@ class ResPartner(models.Model):
             raise
 
         if not self.env.context.get("retrying"):
-            for p in self:
-                _logger.info("Triggering RabbitMQ update for partner %s", p.id)
-                p.with_context(skip_rabbit=True)._send_to_rabbitmq("update")
+            self.env["attendify.outbox"].defer_changes(self, "update")
         return res
 
     def unlink(self):
         if self.env.context.get("skip_rabbit"):
             return super().unlink()
 
-        for p in self:
-            _logger.info("Triggering RabbitMQ delete for partner %s", p.id)
-            p._send_to_rabbitmq("delete")
+        # wat in deze transactie pas aangemaakt is, gaat niet meer uit
+        self.env["attendify.outbox"].cancel_changes(self)._attendify_send("delete")
         return super().unlink()
@@ -0,0 +1,3 @@
+from . import attendify
+from . import background
+from . import rabbit
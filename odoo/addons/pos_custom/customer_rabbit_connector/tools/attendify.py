@@ -0,0 +1,464 @@
+# -*- coding: utf-8 -*-
+"""
+Attendify message model – shared by the Odoo addons and the consumers.
+
+One `__slots__` dataclass per payload (user, event, event_attendee, tab,
+session) plus a `Message` envelope, with a compact encoder and a
+single-pass decoder:
+
+    body = attendify.encode(Message("create", "odoo", User(uid="OD1", …)))
+    msg  = attendify.parse(body)
+    msg.operation        # "create", lower-cased
+    msg.kind             # "user" / "event" / "event_attendee" / "tab" / "session"
+    msg.payload          # typed record (None for unknown kinds)
+
+`parse` feeds the AMQP body to expat as bytes (no decode copy) and fills
+the record while the document streams through – no element tree is
+built.  `encode` writes UTF-8 bytes directly from the record, without an
+ElementTree / minidom round-trip; `description` goes out as CDATA.
+`encode(msg, indent="  ")` writes the same document indented, and
+`pretty(body)` re-indents any body for debug logs in one expat pass.
+
+Records support `rec.get(name, default)` and `rec[name]` so handlers that
+were written against xmltodict dicts keep working.  Child elements that
+are not a declared field (e.g. `<address><street>`) end up in
+`rec.extra` keyed by their path below the record ("address/street");
+`extra` is decode-only and never encoded.
+
+This file has no Odoo imports: the consumers load it as a plain module
+(docker-compose mounts it next to them), the addons import it as
+`odoo.addons.customer_rabbit_connector.tools.attendify`.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from xml.parsers import expat
+
+_XSI = "http://www.w3.org/2001/XMLSchema-instance"
+
+
+# ────────────────────────────────────────────────────────────────────────
+# records
+# ────────────────────────────────────────────────────────────────────────
+class _Record:
+    __slots__ = ()
+
+    _tag     = ""          # element name of the record
+    _schema  = None        # xsi:noNamespaceSchemaLocation on <attendify>
+    _lists   = {}          # field -> item class, e.g. <items><tab_item/>…</items>
+    _objects = {}          # field -> nested record class, e.g. <speaker>
+    _cdata   = ()          # fields written as CDATA
+
+    def get(self, name: str, default=None):
+        value = getattr(self, name, None)
+        if value is None:
+            extra = getattr(self, "extra", None)
+            value = extra.get(name) if extra else None
+        return default if value is None else value
+
+    def __getitem__(self, name: str):
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def to_dict(self) -> dict:
+        """Set fields as plain dicts/lists (XML-RPC friendly); `extra` excluded."""
+        out = {}
+        for name, item_cls, obj_cls, _ in _plan(type(self)):
+            value = getattr(self, name)
+            if value is None:
+                continue
+            if item_cls is not None:
+                value = [item.to_dict() for item in value]
+            elif obj_cls is not None:
+                value = value.to_dict()
+            out[name] = value
+        return out
+
+
+@dataclass(slots=True)
+class User(_Record):
+    _tag = "user"
+
+    uid: str | None = None
+    first_name: str | None = None
+    last_name: str | None = None
+    email: str | None = None
+    password: str | None = None
+    title: str | None = None
+    country: str | None = None
+    is_admin: str | None = None
+    date_of_birth: str | None = None
+    phone_number: str | None = None
+    from_company: str | None = None
+    extra: dict | None = None
+
+
+@dataclass(slots=True)
+class Event(_Record):
+    _tag    = "event"
+    _schema = "event.xsd"
+    _cdata  = ("description",)
+
+    uid: str | None = None
+    gcid: str | None = None
+    title: str | None = None
+    location: str | None = None
+    start_date: str | None = None
+    end_date: str | None = None
+    start_time: str | None = None
+    end_time: str | None = None
+    organizer_name: str | None = None
+    organizer_uid: str | None = None
+    entrance_fee: str | None = None
+    description: str | None = None
+    registration_limit: str | None = None
+    seats_max: str | None = None
+    limit: str | None = None
+    extra: dict | None = None
+
+
+@dataclass(slots=True)
+class EventAttendee(_Record):
+    _tag    = "event_attendee"
+    _schema = "event_attendee.xsd"
+
+    uid: str | None = None
+    event_id: str | None = None
+    extra: dict | None = None
+
+
+@dataclass(slots=True)
+class TabItem(_Record):
+    _tag = "tab_item"
+
+    item_name: str | None = None
+    quantity: str | None = None
+    price: str | None = None
+    extra: dict | None = None
+
+
+@dataclass(slots=True)
+class Tab(_Record):
+    _tag    = "tab"
+    _schema = "tab_item.xsd"
+    _lists  = {"items": TabItem}
+
+    uid: str | None = None
+    event_id: str | None = None
+    timestamp: str | None = None
+    is_paid: str | None = None
+    items: list | None = None
+    extra: dict | None = None
+
+
+@dataclass(slots=True)
+class Speaker(_Record):
+    _tag = "speaker"
+
+    name: str | None = None
+    bio: str | None = None
+    extra: dict | None = None
+
+
+@dataclass(slots=True)
+class Session(_Record):
+    _tag     = "session"
+    _schema  = "session.xsd"
+    _objects = {"speaker": Speaker}
+    _cdata   = ("description",)
+
+    id: str | None = None
+    uid: str | None = None
+    event_id: str | None = None
+    title: str | None = None
+    description: str | None = None
+    date: str | None = None
+    start_time: str | None = None
+    end_time: str | None = None
+    location: str | None = None
+    max_attendees: str | None = None
+    speaker: Speaker | None = None
+    extra: dict | None = None
+
+
+@dataclass(slots=True)
+class Message:
+    operation: str = ""
+    sender: str = ""
+    payload: _Record | None = None
+    kind: str = ""
+
+    def __post_init__(self):
+        if not self.kind and self.payload is not None:
+            self.kind = self.payload._tag
+
+
+RECORD_TYPES = {cls._tag: cls for cls in (User, Event, EventAttendee, Tab, Session)}
+_FIELDS = {
+    cls: frozenset(f.name for f in fields(cls)) - {"extra"}
+    for cls in (*RECORD_TYPES.values(), TabItem, Speaker)
+}
+
+
+# ────────────────────────────────────────────────────────────────────────
+# encoder
+# ────────────────────────────────────────────────────────────────────────
+_PLANS = {}
+
+
+def _plan(cls) -> tuple:
+    plan = _PLANS.get(cls)
+    if plan is None:
+        plan = _PLANS[cls] = tuple(
+            (f.name, cls._lists.get(f.name), cls._objects.get(f.name), f.name in cls._cdata)
+            for f in fields(cls) if f.name != "extra"
+        )
+    return plan
+
+
+def _text(value) -> str:
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    s = value if isinstance(value, str) else str(value)
+    if "&" in s or "<" in s or ">" in s:
+        s = s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return s
+
+
+def _cdata(value) -> str:
+    return "<![CDATA[" + str(value).replace("]]>", "]]]]><![CDATA[>") + "]]>"
+
+
+def _encode_record(rec: _Record, tag: str, out: list, pad: str = "", step: str = "") -> None:
+    # pad = newline + indentation of this element ("" on the compact wire)
+    inner = pad + step
+    out.append(f"{pad}<{tag}>")
+    for name, item_cls, obj_cls, cdata in _plan(type(rec)):
+        value = getattr(rec, name)
+        if value is None:
+            continue
+        if item_cls is not None:
+            out.append(f"{inner}<{name}>")
+            for item in value:
+                _encode_record(item, item_cls._tag, out, inner + step, step)
+            out.append(f"{inner}</{name}>")
+        elif obj_cls is not None:
+            _encode_record(value, name, out, inner, step)
+        elif value == "":
+            out.append(f"{inner}<{name}/>")
+        else:
+            out.append(f"{inner}<{name}>{_cdata(value) if cdata else _text(value)}</{name}>")
+    out.append(f"{pad}</{tag}>")
+
+
+def encode(msg: Message, indent: str | None = None) -> bytes:
+    """
+    Serialize a Message to a UTF-8 AMQP body in one pass.  Compact by
+    default (the wire format); `indent="  "` gives the indented form.
+    """
+    payload = msg.payload
+    schema  = type(payload)._schema
+    pad, step = ("\n" + indent, indent) if indent is not None else ("", "")
+    out = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        "\n" if indent is not None else "",
+        f'<attendify xmlns:xsi="{_XSI}" xsi:noNamespaceSchemaLocation="{schema}">'
+        if schema else "<attendify>",
+        f"{pad}<info>{pad}{step}<sender>{_text(msg.sender)}</sender>"
+        f"{pad}{step}<operation>{_text(msg.operation)}</operation>{pad}</info>",
+    ]
+    _encode_record(payload, msg.kind or payload._tag, out, pad, step)
+    out.append("\n</attendify>\n" if indent is not None else "</attendify>")
+    return "".join(out).encode("utf-8")
+
+
+class _Indenter:
+    """expat callbacks for `pretty`: re-emit the document one line per element."""
+
+    __slots__ = ("out", "step", "depth", "text", "cdata", "leaf")
+
+    def __init__(self, step: str):
+        self.out   = ['<?xml version="1.0" encoding="UTF-8"?>']
+        self.step  = step
+        self.depth = 0
+        self.text  = []
+        self.cdata = None                 # list while inside <![CDATA[ … ]]>
+        self.leaf  = False                # last tag opened has no child yet
+
+    def start(self, tag, attrs):
+        attrs = "".join(f' {k}="{_text(v).replace(chr(34), "&quot;")}"'
+                        for k, v in attrs.items())
+        self.out.append(f"\n{self.step * self.depth}<{tag}{attrs}>")
+        self.depth += 1
+        self.text  = []
+        self.leaf  = True
+
+    def end(self, tag):
+        self.depth -= 1
+        if self.leaf:
+            content = "".join(self.text)
+            if content.strip():
+                self.out.append(f"{content}</{tag}>")
+            else:
+                self.out[-1] = self.out[-1][:-1] + "/>"
+        else:
+            self.out.append(f"\n{self.step * self.depth}</{tag}>")
+        self.text = []
+        self.leaf = False
+
+    def chars(self, data):
+        if self.cdata is not None:
+            self.cdata.append(data)
+        elif self.leaf:
+            self.text.append(_text(data))
+
+    def start_cdata(self):
+        self.cdata = []
+
+    def end_cdata(self):
+        self.text.append(_cdata("".join(self.cdata)))
+        self.cdata = None
+
+
+def pretty(body: bytes | bytearray | str, indent: str = "  ") -> str:
+    """
+    Indented copy of any XML body for logs, in one expat pass (no DOM);
+    CDATA sections stay CDATA.
+    """
+    indenter = _Indenter(indent)
+    parser   = expat.ParserCreate()
+    parser.buffer_text                = True
+    parser.StartElementHandler        = indenter.start
+    parser.EndElementHandler          = indenter.end
+    parser.CharacterDataHandler       = indenter.chars
+    parser.StartCdataSectionHandler   = indenter.start_cdata
+    parser.EndCdataSectionHandler     = indenter.end_cdata
+    parser.Parse(body, True)
+    indenter.out.append("\n")
+    return "".join(indenter.out)
+
+
+# ────────────────────────────────────────────────────────────────────────
+# decoder
+# ────────────────────────────────────────────────────────────────────────
+_NO_NESTING = {}
+_INFO_FIELDS = frozenset(("operation", "sender"))
+
+
+class _Frame:
+    """Object being filled: a record, the <info> block or a list wrapper."""
+
+    __slots__ = ("obj", "depth", "names", "lists", "objects", "item_cls", "path")
+
+    def __init__(self, obj, depth, names=frozenset(), lists=_NO_NESTING,
+                 objects=_NO_NESTING, item_cls=None):
+        self.obj      = obj
+        self.depth    = depth
+        self.names    = names
+        self.lists    = lists
+        self.objects  = objects
+        self.item_cls = item_cls
+        self.path     = []
+
+
+def _record_frame(rec: _Record, depth: int) -> _Frame:
+    cls = type(rec)
+    return _Frame(rec, depth, _FIELDS[cls], cls._lists, cls._objects)
+
+
+class _Builder:
+    """expat callbacks; depth 1 = <attendify>, 2 = info/payload, 3+ = fields."""
+
+    __slots__ = ("msg", "depth", "text", "leaf", "stack")
+
+    def __init__(self):
+        self.msg   = Message()
+        self.depth = 0
+        self.text  = []
+        self.leaf  = False
+        self.stack = []
+
+    def start(self, tag, attrs):
+        self.depth += 1
+        depth = self.depth
+        if depth >= 3:
+            top = self.stack[-1]
+            if top.item_cls is not None:           # each child is one list item
+                item = top.item_cls()
+                top.obj.append(item)
+                self.stack.append(_record_frame(item, depth))
+            elif not top.path and tag in top.lists:
+                items = []
+                setattr(top.obj, tag, items)
+                self.stack.append(_Frame(items, depth, item_cls=top.lists[tag]))
+            elif not top.path and tag in top.objects:
+                child = top.objects[tag]()
+                setattr(top.obj, tag, child)
+                self.stack.append(_record_frame(child, depth))
+            else:
+                top.path.append(tag)
+        elif depth == 2:
+            if tag == "info":
+                self.stack.append(_Frame(self.msg, depth, _INFO_FIELDS))
+            else:
+                cls = RECORD_TYPES.get(tag)
+                self.msg.kind = tag
+                if cls is None:
+                    self.stack.append(_Frame(None, depth))
+                else:
+                    self.msg.payload = cls()
+                    self.stack.append(_record_frame(self.msg.payload, depth))
+        elif tag != "attendify":
+            raise ValueError(f"Not an Attendify message: <{tag}>")
+        self.text.clear()
+        self.leaf = True
+
+    def end(self, tag):
+        depth = self.depth
+        self.depth = depth - 1
+        if depth >= 2:
+            top = self.stack[-1]
+            if top.depth == depth:
+                self.stack.pop()
+            else:
+                if self.leaf:
+                    self._store(top, "".join(self.text).strip())
+                top.path.pop()
+        self.text.clear()
+        self.leaf = False
+
+    def _store(self, top: _Frame, value: str):
+        obj = top.obj
+        if obj is None or top.item_cls is not None:
+            return
+        path = top.path
+        if len(path) == 1 and path[0] in top.names:
+            name = path[0]
+            if obj is self.msg and name == "operation":
+                value = value.lower()
+            setattr(obj, name, value)
+            return
+        if obj is self.msg:
+            return
+        if obj.extra is None:
+            obj.extra = {}
+        obj.extra["/".join(path)] = value
+
+
+def parse(body: bytes | bytearray | str) -> Message:
+    """Parse one Attendify message in a single expat pass."""
+    builder = _Builder()
+    parser  = expat.ParserCreate()
+    parser.buffer_text           = True
+    parser.StartElementHandler   = builder.start
+    parser.EndElementHandler     = builder.end
+    parser.CharacterDataHandler  = builder.text.append
+    parser.Parse(body, True)
+    return builder.msg
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Bounded in-memory hand-off from committed transactions to one background
+thread per worker process.
+
+    sender = background.BatchSender(handler, maxsize=10000, batch_size=500)
+    sender.offer(key, items)        # never blocks; False when full
+
+The thread takes whatever is queued (up to `batch_size` items), groups
+it by `key` (the database name for the outbox) and calls
+`handler(key, items)` once per group.  `offer` never waits: a full
+queue refuses the whole offer and the caller keeps its fallback (the
+outbox cron).  Exceptions from the handler are logged; the items are
+not retried here.
+"""
+import logging
+import os
+import queue
+import threading
+
+_logger = logging.getLogger(__name__)
+
+
+class BatchSender:
+
+    def __init__(self, handler, maxsize: int = 10000, batch_size: int = 500):
+        self._handler   = handler
+        self.batch_size = batch_size
+        self.pid        = os.getpid()
+        self._queue     = queue.Queue(maxsize=maxsize)
+        self._lock      = threading.Lock()
+        self._thread    = None
+        self.offered = self.refused = self.batches = 0
+
+    # ------------------------------------------------------------------
+    # producer side (post-commit callbacks, any thread)
+    # ------------------------------------------------------------------
+    def offer(self, key, items) -> bool:
+        """Queue `items` under `key`; all or nothing, never blocks."""
+        items = list(items)
+        with self._lock:
+            if self._queue.maxsize - self._queue.qsize() < len(items):
+                self.refused += len(items)
+                return False
+            for item in items:
+                self._queue.put_nowait((key, item))
+            self.offered += len(items)
+        self._ensure_thread()
+        return True
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="attendify-sender", daemon=True
+                )
+                self._thread.start()
+
+    # ------------------------------------------------------------------
+    # background thread
+    # ------------------------------------------------------------------
+    def _take(self, block: bool = True) -> dict:
+        """Up to `batch_size` queued items, grouped by key (FIFO per key)."""
+        groups = {}
+        try:
+            key, item = self._queue.get(block=block)
+        except queue.Empty:
+            return groups
+        groups.setdefault(key, []).append(item)
+        for _ in range(self.batch_size - 1):
+            try:
+                key, item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            groups.setdefault(key, []).append(item)
+        return groups
+
+    def drain_once(self, block: bool = True) -> int:
+        groups = self._take(block)
+        for key, items in groups.items():
+            try:
+                self._handler(key, items)
+            except Exception:
+                _logger.exception("Background send of %d item(s) for %s failed",
+                                  len(items), key)
+            self.batches += 1
+        return sum(len(items) for items in groups.values())
+
+    def _run(self):
+        while True:
+            self.drain_once()
+
+    def stats(self) -> dict:
+        return {"offered": self.offered, "refused": self.refused,
+                "batches": self.batches, "queued": self._queue.qsize()}
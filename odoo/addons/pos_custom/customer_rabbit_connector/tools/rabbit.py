@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+RabbitMQ publishing for the Odoo workers: a publisher-confirm pipeline,
+one per worker process.
+
+    from odoo.addons.customer_rabbit_connector.tools import rabbit
+
+    futures = [rabbit.confirming_publisher().publish_async(ex, rk, body)
+               for ex, rk, body in messages]
+
+The RabbitMQ settings are read once per process (environment first,
+`.env` as fallback).  `ConfirmingPublisher` runs an asynchronous
+connection on its own IO thread, keeps up to `max_inflight` messages
+unconfirmed and matches the broker's (possibly `multiple`) acks and
+nacks to the messages by delivery tag.  Exchanges, queues and bindings
+are declared once per connection.  Every message gets a
+`concurrent.futures.Future`: its result is True once acked, and it
+fails with `NackError` (nacked) or `ConnectionError` (connection lost
+before the confirm).  While the broker is unreachable the pipeline
+reconnects with exponential backoff, and only for requests whose caller
+is still waiting.  After a fork the child gets its own pipeline.
+"""
+import collections
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+import pika
+from pika import exceptions as pika_exc
+from pika.spec import Basic
+from dotenv import dotenv_values
+
+_logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY     = 1.0      # first retry after a failed connection (s)
+RECONNECT_MAX_DELAY = 60.0     # doubled per failed attempt up to this
+
+
+def load_config() -> dict:
+    """Connector settings from the environment, `.env` as fallback."""
+    env_fallback = dotenv_values()
+    return {
+        "host":  os.getenv("RABBITMQ_HOST")     or env_fallback.get("RABBITMQ_HOST"),
+        "port":  os.getenv("RABBITMQ_PORT")     or env_fallback.get("RABBITMQ_PORT"),
+        "user":  os.getenv("RABBITMQ_USERNAME") or env_fallback.get("RABBITMQ_USERNAME"),
+        "pw":    os.getenv("RABBITMQ_PASSWORD") or env_fallback.get("RABBITMQ_PASSWORD"),
+        "vhost": os.getenv("RABBITMQ_VHOST")    or env_fallback.get("RABBITMQ_VHOST"),
+        # "cron" (outbox drain only) or "background" (post-commit sender)
+        "publish_mode": (os.getenv("RABBITMQ_PUBLISH_MODE")
+                         or env_fallback.get("RABBITMQ_PUBLISH_MODE") or "cron"),
+        # event updates as field-level "patch" messages (event_sync)
+        "event_deltas": (os.getenv("ATTENDIFY_EVENT_DELTAS")
+                         or env_fallback.get("ATTENDIFY_EVENT_DELTAS")
+                         or "").strip().lower() in ("1", "true", "yes"),
+    }
+
+
+class _Configured:
+    """RabbitMQ settings, loaded on first use and then kept."""
+
+    _config_loader = staticmethod(load_config)
+    _config = None
+
+    @property
+    def config(self) -> dict:
+        if self._config is None:
+            self._config = self._config_loader()
+        return self._config
+
+    def configured(self) -> bool:
+        cfg = self.config
+        return all([cfg["host"], cfg["user"], cfg["pw"]])
+
+    def _parameters(self) -> pika.ConnectionParameters:
+        cfg = self.config
+        return pika.ConnectionParameters(
+            host=cfg["host"],
+            port=int(cfg["port"] or 5672),
+            virtual_host=cfg["vhost"] or "/",
+            credentials=pika.PlainCredentials(cfg["user"], cfg["pw"]),
+        )
+
+
+# ────────────────────────────────────────────────────────────────────────
+# pipelined confirms
+# ────────────────────────────────────────────────────────────────────────
+class ConfirmTracker:
+    """Outstanding confirms of one channel, keyed by delivery tag."""
+
+    def __init__(self):
+        self._pending = collections.OrderedDict()    # tag -> Future, ascending
+        self._next_tag = 1
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, future: Future) -> int:
+        tag = self._next_tag
+        self._next_tag += 1
+        self._pending[tag] = future
+        return tag
+
+    def _take(self, tag: int, multiple: bool) -> list:
+        if not multiple:
+            future = self._pending.pop(tag, None)
+            return [future] if future is not None else []
+        taken = []
+        while self._pending:
+            first = next(iter(self._pending))
+            if first > tag:
+                break
+            taken.append(self._pending.pop(first))
+        return taken
+
+    def ack(self, tag: int, multiple: bool = False) -> int:
+        futures = self._take(tag, multiple)
+        for future in futures:
+            future.set_result(True)
+        return len(futures)
+
+    def nack(self, tag: int, multiple: bool = False) -> int:
+        futures = self._take(tag, multiple)
+        for future in futures:
+            future.set_exception(pika_exc.NackError([]))
+        return len(futures)
+
+    def fail_all(self, exc: BaseException) -> None:
+        """Channel gone: nothing outstanding will be confirmed any more."""
+        pending, self._pending = self._pending, collections.OrderedDict()
+        for future in pending.values():
+            future.set_exception(exc)
+        self._next_tag = 1
+
+
+class _Request(collections.namedtuple(
+        "_Request", "exchange routing_key body queue properties future")):
+    __slots__ = ()
+
+
+class ConfirmingPublisher(_Configured):
+    """
+    Publisher-confirm pipeline on a `pika.SelectConnection` (own IO thread).
+    `publish_async` is thread-safe and never waits for the broker.
+    """
+
+    def __init__(self, config_loader=load_config, max_inflight: int = 1000,
+                 connection_factory=pika.SelectConnection):
+        self._config_loader = config_loader
+        self._factory       = connection_factory
+        self.max_inflight   = max_inflight
+        self.pid            = os.getpid()
+        self._requests      = queue.SimpleQueue()
+        self._tracker       = ConfirmTracker()
+        self._lock          = threading.Lock()
+        self._thread        = None
+        self._conn          = None
+        self._channel       = None
+        self._declared      = set()
+        self._retry_delay   = RECONNECT_DELAY
+        self.acked = self.nacked = self.failed = 0
+
+    # ------------------------------------------------------------------
+    # producer side (any thread)
+    # ------------------------------------------------------------------
+    def publish_async(self, exchange, routing_key, body, queue=None, properties=None) -> Future:
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        future = Future()
+        self._requests.put(_Request(exchange, routing_key, body, queue,
+                                    properties or pika.BasicProperties(delivery_mode=2),
+                                    future))
+        self._ensure_thread()
+        self._wake()
+        return future
+
+    def _wake(self):
+        conn = self._conn
+        if conn is not None:
+            try:
+                conn.ioloop.add_callback_threadsafe(self._pump)
+            except Exception:
+                pass                    # loop shutting down; picked up on reconnect
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="rabbit-confirms", daemon=True
+                )
+                self._thread.start()
+
+    # ------------------------------------------------------------------
+    # IO thread
+    # ------------------------------------------------------------------
+    def _run(self):
+        conn = self._factory(
+            self._parameters(),
+            on_open_callback=self._on_open,
+            on_open_error_callback=self._on_closed,
+            on_close_callback=self._on_closed,
+        )
+        self._conn = conn
+        conn.ioloop.start()
+        self._conn = None
+        # requests still waiting (callers time out and cancel theirs): retry
+        # later, backing off while the broker stays unreachable
+        if self._drop_cancelled():
+            self._ensure_thread_later()
+
+    def _drop_cancelled(self) -> int:
+        """Forget queued requests nobody waits for; returns how many are left."""
+        waiting = []
+        while True:
+            try:
+                req = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if not req.future.cancelled():
+                waiting.append(req)
+        for req in waiting:
+            self._requests.put(req)
+        return len(waiting)
+
+    def _ensure_thread_later(self):
+        delay, self._retry_delay = (
+            self._retry_delay, min(self._retry_delay * 2, RECONNECT_MAX_DELAY)
+        )
+        threading.Timer(delay, self._ensure_thread).start()
+
+    def _on_open(self, conn):
+        conn.channel(on_open_callback=self._on_channel_open)
+
+    def _on_channel_open(self, channel):
+        channel.add_on_close_callback(self._on_channel_closed)
+        channel.confirm_delivery(self._on_confirm, callback=lambda _frame: self._ready(channel))
+
+    def _ready(self, channel):
+        self._channel     = channel
+        self._declared    = set()
+        self._retry_delay = RECONNECT_DELAY
+        _logger.info("RabbitMQ confirm pipeline ready")
+        self._pump()
+
+    def _on_channel_closed(self, channel, reason):
+        _logger.warning("RabbitMQ confirm channel closed: %s", reason)
+        self._lost(reason)
+        if self._conn is not None and self._conn.is_open:
+            self._conn.close()
+
+    def _on_closed(self, conn, reason):
+        _logger.warning("RabbitMQ confirm connection closed: %s", reason)
+        self._lost(reason)
+        conn.ioloop.stop()
+
+    def _lost(self, reason):
+        self._channel = None
+        self.failed += len(self._tracker)
+        self._tracker.fail_all(ConnectionError(f"RabbitMQ connection lost: {reason}"))
+
+    def _pump(self):
+        """Publish queued requests while the in-flight window has room."""
+        channel = self._channel
+        while channel is not None and len(self._tracker) < self.max_inflight:
+            try:
+                req = self._requests.get_nowait()
+            except queue.Empty:
+                return
+            if not req.future.set_running_or_notify_cancel():
+                continue
+            # nowait declarations: frames on one channel are handled in
+            # order, so the publish below never overtakes its binding
+            if req.exchange not in self._declared:
+                channel.exchange_declare(req.exchange, "direct", durable=True)
+                self._declared.add(req.exchange)
+            key = (req.queue, req.exchange, req.routing_key)
+            if req.queue and key not in self._declared:
+                channel.queue_declare(req.queue, durable=True)
+                channel.queue_bind(req.queue, req.exchange, routing_key=req.routing_key)
+                self._declared.add(key)
+            self._tracker.add(req.future)
+            channel.basic_publish(req.exchange, req.routing_key, req.body, req.properties)
+
+    def _on_confirm(self, frame):
+        method = frame.method
+        multiple = bool(getattr(method, "multiple", False))
+        if isinstance(method, Basic.Ack):
+            self.acked += self._tracker.ack(method.delivery_tag, multiple)
+        else:
+            self.nacked += self._tracker.nack(method.delivery_tag, multiple)
+        self._pump()
+
+    def close(self):
+        conn = self._conn
+        if conn is not None:
+            conn.ioloop.add_callback_threadsafe(conn.close)
+
+    def stats(self) -> dict:
+        return {"acked": self.acked, "nacked": self.nacked, "failed": self.failed,
+                "in_flight": len(self._tracker)}
+
+
+_CONFIRMING = None
+_LOCK       = threading.Lock()
+
+
+def confirming_publisher() -> ConfirmingPublisher:
+    """The process-wide confirm pipeline (a forked child gets its own)."""
+    global _CONFIRMING
+    if _CONFIRMING is None or _CONFIRMING.pid != os.getpid():
+        with _LOCK:
+            if _CONFIRMING is None or _CONFIRMING.pid != os.getpid():
+                _CONFIRMING = ConfirmingPublisher()
+    return _CONFIRMING
@@ -1,7 +1,7 @@
 {
     'name': 'Event Sync with RabbitMQ',
     'version': '1.0',
-    'depends': ['event', 'point_of_sale', 'pos_self_order'],
+    'depends': ['event', 'point_of_sale', 'pos_self_order', 'customer_rabbit_connector'],
     'assets': {
         # Odoo 17 POS bundle
         'point_of_sale._assets_pos': [
@@ -1,3 +1,4 @@
 from . import event_sync
 from . import pos_order
-from . import event_event
\ No newline at end of file
+from . import event_event
+from . import attendify_ingest
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+Server-side ingestion of Attendify event / attendee messages.
+
+The event consumer sends each parsed message with one RPC:
+
+    models.execute_kw(db, uid, pw, "attendify.ingest", "ingest", [{
+        "operation": "create",
+        "kind":      "event",            # or "event_attendee"
+        "payload":   {"uid": "GC…", "title": "…", …},
+    }])
+
+Every lookup and upsert (venue, organizer, event, ticket, ticket product,
+registration) runs in that single request, i.e. in one transaction: a
+failure rolls the whole message back instead of leaving partial writes.
+Writes carry `skip_rabbit` so nothing is echoed back to RabbitMQ.
+
+Operation "patch" (event_sync with ATTENDIFY_EVENT_DELTAS) carries only
+the changed fields and is applied with one `write` of just those.  A field
+that is present but empty is cleared.  When the patch changes what the
+POS ticket product shows (title, entrance fee, description, location),
+the product template is updated with one targeted `write` as well.
+"""
+import logging
+import re
+
+from odoo import api, models
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+POS_CATEGORY   = "Drinks/Tickets"
+TICKET_PRODUCT = "Event Registration"
+
+
+def _to_dt(date_str, time_str=None):
+    """'YYYY-MM-DD' + 'HH:MM[:SS]' → 'YYYY-MM-DD HH:MM:SS' or False."""
+    if not date_str:
+        return False
+    time_str = (time_str or "").strip() or "00:00:00"
+    if re.match(r"^\d{2}:\d{2}$", time_str):
+        time_str += ":00"
+    elif not re.match(r"^\d{2}:\d{2}:\d{2}$", time_str):
+        raise UserError(f"Unknown time format: {time_str}")
+    return f"{date_str.strip()} {time_str}"
+
+
+def _product_patch_vals(ev):
+    """Ticket product values fed by the fields present in a "patch"."""
+    vals = {}
+    if "title" in ev:
+        vals["name"] = f"Ticket: {ev['title'] or 'Unnamed Event'}"
+    if "entrance_fee" in ev:
+        try:
+            vals["list_price"] = float(ev["entrance_fee"] or 0.0)
+        except ValueError:
+            _logger.warning("entrance_fee parse error: %s", ev["entrance_fee"])
+    if "description" in ev or "location" in ev:
+        vals["description_sale"] = (ev.get("description") or "") + "\nLocation: " + (ev.get("location") or "")
+    return vals
+
+
+class AttendifyIngest(models.AbstractModel):
+    _name = "attendify.ingest"
+    _description = "Attendify message ingestion"
+
+    @api.model
+    def ingest(self, message):
+        kind    = message.get("kind")
+        op      = (message.get("operation") or "").strip().lower()
+        payload = message.get("payload") or {}
+        quiet   = self.with_context(skip_rabbit=True)
+
+        if kind == "event":
+            result = quiet._ingest_event(payload, op)
+        elif kind == "event_attendee":
+            result = quiet._ingest_attendee(payload, op)
+        else:
+            result = {"status": "ignored", "reason": f"unknown payload {kind!r}"}
+        _logger.info("Attendify %s %s: %s", kind, op, result)
+        return result
+
+    # ------------------------------------------------------------------
+    # events
+    # ------------------------------------------------------------------
+    def _ingest_event(self, ev, op):
+        Event     = self.env["event.event"]
+        event_uid = ev.get("uid")
+        rec = Event.search([("external_uid", "=", event_uid)], limit=1) if event_uid else Event
+
+        if op == "delete":
+            if not rec:
+                return {"status": "skipped", "reason": "uid unknown"}
+            rec_id = rec.id
+            rec.unlink()
+            return {"status": "deleted", "id": rec_id}
+
+        if op == "patch":
+            if not rec:
+                return {"status": "skipped", "reason": "uid unknown"}
+            vals = self._event_patch_vals(ev)
+            if vals:
+                rec.write(vals)
+            product_vals = _product_patch_vals(ev)
+            if product_vals:
+                self.env["product.template"].search(
+                    [("default_code", "=", event_uid)], limit=1
+                ).write(product_vals)
+            return {"status": "patched", "id": rec.id, "fields": sorted(vals)}
+
+        if op not in ("create", "update"):
+            return {"status": "ignored", "reason": f"unsupported operation {op!r}"}
+        if op == "create" and rec:
+            return {"status": "skipped", "reason": "exists", "id": rec.id}
+        if op == "update" and not rec:
+            return {"status": "skipped", "reason": "uid unknown"}
+
+        vals, fee = self._event_vals(ev)
+        if op == "create":
+            rec = Event.create(vals)
+            if fee > 0:
+                self._create_ticket(rec, fee)
+            status = "created"
+        else:
+            rec.write(vals)
+            status = "updated"
+        self._upsert_event_product(ev, fee)
+        return {"status": status, "id": rec.id}
+
+    def _event_vals(self, ev):
+        Event = self.env["event.event"]
+        vals = {
+            "external_uid": ev.get("uid"),
+            "name":         ev.get("title"),
+            "description":  ev.get("description") or "",
+            "date_begin":   _to_dt(ev.get("start_date"), ev.get("start_time")),
+            "date_end":     _to_dt(ev.get("end_date"), ev.get("end_time")),
+        }
+
+        fee = 0.0
+        if ev.get("entrance_fee"):
+            try:
+                fee = float(ev["entrance_fee"])
+            except ValueError:
+                _logger.warning("entrance_fee parse error: %s", ev["entrance_fee"])
+            else:
+                if "entrance_fee" in Event._fields:
+                    vals["entrance_fee"] = fee
+
+        if ev.get("gcid") and "gcid" in Event._fields:
+            vals["gcid"] = ev["gcid"].strip()
+
+        location = (ev.get("location") or "").strip()
+        if location:
+            Partner = self.env["res.partner"]
+            venue = Partner.search([("name", "=", location)], limit=1) or Partner.create(
+                {"name": location, "supplier_rank": 0, "customer_rank": 0}
+            )
+            vals["address_id"] = venue.id
+
+        if ev.get("organizer_uid"):
+            org = self.env["res.partner"].search([("ref", "=", ev["organizer_uid"])], limit=1)
+            if org:
+                vals["organizer_id"] = org.id
+
+        limit = ev.get("registration_limit") or ev.get("seats_max") or ev.get("limit")
+        if limit:
+            try:
+                vals["seats_max"]     = int(limit)
+                vals["seats_limited"] = True
+            except ValueError:
+                _logger.warning("seats_max parse error: %s", limit)
+        return vals, fee
+
+    def _event_patch_vals(self, ev):
+        """Values for a "patch" message: only the fields present in `ev`."""
+        Event = self.env["event.event"]
+        vals  = {}
+        if "title" in ev:
+            vals["name"] = ev["title"]
+        if "description" in ev:
+            vals["description"] = ev["description"] or ""
+        if "start_date" in ev:
+            vals["date_begin"] = _to_dt(ev["start_date"], ev.get("start_time"))
+        if "end_date" in ev:
+            vals["date_end"] = _to_dt(ev["end_date"], ev.get("end_time"))
+        if "gcid" in ev and "gcid" in Event._fields:
+            vals["gcid"] = (ev["gcid"] or "").strip() or False
+        if "location" in ev:
+            location = (ev["location"] or "").strip()
+            if location:
+                Partner = self.env["res.partner"]
+                venue = Partner.search([("name", "=", location)], limit=1) or Partner.create(
+                    {"name": location, "supplier_rank": 0, "customer_rank": 0}
+                )
+                vals["address_id"] = venue.id
+            else:
+                vals["address_id"] = False
+        if "organizer_uid" in ev:
+            if ev["organizer_uid"]:
+                org = self.env["res.partner"].search([("ref", "=", ev["organizer_uid"])], limit=1)
+                if org:
+                    vals["organizer_id"] = org.id
+            else:
+                vals["organizer_id"] = False
+        if "entrance_fee" in ev and "entrance_fee" in Event._fields:
+            try:
+                vals["entrance_fee"] = float(ev["entrance_fee"] or 0.0)
+            except ValueError:
+                _logger.warning("entrance_fee parse error: %s", ev["entrance_fee"])
+        return vals
+
+    def _create_ticket(self, event, fee):
+        Ticket  = self.env["event.event.ticket"]
+        Product = self.env["product.product"]
+        product = Product.search([("name", "=", TICKET_PRODUCT)], limit=1) or Product.create(
+            {"name": TICKET_PRODUCT, "type": "service"}
+        )
+        vals = {
+            "event_id":   event.id,
+            "name":       f"Ticket: {event.name}",
+            "price":      fee,
+            "product_id": product.id,
+        }
+        if "product_uom_id" in Ticket._fields:
+            uom = self.env.ref("uom.product_uom_unit", raise_if_not_found=False)
+            if uom:
+                vals["product_uom_id"] = uom.id
+        return Ticket.create(vals)
+
+    def _upsert_event_product(self, ev, fee):
+        Template = self.env["product.template"]
+        category = self.env["pos.category"].search([("name", "=", POS_CATEGORY)], limit=1)
+        if not category:
+            raise UserError(f"POS category '{POS_CATEGORY}' not found")
+
+        title        = ev.get("title") or "Unnamed Event"
+        default_code = ev.get("uid") or ev.get("gcid") or title or "event"
+        vals = {
+            "name":             f"Ticket: {title}",
+            "type":             "service",
+            "default_code":     default_code,
+            "list_price":       fee,
+            "sale_ok":          True,
+            "purchase_ok":      False,
+            "description_sale": (ev.get("description") or "") + "\nLocation: " + (ev.get("location") or ""),
+        }
+        if "pos_categ_id" in Template._fields:
+            vals["pos_categ_id"] = category.id
+        elif "pos_categ_ids" in Template._fields:
+            vals["pos_categ_ids"] = [(6, 0, category.ids)]
+        if "available_in_pos" in Template._fields:
+            vals["available_in_pos"] = True
+
+        template = Template.search([("default_code", "=", default_code)], limit=1)
+        if template:
+            template.write(vals)
+        else:
+            template = Template.create(vals)
+        return template
+
+    # ------------------------------------------------------------------
+    # registrations
+    # ------------------------------------------------------------------
+    def _ingest_attendee(self, ea, op):
+        if op not in ("register", "unregister"):
+            return {"status": "ignored", "reason": f"unsupported operation {op!r}"}
+
+        partner = self.env["res.partner"].search([("ref", "=", ea.get("uid"))], limit=1)
+        if not partner:
+            return {"status": "skipped", "reason": "user UID not found"}
+        event = self.env["event.event"].search([("external_uid", "=", ea.get("event_id"))], limit=1)
+        if not event:
+            return {"status": "skipped", "reason": "event UID not found"}
+
+        Registration = self.env["event.registration"]
+        reg = Registration.search(
+            [("event_id", "=", event.id), ("partner_id", "=", partner.id)], limit=1
+        )
+
+        if op == "register":
+            if reg:
+                return {"status": "skipped", "reason": "already registered", "id": reg.id}
+            vals = {"event_id": event.id, "partner_id": partner.id}
+            ticket = self.env["event.event.ticket"].search(
+                [("event_id", "=", event.id)], limit=1, order="id ASC"
+            )
+            if ticket:
+                vals["event_ticket_id"] = ticket.id
+            return {"status": "registered", "id": Registration.create(vals).id}
+
+        if not reg:
+            return {"status": "skipped", "reason": "registration not found"}
+        reg_id = reg.id
+        reg.unlink()
+        return {"status": "unregistered", "id": reg_id}
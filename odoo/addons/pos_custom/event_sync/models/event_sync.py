@@ -1,12 +1,34 @@
 # -*- coding: utf-8 -*-
-import logging, os, time, re, xml.etree.ElementTree as ET
-from xml.dom import minidom
+import logging
 
-import pika
 from odoo import api, fields, models
+from odoo.addons.customer_rabbit_connector.tools import attendify, rabbit
 
 _logger = logging.getLogger(__name__)
 
+_EVENT_DELTAS = None
+
+# event.event field → the message fields it feeds; description and location
+# travel together because the ticket product's description_sale joins them
+_DELTA_FIELDS = {
+    "name":             ("title",),
+    "gcid":             ("gcid",),
+    "address_id":       ("location", "description"),
+    "date_begin":       ("start_date", "start_time"),
+    "date_end":         ("end_date", "end_time"),
+    "user_id":          ("organizer_name", "organizer_uid"),
+    "description":      ("description", "location"),
+    "event_ticket_ids": ("entrance_fee",),
+}
+
+
+def _event_deltas() -> bool:
+    """Opt-in ATTENDIFY_EVENT_DELTAS: updates go out as "patch" messages."""
+    global _EVENT_DELTAS
+    if _EVENT_DELTAS is None:
+        _EVENT_DELTAS = rabbit.load_config()["event_deltas"]
+    return _EVENT_DELTAS
+
 # ────────────────────────────────────────────────────────────────────────
 # Event sync
 # ────────────────────────────────────────────────────────────────────────
@@ -19,51 +41,88 @@ class EventSync(models.Model):
     # --------------------------------------------------------------
     # helpers
     # --------------------------------------------------------------
-    @staticmethod
-    def _pretty(xml_bytes: bytes) -> str:
-        return minidom.parseString(xml_bytes).toprettyxml(indent="  ")
-
     @staticmethod
     def _event_uid(rec):
         if rec.external_uid:
             return rec.external_uid
-        uid = f"GC{int(time.time() * 1000)}"
+        uid = rec.env["attendify.uid"].allocate_one("GC")
         rec.with_context(skip_rabbit=True).write({"external_uid": uid})
         return uid
 
+    def _assign_event_uids(self):
+        """Give every event without `external_uid` one, in a single UPDATE."""
+        missing = self.filtered(lambda rec: not rec.external_uid)
+        if not missing:
+            return
+        uids = self.env["attendify.uid"].allocate("GC", len(missing))
+        missing.flush_recordset(["external_uid"])
+        self.env.cr.execute(
+            """
+            UPDATE event_event AS e
+               SET external_uid = v.uid
+              FROM unnest(%s::int[], %s::varchar[]) AS v(id, uid)
+             WHERE e.id = v.id
+            """,
+            (missing.ids, uids),
+        )
+        missing.invalidate_recordset(["external_uid"])
+
+    def _event_fees(self) -> dict:
+        """Lowest ticket price per event id – one grouped query for the set."""
+        groups = self.env["event.event.ticket"]._read_group(
+            [("event_id", "in", self.ids)], ["event_id"], ["price:min"]
+        )
+        return {event.id: price or 0.0 for event, price in groups}
+
+    def _prefetch_event_xml(self) -> dict:
+        """
+        Load everything `_build_event_xml` reads for the whole recordset
+        up front (a handful of queries instead of a few per event) and
+        return the entrance fee per event id.
+        """
+        self._assign_event_uids()
+        self.fetch(["external_uid", "gcid", "name", "address_id", "date_begin",
+                    "date_end", "user_id", "description"])
+        self.address_id.mapped("display_name")
+        self.user_id.mapped("name")
+        self.user_id.mapped("ref")
+        return self._event_fees()
+
     # --------------------------------------------------------------
     # XML builder
     # --------------------------------------------------------------
-    def _build_event_xml(self, operation, rec) -> str:
-        root = ET.Element("attendify")
-        root.set("xmlns:xsi", "http://www.w3.org/2001/XMLSchema-instance")
-        root.set("xsi:noNamespaceSchemaLocation", "event.xsd")
-
-        info = ET.SubElement(root, "info")
-        ET.SubElement(info, "sender").text    = "odoo"
-        ET.SubElement(info, "operation").text = operation
-
-        ev = ET.SubElement(root, "event")
-        ET.SubElement(ev, "uid").text         = self._event_uid(rec)
-        ET.SubElement(ev, "gcid").text        = rec.gcid or ""
-        ET.SubElement(ev, "title").text       = rec.name or ""
-        ET.SubElement(ev, "location").text    = rec.address_id.display_name or ""
-        ET.SubElement(ev, "start_date").text  = rec.date_begin.strftime("%Y-%m-%d") if rec.date_begin else ""
-        ET.SubElement(ev, "end_date").text    = rec.date_end.strftime("%Y-%m-%d")   if rec.date_end   else ""
-        ET.SubElement(ev, "start_time").text  = rec.date_begin.strftime("%H:%M")    if rec.date_begin else ""
-        ET.SubElement(ev, "end_time").text    = rec.date_end.strftime("%H:%M")      if rec.date_end   else ""
-        ET.SubElement(ev, "organizer_name").text = rec.user_id.name if rec.user_id else ""
-        ET.SubElement(ev, "organizer_uid").text = rec.user_id.ref or ""
-
-        fee = min(rec.event_ticket_ids.mapped("price") or [0]) if rec.event_ticket_ids else 0.0
-        ET.SubElement(ev, "entrance_fee").text = f"{fee:.2f}"
-
-        ET.SubElement(ev, "description")
-        pretty = self._pretty(ET.tostring(root, encoding="utf-8"))
-        cdata  = f"<![CDATA[{(rec.description or '')}]]>"
-        return re.sub(r"<description>\s*</description>",
-                      f"<description>{cdata}</description>",
-                      pretty, count=1)
+    def _build_event_xml(self, operation, rec, fee=None) -> bytes:
+        return attendify.encode(attendify.Message(operation, "odoo", self._event_record(rec, fee)))
+
+    def _event_record(self, rec, fee=None) -> attendify.Event:
+        if fee is None:
+            fee = min(rec.event_ticket_ids.mapped("price") or [0]) if rec.event_ticket_ids else 0.0
+        return attendify.Event(
+            uid            = self._event_uid(rec),
+            gcid           = rec.gcid or "",
+            title          = rec.name or "",
+            location       = rec.address_id.display_name or "",
+            start_date     = rec.date_begin.strftime("%Y-%m-%d") if rec.date_begin else "",
+            end_date       = rec.date_end.strftime("%Y-%m-%d")   if rec.date_end   else "",
+            start_time     = rec.date_begin.strftime("%H:%M")    if rec.date_begin else "",
+            end_time       = rec.date_end.strftime("%H:%M")      if rec.date_end   else "",
+            organizer_name = rec.user_id.name if rec.user_id else "",
+            organizer_uid  = rec.user_id.ref or "",
+            entrance_fee   = f"{fee:.2f}",
+            description    = rec.description or "",
+        )
+
+    def _build_event_delta(self, rec, written, fee=None) -> bytes | None:
+        """
+        "patch" message with the uid and only the message fields fed by
+        the `written` event fields; None when none of them is synced.
+        """
+        names = {name for field in written for name in _DELTA_FIELDS.get(field, ())}
+        if not names:
+            return None
+        full = self._event_record(rec, fee)
+        delta = attendify.Event(uid=full.uid, **{name: getattr(full, name) for name in names})
+        return attendify.encode(attendify.Message("patch", "odoo", delta))
 
     # --------------------------------------------------------------
     # Rabbit publish helper
@@ -78,28 +137,52 @@ class EventSync(models.Model):
             "delete": "event.delete",
         }[operation]
 
-        _rabbit_publish(self, routing, lambda rec: self._build_event_xml(operation, rec))
+        fees = self._prefetch_event_xml() if self else {}
+        _rabbit_publish(
+            self, routing,
+            lambda rec: self._build_event_xml(operation, rec, fees.get(rec.id, 0.0)),
+        )
+
+    def _send_event_deltas(self, written):
+        """Field-level updates (ATTENDIFY_EVENT_DELTAS); unsynced writes send nothing."""
+        fees = self._prefetch_event_xml()
+        messages = []
+        for rec in self:
+            body = self._build_event_delta(rec, written.get(rec.id, ()), fees.get(rec.id, 0.0))
+            if body is not None:
+                messages.append(("event", "event.update", body))
+        if messages:
+            self.env["attendify.outbox"].enqueue_many(messages, queue="pos.event")
+        _logger.info("Queued %d event patch(es) for %s", len(messages), self.ids)
+
+    def _attendify_send(self, operation, written=None):
+        """Called by the outbox coalescer, once per operation and transaction."""
+        if operation == "update" and written and _event_deltas():
+            self._send_event_deltas(written)
+        else:
+            self._send_event_to_rabbitmq(operation)
 
     # --------------------------------------------------------------
-    # ORM hooks
+    # ORM hooks (create / update are coalesced until the flush)
     # --------------------------------------------------------------
     @api.model_create_multi
     def create(self, vals_list):
         recs = super().create(vals_list)
-        recs._send_event_to_rabbitmq("create")
+        if not self.env.context.get("skip_rabbit"):
+            self.env["attendify.outbox"].defer_changes(recs, "create")
         return recs
 
     def write(self, vals):
         if self.env.context.get("skip_rabbit"):
             return super().write(vals)
         res = super().write(vals)
-        self._send_event_to_rabbitmq("update")
+        self.env["attendify.outbox"].defer_changes(self, "update", vals)
         return res
 
     def unlink(self):
         if self.env.context.get("skip_rabbit"):
             return super().unlink()
-        self._send_event_to_rabbitmq("delete")
+        self.env["attendify.outbox"].cancel_changes(self)._send_event_to_rabbitmq("delete")
         return super().unlink()
 
 
@@ -109,20 +192,11 @@ class EventSync(models.Model):
 class AttendeeSync(models.Model):
     _inherit = "event.registration"
 
-    def _build_attendee_xml(self, operation, rec) -> str:
-        root = ET.Element("attendify")
-        root.set("xmlns:xsi", "http://www.w3.org/2001/XMLSchema-instance")
-        root.set("xsi:noNamespaceSchemaLocation", "event_attendee.xsd")
-
-        info = ET.SubElement(root, "info")
-        ET.SubElement(info, "sender").text    = "odoo"
-        ET.SubElement(info, "operation").text = operation
-
-        ea = ET.SubElement(root, "event_attendee")
-        ET.SubElement(ea, "uid").text      = rec.partner_id.ref or ""
-        ET.SubElement(ea, "event_id").text = rec.event_id.external_uid or f"evt_{rec.event_id.id}"
-
-        return minidom.parseString(ET.tostring(root, encoding="utf-8")).toprettyxml(indent="  ")
+    def _build_attendee_xml(self, operation, rec) -> bytes:
+        return attendify.encode(attendify.Message(operation, "odoo", attendify.EventAttendee(
+            uid      = rec.partner_id.ref or "",
+            event_id = rec.event_id.external_uid or f"evt_{rec.event_id.id}",
+        )))
 
     def _send_attendee_to_rabbitmq(self, operation):
         if self.env.context.get("skip_rabbit"):
@@ -145,38 +219,11 @@ class AttendeeSync(models.Model):
 # Shared Rabbit helper
 # ────────────────────────────────────────────────────────────────────────
 def _rabbit_publish(records, routing_key, xml_builder):
-    host, user, pw = (
-        os.getenv("RABBITMQ_HOST"),
-        os.getenv("RABBITMQ_USERNAME"),
-        os.getenv("RABBITMQ_PASSWORD"),
-    )
-    if not all([host, user, pw]):
-        _logger.error("RabbitMQ env vars missing; skipping push.")
+    """Queue one message per record in the outbox; sent after the commit."""
+    if not records:
         return
-
-    params = pika.ConnectionParameters(
-        host=host,
-        port=int(os.getenv("RABBITMQ_PORT", 5672)),
-        virtual_host=os.getenv("RABBITMQ_VHOST", "/"),
-        credentials=pika.PlainCredentials(user, pw),
+    records.env["attendify.outbox"].enqueue_many(
+        [("event", routing_key, xml_builder(rec)) for rec in records],
+        queue="pos.event",
     )
-    try:
-        conn = pika.BlockingConnection(params)
-        ch   = conn.channel()
-        exchange, queue = "event", "pos.event"
-        ch.exchange_declare(exchange=exchange, exchange_type="direct", durable=True)
-        ch.queue_declare(queue=queue, durable=True)
-        ch.queue_bind(queue=queue, exchange=exchange, routing_key=routing_key)
-
-        for rec in records:
-            xml_msg = xml_builder(rec)
-            ch.basic_publish(
-                exchange=exchange,
-                routing_key=routing_key,
-                body=xml_msg.encode("utf-8"),
-                properties=pika.BasicProperties(delivery_mode=2),
-            )
-            _logger.info("Sent %s for record %s", routing_key, rec.id)
-        conn.close()
-    except Exception:
-        _logger.exception("Failed to send to RabbitMQ")
+    _logger.info("Queued %s for record(s) %s", routing_key, records.ids)
@@ -1,13 +1,13 @@
 import logging
-import os
-import pika
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
+import time
 
 from odoo import api, fields, models
+from odoo.addons.customer_rabbit_connector.tools import attendify
 
 _logger = logging.getLogger(__name__)
 
+_PAID = "event_sync.pos_order.paid"
+
 class PosOrder(models.Model):
     _inherit = "pos.order"
 
@@ -37,20 +37,49 @@ class PosOrder(models.Model):
     def send_event_xml(self):
         """
         Called from JS or automatically on paid orders.
-        Builds & pretty-prints the XML, then publishes to RabbitMQ.
+        Builds the XML, then publishes it to RabbitMQ.
         """
         self.ensure_one()
-        raw_xml    = self._build_raw_xml(self)
-        pretty_xml = self._pretty_xml(raw_xml)
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug("POS order %s XML:\n%s", self.name,
+                          self._pretty_xml(self._build_raw_xml(self)))
+        self._send_sales_to_rabbitmq()
+        return True
 
-        # 1) publish to RabbitMQ
-        self._send_to_rabbitmq(pretty_xml)
-        # 2) log success
+    def _send_sales_to_rabbitmq(self):
+        """
+        Queue one `sale.performed` message per order of the recordset.
+        Lines, products, payment methods, partners and events are loaded
+        for all orders at once, and the messages go into the outbox in one
+        INSERT (published together by the drain).  Orders whose message
+        cannot be built are logged and skipped.
+        """
+        if not self:
+            return 0
+        started = time.perf_counter()
+        self.lines.product_id.mapped("name")
+        self.payment_ids.payment_method_id.mapped("type")
+        self.partner_id.mapped("ref")
+        self.mapped("event_uid")
+
+        bodies = []
+        for order in self:
+            try:
+                bodies.append(("sale", "sale.performed", self._build_raw_xml(order)))
+            except Exception as e:
+                _logger.exception(
+                    "Failed to process POS order %s for RabbitMQ: %s", order.name, e
+                )
+        if bodies:
+            self.env["attendify.outbox"].enqueue_many(bodies, content_type="application/xml")
+        elapsed = time.perf_counter() - started
         _logger.info(
-            "POS → RabbitMQ sent for order %s (exchange=%s, routing_key=%s)",
-            self.name, "sale", "sale.performed"
+            "POS → RabbitMQ queued %d/%d order(s) (exchange=%s, routing_key=%s) "
+            "in %.3fs, %.0f orders/s",
+            len(bodies), len(self), "sale", "sale.performed",
+            elapsed, len(self) / elapsed if elapsed else 0.0,
         )
-        return True
+        return len(bodies)
 
     # ---------------------------------------------------------------------
     #  XML helpers
@@ -64,89 +93,60 @@ class PosOrder(models.Model):
         return True
 
     def _build_raw_xml(self, order):
-        root = ET.Element("attendify")
-        root.set("xmlns:xsi", "http://www.w3.org/2001/XMLSchema-instance")
-        root.set("xsi:noNamespaceSchemaLocation", "tab_item.xsd")
-
-        info = ET.SubElement(root, "info")
-        ET.SubElement(info, "sender").text    = "pos"
-        ET.SubElement(info, "operation").text = "create"
-
-        tab = ET.SubElement(root, "tab")
-        ET.SubElement(tab, "uid").text       = order.partner_id.ref or ""
-        ET.SubElement(tab, "event_id").text  = order.event_uid or ""
-        ET.SubElement(tab, "timestamp").text = order.date_order.isoformat()
-        ET.SubElement(tab, "is_paid").text = "true" if order._is_settled() else "false"
-        items = ET.SubElement(tab, "items")
-        for line in order.lines:
-            item = ET.SubElement(items, "tab_item")
-            ET.SubElement(item, "item_name").text = line.product_id.name
-            ET.SubElement(item, "quantity").text  = str(line.qty)
-            ET.SubElement(item, "price").text     = str(line.price_unit)
-
-        return ET.tostring(root, encoding="utf-8")
-
-    def _pretty_xml(self, xml_bytes: bytes) -> str:
-        return minidom.parseString(xml_bytes).toprettyxml(indent="  ")
+        return attendify.encode(attendify.Message("create", "pos", attendify.Tab(
+            uid       = order.partner_id.ref or "",
+            event_id  = order.event_uid or "",
+            timestamp = order.date_order.isoformat(),
+            is_paid   = "true" if order._is_settled() else "false",
+            items     = [
+                attendify.TabItem(
+                    item_name = line.product_id.name,
+                    quantity  = str(line.qty),
+                    price     = str(line.price_unit),
+                )
+                for line in order.lines
+            ],
+        )))
+
+    @staticmethod
+    def _pretty_xml(xml_bytes: bytes) -> str:
+        return attendify.pretty(xml_bytes)
 
     # ---------------------------------------------------------------------
-    #  Real RabbitMQ publisher
+    #  RabbitMQ publisher (via the transactional outbox)
     # ---------------------------------------------------------------------
-    def _send_to_rabbitmq(self, xml_string: str):
-        try:
-            host        = os.getenv("RABBITMQ_HOST")
-            port        = int(os.getenv("RABBITMQ_PORT", 5672))
-            user        = os.getenv("RABBITMQ_USERNAME")
-            password    = os.getenv("RABBITMQ_PASSWORD")
-            vhost       = os.getenv("RABBITMQ_VHOST", "/")
-
-            # Target exchange & routing key
-            exchange    = "sale"
-            routing_key = "sale.performed"
-
-            if not all([host, user, password]):
-                _logger.error("RabbitMQ environment variables missing!")
-                return
-
-            creds      = pika.PlainCredentials(user, password)
-            conn       = pika.BlockingConnection(
-                pika.ConnectionParameters(
-                    host=host,
-                    port=port,
-                    virtual_host=vhost,
-                    credentials=creds,
-                )
-            )
-            channel = conn.channel()
-            channel.exchange_declare(
-                exchange=exchange,
-                exchange_type="direct",
-                durable=True
-            )
-            channel.basic_publish(
-                exchange=exchange,
-                routing_key=routing_key,
-                body=xml_string.encode("utf-8"),
-                properties=pika.BasicProperties(
-                    content_type="application/xml",
-                    delivery_mode=2,
-                ),
-            )
-            conn.close()
-        except Exception as e:
-            _logger.exception("Failed to send XML to RabbitMQ: %s", e)
+    def _send_to_rabbitmq(self, xml_string: str | bytes):
+        self.env["attendify.outbox"].enqueue(
+            "sale", "sale.performed", xml_string, content_type="application/xml"
+        )
 
     # ---------------------------------------------------------------------
     #  Automatic push for paid orders
     # ---------------------------------------------------------------------
     def action_pos_order_paid(self):
         res = super().action_pos_order_paid()
-        for order in self:
-            try:
-                order.send_event_xml()
-            except Exception as e:
-                _logger.exception(
-                    "Failed to process POS order %s for RabbitMQ: %s",
-                    order.name, e
-                )
-        return res
\ No newline at end of file
+        self._defer_sales()
+        return res
+
+    def _defer_sales(self):
+        """
+        Remember the paid orders until the end of the transaction.
+        `create_from_ui` pays its orders one by one, so the messages of
+        one POS sync are queued together by a single precommit callback.
+        """
+        precommit = self.env.cr.precommit
+        paid = precommit.data.get(_PAID)
+        if paid is None:
+            paid = precommit.data[_PAID] = []
+            precommit.add(self._flush_sales)
+        paid.extend(self.ids)
+
+    def _flush_sales(self):
+        ids = self.env.cr.precommit.data.pop(_PAID, [])
+        orders = self.browse(list(dict.fromkeys(ids))).exists()
+        try:
+            orders._send_sales_to_rabbitmq()
+        except Exception as e:
+            _logger.exception("Failed to queue POS orders %s for RabbitMQ: %s", orders.ids, e)
+        # precommit runs after the ORM flush: write out the outbox rows
+        self.env.flush_all()
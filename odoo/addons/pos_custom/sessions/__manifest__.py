@@ -4,6 +4,7 @@
     'license': 'LGPL-3',
     'author': 'Attendify',
     'category': 'Payment',
+    'depends': ['event', 'customer_rabbit_connector'],
     'summary': 'Sync payments to RabbitMQ on create/update/delete',
     'description': 'This module sends model updates to RabbitMQ in XML format.',
     'data': [],
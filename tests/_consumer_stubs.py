@@ -0,0 +1,57 @@
+"""
+Import a consumer script (consumers/consumer.py, consumer_event.py) without
+a broker, an Odoo server or a .env file.
+
+The scripts authenticate and load reference data at import time, so the
+modules that talk to Odoo are replaced by MagicMocks while the script is
+executed; `module.models` is then the mock every handler calls.
+"""
+import os
+import sys
+import importlib.util
+from types import ModuleType
+from unittest.mock import MagicMock, patch
+
+TEST_DIR      = os.path.dirname(__file__)
+CONSUMERS_DIR = os.path.abspath(os.path.join(TEST_DIR, os.pardir, "consumers"))
+ATTENDIFY_PATH = os.path.abspath(os.path.join(
+    TEST_DIR, os.pardir, "odoo", "addons", "pos_custom",
+    "customer_rabbit_connector", "tools", "attendify.py",
+))
+
+CONFIG = {
+    "ODOO_HOST": "odoo", "DATABASE": "db", "EMAIL": "admin", "API_KEY": "key",
+    "RABBITMQ_HOST": "rabbit", "RABBITMQ_PORT": "5672", "RABBITMQ_USERNAME": "u",
+    "RABBITMQ_PASSWORD": "p", "RABBITMQ_VHOST": "/", "DEDUP_DB": ":memory:",
+}
+
+
+def _module(name, **attrs):
+    mod = ModuleType(name)
+    mod.__dict__.update(attrs)
+    return mod
+
+
+def _load(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod  = sys.modules[name] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def load_consumer(name: str, **config):
+    """Execute consumers/<name>.py with stubbed Odoo access; returns the module."""
+    stubs = {
+        "dotenv":   _module("dotenv", dotenv_values=lambda *a, **k: dict(CONFIG, **config)),
+        "odoo_rpc": _module("odoo_rpc", DEFAULT_POOL_SIZE=4, server_proxy=MagicMock()),
+        "refdata":  _module("refdata", DEFAULT_TTL=300.0, ReferenceCache=MagicMock()),
+        "schema":   _module("schema", DEFAULT_CHECK_INTERVAL=60.0, SchemaCache=MagicMock()),
+        "identity": _module("identity", DEFAULT_CAPACITY=100, IdentityMap=MagicMock()),
+    }
+    sys.path.insert(0, CONSUMERS_DIR)
+    try:
+        with patch.dict(sys.modules, stubs), patch("socket.create_connection"):
+            _load("attendify", ATTENDIFY_PATH)
+            return _load(name, os.path.join(CONSUMERS_DIR, f"{name}.py"))
+    finally:
+        sys.path.remove(CONSUMERS_DIR)
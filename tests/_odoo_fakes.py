@@ -0,0 +1,116 @@
+"""
+Just enough of Odoo's transaction machinery for the addon tests:
+`cr.precommit` / `cr.postcommit` and an env whose cached writes only
+reach the "database" on `flush_all`; plus the outbox model imported
+with the Odoo framework stubbed.
+"""
+import os
+import sys
+import importlib.util
+from types import ModuleType, SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+ADDONS_DIR = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.pardir, "odoo", "addons", "pos_custom",
+))
+
+
+class Callbacks(list):
+    """odoo.tools.Callbacks: `run` also runs callbacks added while running."""
+
+    def __init__(self):
+        super().__init__()
+        self.data = {}
+
+    def add(self, fn):
+        self.append(fn)
+        return fn
+
+    def run(self):
+        while self:
+            self.pop(0)()
+        self.data.clear()
+
+
+def cursor(dbname="odoo"):
+    return SimpleNamespace(dbname=dbname, precommit=Callbacks(), postcommit=Callbacks())
+
+
+class Env(dict):
+    """Model registry plus an ORM cache (record id → vals) flushed to `db`."""
+
+    def __init__(self, models=(), cr=None):
+        super().__init__(models)
+        self.cr = cr if cr is not None else cursor()
+        self.context = {}
+        self.cache = {}
+        self.db = {}
+        self.flushes = 0
+
+    def flush_all(self):
+        for record_id, vals in self.cache.items():
+            self.db.setdefault(record_id, {}).update(vals)
+        self.cache.clear()
+        self.flushes += 1
+
+
+def import_outbox():
+    """customer_rabbit_connector/models/attendify_outbox.py, Odoo stubbed."""
+    fake_fields = SimpleNamespace(Char=lambda **kw: None, Text=lambda **kw: None)
+    fake_api = SimpleNamespace(model=lambda fn: fn)
+    fake_models = SimpleNamespace(Model=object)
+    tools = ModuleType("odoo.addons.customer_rabbit_connector.tools")
+    tools.rabbit = SimpleNamespace(load_config=MagicMock(), confirming_publisher=MagicMock())
+    tools.background = SimpleNamespace(BatchSender=MagicMock())
+    stubs = {
+        "odoo": SimpleNamespace(models=fake_models, fields=fake_fields, api=fake_api,
+                                registry=MagicMock()),
+        "odoo.addons.customer_rabbit_connector.tools": tools,
+        "pika": SimpleNamespace(BasicProperties=lambda **kw: SimpleNamespace(**kw)),
+    }
+    path = os.path.join(ADDONS_DIR, "customer_rabbit_connector", "models", "attendify_outbox.py")
+    with patch.dict(sys.modules, stubs):
+        spec = importlib.util.spec_from_file_location("attendify_outbox", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+def _attendify():
+    path = os.path.join(ADDONS_DIR, "customer_rabbit_connector", "tools", "attendify.py")
+    spec = importlib.util.spec_from_file_location(
+        "odoo.addons.customer_rabbit_connector.tools.attendify", path
+    )
+    module = sys.modules[spec.name] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def import_addon(relpath, config=None):
+    """
+    An addon module (e.g. "event_sync/models/event_sync.py") with the Odoo
+    framework stubbed, the real Attendify message model, and a `rabbit`
+    whose load_config() returns `config`.
+    """
+    exceptions = ModuleType("odoo.exceptions")
+    exceptions.UserError = type("UserError", (Exception,), {})
+    odoo = SimpleNamespace(
+        api=SimpleNamespace(model=lambda fn: fn, model_create_multi=lambda fn: fn),
+        fields=SimpleNamespace(Char=lambda *a, **kw: None),
+        models=SimpleNamespace(Model=object, AbstractModel=object),
+        exceptions=exceptions,
+    )
+    tools = ModuleType("odoo.addons.customer_rabbit_connector.tools")
+    stubs = {
+        "odoo": odoo,
+        "odoo.exceptions": exceptions,
+        "odoo.addons.customer_rabbit_connector.tools": tools,
+    }
+    with patch.dict(sys.modules, stubs):
+        tools.attendify = _attendify()
+        tools.rabbit = SimpleNamespace(load_config=lambda: dict(config or {}))
+        name = os.path.splitext(os.path.basename(relpath))[0]
+        spec = importlib.util.spec_from_file_location(name, os.path.join(ADDONS_DIR, relpath))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
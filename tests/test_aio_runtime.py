@@ -0,0 +1,74 @@
+import asyncio
+import os
+import sys
+import unittest
+import importlib.util
+from types import SimpleNamespace
+
+TEST_DIR = os.path.dirname(__file__)
+CONSUMERS_DIR = os.path.abspath(os.path.join(TEST_DIR, os.pardir, "consumers"))
+MODULE_PATH = os.path.join(CONSUMERS_DIR, "aio_runtime.py")
+
+sys.path.insert(0, CONSUMERS_DIR)          # `import dedup` / `import odoo_rpc`
+try:
+    spec = importlib.util.spec_from_file_location("aio_runtime", MODULE_PATH)
+    aio_runtime = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(aio_runtime)
+finally:
+    sys.path.remove(CONSUMERS_DIR)
+
+
+class FakeChannel:
+    is_open = True
+
+    def __init__(self):
+        self.acked = []
+        self.nacked = []
+
+    def basic_ack(self, delivery_tag):
+        self.acked.append(delivery_tag)
+
+    def basic_nack(self, delivery_tag, requeue):
+        self.nacked.append(delivery_tag)
+
+
+class TestAsyncConsumerDedup(unittest.TestCase):
+
+    def setUp(self):
+        self.dispatched = []
+        self.store = aio_runtime.dedup.DedupStore(":memory:")
+        module = SimpleNamespace(DEDUP=self.store)
+        self.target = aio_runtime.Target(
+            module, "ex", "q", [],
+            parse=lambda body: ("UID-1", (body,)),        # ordering key != dedup key
+            dispatch=self.dispatched.append,
+        )
+        self.consumer = aio_runtime.AsyncConsumer(self.target, params=None, max_inflight=2)
+        self.consumer._ch = FakeChannel()
+
+    def tearDown(self):
+        self.consumer._pool.shutdown(wait=True)
+        self.store.close()
+
+    def _deliver(self, tag, message_id, body):
+        async def run():
+            self.consumer._on_message(
+                self.consumer._ch, SimpleNamespace(delivery_tag=tag),
+                SimpleNamespace(message_id=message_id), body,
+            )
+            await asyncio.gather(*self.consumer._tasks)
+        asyncio.run(run())
+
+    def test_same_message_twice_is_processed_once(self):
+        self._deliver(1, "m-1", b"<x/>")
+        self._deliver(2, "m-1", b"<x/>")
+
+        self.assertEqual(self.dispatched, [b"<x/>"])
+        self.assertEqual(self.consumer._ch.acked, [1, 2])
+        self.assertTrue(self.store.seen("id:m-1"))
+        self.assertFalse(self.store.seen("UID-1"))
+        self.assertEqual(self.consumer._keys, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+import os
+import sys
+import unittest
+import importlib.util
+from xml.parsers import expat
+
+TEST_DIR = os.path.dirname(__file__)
+MODULE_PATH = os.path.abspath(
+    os.path.join(
+        TEST_DIR, os.pardir, "odoo", "addons", "pos_custom",
+        "customer_rabbit_connector", "tools", "attendify.py",
+    )
+)
+
+spec = importlib.util.spec_from_file_location("attendify", MODULE_PATH)
+attendify = importlib.util.module_from_spec(spec)
+sys.modules["attendify"] = attendify
+spec.loader.exec_module(attendify)
+
+USER_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<attendify>
+  <info><sender>frontend</sender><operation> Update </operation></info>
+  <user>
+    <uid> GC123 </uid>
+    <first_name>Jos\xc3\xa9</first_name>
+    <email>jose@example.com</email>
+    <phone_number/>
+    <address><street>Main 1</street><city>Brussels</city></address>
+  </user>
+</attendify>"""
+
+EVENT_XML = b"""<attendify>
+  <info><operation>create</operation></info>
+  <event>
+    <uid>GC9</uid>
+    <title><![CDATA[Drinks & <food>]]></title>
+    <entrance_fee>12.50</entrance_fee>
+  </event>
+</attendify>"""
+
+
+class TestAttendifyParser(unittest.TestCase):
+
+    def test_user_record(self):
+        msg = attendify.parse(USER_XML)
+        self.assertEqual(msg.operation, "update")
+        self.assertEqual(msg.sender, "frontend")
+        self.assertEqual(msg.kind, "user")
+        user = msg.payload
+        self.assertIsInstance(user, attendify.User)
+        self.assertEqual(user.uid, "GC123")
+        self.assertEqual(user.first_name, "José")
+        self.assertEqual(user.phone_number, "")
+        self.assertIsNone(user.last_name)
+
+    def test_dict_style_access(self):
+        user = attendify.parse(USER_XML).payload
+        self.assertEqual(user.get("email"), "jose@example.com")
+        self.assertEqual(user.get("last_name", "n/a"), "n/a")
+        self.assertEqual(user["uid"], "GC123")
+        with self.assertRaises(KeyError):
+            user["last_name"]
+
+    def test_nested_elements_go_to_extra(self):
+        user = attendify.parse(USER_XML).payload
+        self.assertEqual(user.extra, {"address/street": "Main 1", "address/city": "Brussels"})
+        self.assertEqual(user.get("address/city"), "Brussels")
+
+    def test_event_with_cdata(self):
+        msg = attendify.parse(EVENT_XML)
+        self.assertEqual(msg.kind, "event")
+        self.assertIsInstance(msg.payload, attendify.Event)
+        self.assertEqual(msg.payload.title, "Drinks & <food>")
+        self.assertEqual(msg.payload.entrance_fee, "12.50")
+
+    def test_event_attendee_from_str(self):
+        msg = attendify.parse(
+            "<attendify><info><operation>register</operation></info>"
+            "<event_attendee><uid>U1</uid><event_id>GC9</event_id></event_attendee></attendify>"
+        )
+        self.assertEqual(msg.payload, attendify.EventAttendee(uid="U1", event_id="GC9"))
+
+    def test_unknown_payload_has_no_record(self):
+        msg = attendify.parse(b"<attendify><info><operation>x</operation></info><sale/></attendify>")
+        self.assertEqual(msg.kind, "sale")
+        self.assertIsNone(msg.payload)
+
+    def test_rejects_other_roots_and_bad_xml(self):
+        with self.assertRaises(ValueError):
+            attendify.parse(b"<other><user/></other>")
+        with self.assertRaises(expat.ExpatError):
+            attendify.parse(b"<attendify><user>")
+
+
+class TestAttendifyEncoder(unittest.TestCase):
+
+    def test_user_roundtrip_escapes_text(self):
+        user = attendify.User(uid="OD1", first_name="Ann & Bob", last_name="<x>",
+                              email="a@b.c", title="", is_admin="false")
+        body = attendify.encode(attendify.Message("create", "odoo", user))
+        self.assertIsInstance(body, bytes)
+        self.assertIn(b"<first_name>Ann &amp; Bob</first_name>", body)
+        self.assertIn(b"<title/>", body)
+        self.assertNotIn(b"<country", body)          # None fields are omitted
+
+        msg = attendify.parse(body)
+        self.assertEqual((msg.operation, msg.sender, msg.kind), ("create", "odoo", "user"))
+        self.assertEqual(msg.payload, user)
+
+    def test_event_description_is_cdata(self):
+        ev = attendify.Event(uid="GC1", title="Party", entrance_fee="12.50",
+                             description="a ]]> b & <c>")
+        body = attendify.encode(attendify.Message("update", "odoo", ev))
+        self.assertIn(b'xsi:noNamespaceSchemaLocation="event.xsd"', body)
+        self.assertIn(b"<![CDATA[", body)
+        self.assertEqual(attendify.parse(body).payload, ev)
+
+    def test_tab_items_roundtrip(self):
+        tab = attendify.Tab(
+            uid="OD1", event_id="GC1", timestamp="2025-05-01T10:00:00", is_paid=True,
+            items=[attendify.TabItem("Cola", "2", "2.5"), attendify.TabItem("Beer", "1", "3.0")],
+        )
+        body = attendify.encode(attendify.Message("create", "pos", tab))
+        self.assertIn(b"<is_paid>true</is_paid>", body)
+        self.assertIn(b"<items><tab_item><item_name>Cola</item_name>", body)
+
+        got = attendify.parse(body).payload
+        self.assertEqual(got.is_paid, "true")
+        self.assertEqual(got.items, tab.items)
+
+    def test_session_speaker_roundtrip(self):
+        sess = attendify.Session(uid="SE1", title="Talk", max_attendees="0",
+                                 speaker=attendify.Speaker(name="Ada", bio=""))
+        msg = attendify.parse(attendify.encode(attendify.Message("create", "odoo", sess)))
+        self.assertEqual(msg.kind, "session")
+        self.assertEqual(msg.payload, sess)
+
+    def test_to_dict_skips_unset_and_extra(self):
+        sess = attendify.Session(uid="SE1", title="", extra={"x": "1"},
+                                 speaker=attendify.Speaker(name="Ada"))
+        self.assertEqual(sess.to_dict(), {"uid": "SE1", "title": "", "speaker": {"name": "Ada"}})
+        tab = attendify.Tab(uid="OD1", items=[attendify.TabItem("Cola", "1", "2.5")])
+        self.assertEqual(
+            tab.to_dict(),
+            {"uid": "OD1", "items": [{"item_name": "Cola", "quantity": "1", "price": "2.5"}]},
+        )
+
+
+    def test_indented_encoding_matches_pretty(self):
+        tab = attendify.Tab(uid="OD1", items=[attendify.TabItem("Cola & co", "1", "2.5")])
+        msg = attendify.Message("create", "pos", tab)
+        compact  = attendify.encode(msg)
+        indented = attendify.encode(msg, indent="  ")
+        self.assertNotIn(b"\n", compact)
+        self.assertIn(b"\n      <tab_item>\n        <item_name>Cola &amp; co</item_name>", indented)
+        self.assertEqual(attendify.pretty(compact), indented.decode("utf-8"))
+        self.assertEqual(attendify.parse(indented).payload, tab)
+
+    def test_pretty_keeps_cdata_and_empty_elements(self):
+        ev = attendify.Event(uid="GC1", title="", description="a ]]> b <c>")
+        text = attendify.pretty(attendify.encode(attendify.Message("update", "odoo", ev)))
+        self.assertIn("\n    <title/>", text)
+        self.assertIn("<description><![CDATA[a ]]", text)
+        self.assertEqual(attendify.parse(text).payload, ev)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,217 @@
+import unittest
+from unittest.mock import MagicMock
+
+from tests._odoo_fakes import import_addon
+
+ingest = import_addon("event_sync/models/attendify_ingest.py")
+
+
+class _Records:
+    """A recordset of one `_Model`."""
+
+    def __init__(self, model, ids):
+        self.model = model
+        self.ids = list(ids)
+
+    def __bool__(self):
+        return bool(self.ids)
+
+    @property
+    def id(self):
+        return self.ids[0] if self.ids else False
+
+    def write(self, vals):
+        for rid in self.ids:
+            self.model.rows[rid].update(vals)
+        self.model.writes.append((self.ids, vals))
+        return True
+
+    def unlink(self):
+        for rid in self.ids:
+            del self.model.rows[rid]
+        return True
+
+
+class _Model(_Records):
+    """`env[model]`: an empty recordset with rows, search and create."""
+
+    def __init__(self, rows=(), fields=()):
+        super().__init__(self, ())
+        self.rows = {row["id"]: dict(row) for row in rows}
+        self._fields = dict.fromkeys(fields)
+        self.writes = []
+
+    def search(self, domain, limit=None, order=None):
+        ids = [rid for rid, row in sorted(self.rows.items())
+               if all(row.get(name) == value for name, _, value in domain)]
+        return _Records(self, ids[:limit] if limit else ids)
+
+    def create(self, vals):
+        rid = max(self.rows, default=0) + 1
+        self.rows[rid] = dict(vals, id=rid)
+        return _Records(self, [rid])
+
+
+def _ingest(**models):
+    env = {
+        "event.event":        _Model(fields=("gcid", "entrance_fee")),
+        "event.event.ticket": _Model(),
+        "event.registration": _Model(),
+        "res.partner":        _Model(),
+        "product.template":   _Model(),
+        **models,
+    }
+    model = ingest.AttendifyIngest()
+    model.env = env
+    return model, env
+
+
+class TestEventPatch(unittest.TestCase):
+
+    def setUp(self):
+        self.model, self.env = _ingest(
+            **{"event.event": _Model([{"id": 1, "external_uid": "GC1", "name": "Old",
+                                       "organizer_id": 5, "address_id": 6}],
+                                     fields=("gcid", "entrance_fee")),
+               "res.partner": _Model([{"id": 5, "ref": "OD5"},
+                                      {"id": 6, "name": "Main hall"}]),
+               "product.template": _Model([{"id": 3, "default_code": "GC1",
+                                            "name": "Ticket: Old", "list_price": 10.0}])}
+        )
+
+    def test_patch_vals_only_present_fields(self):
+        self.assertEqual(self.model._event_patch_vals({"uid": "GC1", "title": "New"}),
+                         {"name": "New"})
+
+    def test_patch_vals_empty_values_clear(self):
+        vals = self.model._event_patch_vals({
+            "uid": "GC1", "organizer_uid": "", "location": "", "gcid": "", "description": "",
+        })
+        self.assertEqual(vals, {"organizer_id": False, "address_id": False,
+                                "gcid": False, "description": ""})
+
+    def test_patch_vals_lookups(self):
+        vals = self.model._event_patch_vals({"organizer_uid": "OD5", "location": "Main hall",
+                                             "entrance_fee": "7.50"})
+        self.assertEqual(vals, {"organizer_id": 5, "address_id": 6, "entrance_fee": 7.5})
+
+    def test_patch_updates_the_ticket_product(self):
+        result = self.model._ingest_event({"uid": "GC1", "title": "New", "entrance_fee": "15.00"},
+                                          "patch")
+        self.assertEqual(result, {"status": "patched", "id": 1,
+                                  "fields": ["entrance_fee", "name"]})
+        self.assertEqual(self.env["event.event"].rows[1]["name"], "New")
+        self.assertEqual(self.env["product.template"].writes,
+                         [([3], {"name": "Ticket: New", "list_price": 15.0})])
+
+    def test_patch_without_product_fields_leaves_the_product(self):
+        self.model._ingest_event({"uid": "GC1", "start_date": "2025-05-01",
+                                  "start_time": "20:00"}, "patch")
+        self.assertEqual(self.env["event.event"].rows[1]["date_begin"], "2025-05-01 20:00:00")
+        self.assertEqual(self.env["product.template"].writes, [])
+
+    def test_product_description_joins_description_and_location(self):
+        self.assertEqual(
+            ingest._product_patch_vals({"description": "Live", "location": "Main hall"}),
+            {"description_sale": "Live\nLocation: Main hall"},
+        )
+
+    def test_patch_of_unknown_uid(self):
+        self.assertEqual(self.model._ingest_event({"uid": "GC2", "title": "x"}, "patch"),
+                         {"status": "skipped", "reason": "uid unknown"})
+
+
+class TestIngestEvent(unittest.TestCase):
+
+    def setUp(self):
+        self.model, self.env = _ingest(
+            **{"event.event": _Model([{"id": 1, "external_uid": "GC1", "name": "Old"}],
+                                     fields=("gcid", "entrance_fee"))}
+        )
+        self.model._create_ticket = MagicMock()
+        self.model._upsert_event_product = MagicMock()
+        self.events = self.env["event.event"].rows
+
+    def _ev(self, uid, **fields):
+        return dict({"uid": uid, "title": "Gig", "start_date": "2025-05-01",
+                     "start_time": "20:00", "entrance_fee": "12.50"}, **fields)
+
+    def test_create(self):
+        ev = self._ev("GC2")
+        result = self.model._ingest_event(ev, "create")
+        self.assertEqual(result, {"status": "created", "id": 2})
+        self.assertEqual(self.events[2]["external_uid"], "GC2")
+        self.assertEqual(self.events[2]["date_begin"], "2025-05-01 20:00:00")
+        self.assertEqual(self.events[2]["entrance_fee"], 12.5)
+        created, fee = self.model._create_ticket.call_args.args
+        self.assertEqual((created.id, fee), (2, 12.5))
+        self.model._upsert_event_product.assert_called_once_with(ev, 12.5)
+
+    def test_create_of_existing_uid(self):
+        self.assertEqual(self.model._ingest_event(self._ev("GC1"), "create"),
+                         {"status": "skipped", "reason": "exists", "id": 1})
+        self.assertEqual(len(self.events), 1)
+        self.model._upsert_event_product.assert_not_called()
+
+    def test_update(self):
+        self.assertEqual(self.model._ingest_event(self._ev("GC1", title="New"), "update"),
+                         {"status": "updated", "id": 1})
+        self.assertEqual(self.events[1]["name"], "New")
+        self.model._create_ticket.assert_not_called()
+        self.model._upsert_event_product.assert_called_once()
+
+    def test_update_of_unknown_uid(self):
+        self.assertEqual(self.model._ingest_event(self._ev("GC9"), "update"),
+                         {"status": "skipped", "reason": "uid unknown"})
+        self.model._upsert_event_product.assert_not_called()
+
+    def test_delete(self):
+        self.assertEqual(self.model._ingest_event({"uid": "GC1"}, "delete"),
+                         {"status": "deleted", "id": 1})
+        self.assertEqual(self.events, {})
+
+    def test_delete_of_unknown_uid(self):
+        self.assertEqual(self.model._ingest_event({"uid": "GC9"}, "delete"),
+                         {"status": "skipped", "reason": "uid unknown"})
+        self.assertIn(1, self.events)
+
+
+class TestIngestAttendee(unittest.TestCase):
+
+    def setUp(self):
+        self.model, self.env = _ingest(**{
+            "res.partner":        _Model([{"id": 5, "ref": "OD5"}]),
+            "event.event":        _Model([{"id": 1, "external_uid": "GC1"}]),
+            "event.event.ticket": _Model([{"id": 8, "event_id": 1}, {"id": 9, "event_id": 1}]),
+        })
+        self.registrations = self.env["event.registration"].rows
+
+    def test_register_with_the_first_ticket(self):
+        result = self.model._ingest_attendee({"uid": "OD5", "event_id": "GC1"}, "register")
+        self.assertEqual(result, {"status": "registered", "id": 1})
+        self.assertEqual(self.registrations[1],
+                         {"id": 1, "event_id": 1, "partner_id": 5, "event_ticket_id": 8})
+
+    def test_register_twice(self):
+        self.model._ingest_attendee({"uid": "OD5", "event_id": "GC1"}, "register")
+        self.assertEqual(self.model._ingest_attendee({"uid": "OD5", "event_id": "GC1"}, "register"),
+                         {"status": "skipped", "reason": "already registered", "id": 1})
+        self.assertEqual(len(self.registrations), 1)
+
+    def test_unknown_user_or_event(self):
+        self.assertEqual(self.model._ingest_attendee({"uid": "OD9", "event_id": "GC1"}, "register"),
+                         {"status": "skipped", "reason": "user UID not found"})
+        self.assertEqual(self.model._ingest_attendee({"uid": "OD5", "event_id": "GC9"}, "register"),
+                         {"status": "skipped", "reason": "event UID not found"})
+
+    def test_unregister(self):
+        self.model._ingest_attendee({"uid": "OD5", "event_id": "GC1"}, "register")
+        self.assertEqual(self.model._ingest_attendee({"uid": "OD5", "event_id": "GC1"}, "unregister"),
+                         {"status": "unregistered", "id": 1})
+        self.assertEqual(self.registrations, {})
+        self.assertEqual(self.model._ingest_attendee({"uid": "OD5", "event_id": "GC1"}, "unregister"),
+                         {"status": "skipped", "reason": "registration not found"})
+
+
+if __name__ == "__main__":
+    unittest.main()
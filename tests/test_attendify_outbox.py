@@ -0,0 +1,166 @@
+import unittest
+from concurrent.futures import Future
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from tests._odoo_fakes import Env, cursor, import_outbox
+
+outbox = import_outbox()
+
+
+def _row(row_id, exchange="event", routing_key="event.create", queue="pos.event"):
+    return {
+        "id": row_id, "exchange": exchange, "routing_key": routing_key,
+        "queue": queue, "content_type": None, "message_id": f"m{row_id}",
+        "body": "<attendify/>",
+    }
+
+
+def _future(result=None, exc=None):
+    f = Future()
+    if exc is not None:
+        f.set_exception(exc)
+    elif result is not None:
+        f.set_result(result)
+    return f
+
+
+class TestPublishRows(unittest.TestCase):
+
+    def test_returns_acked_ids(self):
+        pub = MagicMock()
+        pub.publish_async.side_effect = lambda *a, **kw: _future(True)
+        sent = outbox.publish_rows(pub, [_row(1), _row(2), _row(3, "sale", "sale.performed", None)])
+        self.assertEqual(sent, [1, 2, 3])
+        args, kwargs = pub.publish_async.call_args_list[0]
+        self.assertEqual(args, ("event", "event.create", "<attendify/>"))
+        self.assertEqual(kwargs["queue"], "pos.event")
+        self.assertEqual(kwargs["properties"].message_id, "m1")
+        self.assertEqual(kwargs["properties"].delivery_mode, 2)
+
+    def test_nacked_and_unconfirmed_rows_stay(self):
+        pending = _future()
+        pub = MagicMock()
+        pub.publish_async.side_effect = [
+            _future(True), _future(exc=RuntimeError("nack")), pending, _future(True),
+        ]
+        rows = [_row(1), _row(2), _row(3), _row(4)]
+        self.assertEqual(outbox.publish_rows(pub, rows, timeout=0.01), [1, 4])
+        self.assertTrue(pending.cancelled())
+
+
+class TestBackgroundMode(unittest.TestCase):
+
+    def setUp(self):
+        self.cr = cursor()
+        self.model = outbox.AttendifyOutbox()
+        self.model.env = SimpleNamespace(cr=self.cr)
+        created = iter(range(1, 100))
+        self.model.sudo = lambda: SimpleNamespace(
+            create=lambda vals_list: [SimpleNamespace(id=next(created)) for _ in vals_list]
+        )
+        self.model._trigger_drain = MagicMock()
+        patcher = patch.object(outbox, "_publish_mode", return_value="background")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sender = MagicMock()
+        patcher = patch.object(outbox, "sender", return_value=self.sender)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_one_hand_off_per_transaction_after_commit(self):
+        self.model.enqueue("event", "event.create", b"<a/>", queue="pos.event")
+        self.model.enqueue_many([("sale", "sale.performed", "<b/>")])
+        self.assertEqual(len(self.cr.postcommit), 1)
+        self.sender.offer.assert_not_called()          # nothing before the commit
+        self.model._trigger_drain.assert_not_called()
+
+        self.cr.postcommit[0]()
+        dbname, rows = self.sender.offer.call_args.args
+        self.assertEqual(dbname, "odoo")
+        self.assertEqual([(r["id"], r["routing_key"], r["body"]) for r in rows],
+                         [(1, "event.create", "<a/>"), (2, "sale.performed", "<b/>")])
+
+    def test_send_committed_skips_rows_locked_by_the_cron(self):
+        cr = MagicMock()
+        cr.fetchall.return_value = [(2,)]
+        outbox.registry.return_value.cursor.return_value.__enter__.return_value = cr
+        with patch.object(outbox, "publish_rows", return_value=[2]) as publish:
+            outbox.send_committed("odoo", [_row(1), _row(2)])
+        self.assertEqual([r["id"] for r in publish.call_args.args[1]], [2])
+        cr.execute.assert_called_with("DELETE FROM attendify_outbox WHERE id = ANY(%s)", ([2],))
+
+
+class _Records(list):
+    """Just enough of a recordset for the coalescer."""
+
+    _name = "res.partner"
+    sent = []
+
+    @property
+    def ids(self):
+        return list(self)
+
+    def filtered(self, predicate):
+        return _Records(rid for rid in self if predicate(SimpleNamespace(id=rid)))
+
+    def browse(self, ids):
+        return _Records(ids)
+
+    def exists(self):
+        return self
+
+    def _attendify_send(self, operation, written):
+        _Records.sent.append((operation, sorted(self)))
+        _Records.written = written
+        # like res.partner storing ref / hashes: a cached write, not yet in the DB
+        _Records.env.cache.update({rid: {"synced": operation} for rid in self})
+
+
+class TestCoalescing(unittest.TestCase):
+
+    def setUp(self):
+        _Records.sent = []
+        self.model = outbox.AttendifyOutbox()
+        self.model.env = _Records.env = Env({"res.partner": _Records()})
+        self.cr = self.model.env.cr
+
+    def _flush(self):
+        self.cr.precommit.run()
+
+    def test_merge_operation(self):
+        self.assertEqual(outbox.merge_operation(None, "update"), "update")
+        self.assertEqual(outbox.merge_operation("create", "update"), "create")
+        self.assertEqual(outbox.merge_operation("update", "update"), "update")
+
+    def test_one_message_per_record_and_operation(self):
+        self.model.defer_changes(_Records([1, 2]), "create")
+        self.model.defer_changes(_Records([2, 3]), "update")
+        self.model.defer_changes(_Records([3]), "update")
+        self.assertEqual(len(self.cr.precommit), 1)
+        self._flush()
+        self.assertEqual(_Records.sent, [("create", [1, 2]), ("update", [3])])
+
+    def test_writes_of_the_senders_are_flushed(self):
+        self.model.defer_changes(_Records([1, 2]), "create")
+        self.cr.precommit.run()
+        self.assertEqual(self.model.env.db, {1: {"synced": "create"}, 2: {"synced": "create"}})
+        self.assertEqual(self.model.env.cache, {})
+
+    def test_written_fields_accumulate(self):
+        self.model.defer_changes(_Records([1]), "update", {"name": "x"})
+        self.model.defer_changes(_Records([1]), "update", {"description": "y"})
+        self._flush()
+        self.assertEqual(_Records.written, {1: {"name", "description"}})
+
+    def test_delete_cancels_pending_changes(self):
+        self.model.defer_changes(_Records([1]), "create")
+        self.model.defer_changes(_Records([2]), "update")
+        to_delete = self.model.cancel_changes(_Records([1, 2, 4]))
+        self.assertEqual(to_delete, [2, 4])            # 1 was never published
+        self._flush()
+        self.assertEqual(_Records.sent, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
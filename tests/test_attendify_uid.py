@@ -0,0 +1,74 @@
+import os
+import sys
+import unittest
+import importlib.util
+from types import SimpleNamespace
+from unittest.mock import patch
+
+TEST_DIR = os.path.dirname(__file__)
+MODULE_PATH = os.path.abspath(
+    os.path.join(
+        TEST_DIR, os.pardir, "odoo", "addons", "pos_custom",
+        "customer_rabbit_connector", "models", "attendify_uid.py",
+    )
+)
+
+
+def _import_uid():
+    stubs = {"odoo": SimpleNamespace(api=SimpleNamespace(model=lambda fn: fn),
+                                     models=SimpleNamespace(AbstractModel=object))}
+    with patch.dict(sys.modules, stubs):
+        spec = importlib.util.spec_from_file_location("attendify_uid", MODULE_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+uid_module = _import_uid()
+
+
+class FakeSequenceCursor:
+    """nextval() of a sequence with INCREMENT BY BLOCK, shared by 'processes'."""
+
+    def __init__(self, start=1000):
+        self.dbname = "odoo"
+        self.value = start - uid_module.BLOCK
+        self.calls = 0
+
+    def execute(self, query, params=None):
+        self.calls += 1
+        self.value += uid_module.BLOCK
+
+    def fetchone(self):
+        return (self.value,)
+
+
+class TestAllocator(unittest.TestCase):
+
+    def setUp(self):
+        uid_module._BLOCKS.clear()
+        self.cr = FakeSequenceCursor()
+        self.model = uid_module.AttendifyUid()
+        self.model.env = SimpleNamespace(cr=self.cr)
+
+    def test_one_nextval_per_block(self):
+        refs = self.model.allocate("OD", 3)
+        self.assertEqual(refs, ["OD1000", "OD1001", "OD1002"])
+        self.assertEqual(self.model.allocate_one("GC"), "GC1003")
+        self.assertEqual(self.cr.calls, 1)
+
+    def test_large_request_spans_blocks(self):
+        refs = self.model.allocate("SE", uid_module.BLOCK + 5)
+        self.assertEqual(len(set(refs)), uid_module.BLOCK + 5)
+        self.assertEqual(self.cr.calls, 2)
+
+    def test_other_process_reserves_its_own_block(self):
+        first = self.model.allocate_one("OD")
+        with patch.object(uid_module.os, "getpid", return_value=-1):
+            second = self.model.allocate_one("OD")
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.cr.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import unittest
+import importlib.util
+
+TEST_DIR = os.path.dirname(__file__)
+MODULE_PATH = os.path.abspath(
+    os.path.join(
+        TEST_DIR, os.pardir, "odoo", "addons", "pos_custom",
+        "customer_rabbit_connector", "tools", "background.py",
+    )
+)
+
+spec = importlib.util.spec_from_file_location("attendify_background", MODULE_PATH)
+background = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(background)
+
+
+class TestBatchSender(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.sender = background.BatchSender(
+            lambda key, items: self.calls.append((key, items)), maxsize=4, batch_size=3
+        )
+        self.sender._ensure_thread = lambda: None        # drain by hand
+
+    def test_batches_grouped_by_key(self):
+        self.assertTrue(self.sender.offer("db1", [1, 2]))
+        self.assertTrue(self.sender.offer("db2", [3, 4]))
+        self.assertEqual(self.sender.drain_once(), 3)
+        self.assertEqual(self.calls, [("db1", [1, 2]), ("db2", [3])])
+        self.assertEqual(self.sender.drain_once(), 1)
+        self.assertEqual(self.sender.drain_once(block=False), 0)
+
+    def test_full_queue_refuses_whole_offer(self):
+        self.assertTrue(self.sender.offer("db", [1, 2, 3]))
+        self.assertFalse(self.sender.offer("db", [4, 5]))
+        self.assertEqual(self.sender.stats()["refused"], 2)
+        self.assertEqual(self.sender.stats()["queued"], 3)
+
+    def test_handler_error_does_not_stop_the_drain(self):
+        sender = background.BatchSender(lambda key, items: 1 / 0)
+        sender._ensure_thread = lambda: None
+        sender.offer("db", [1])
+        with self.assertLogs(background._logger, "ERROR"):
+            self.assertEqual(sender.drain_once(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
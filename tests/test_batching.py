@@ -0,0 +1,86 @@
+import os
+import unittest
+import importlib.util
+from types import SimpleNamespace
+from unittest.mock import MagicMock, call
+
+TEST_DIR = os.path.dirname(__file__)
+MODULE_PATH = os.path.abspath(
+    os.path.join(TEST_DIR, os.pardir, "consumers", "batching.py")
+)
+
+spec = importlib.util.spec_from_file_location("batching", MODULE_PATH)
+batching = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(batching)
+
+
+def _method(tag):
+    return SimpleNamespace(delivery_tag=tag, routing_key="user.register")
+
+
+class TestMessageBatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = MagicMock()
+        self.conn.call_later.return_value = "timer-1"
+        self.ch = MagicMock()
+        self.handled = []
+
+    def _batcher(self, failed=(), max_size=3):
+        def handle(batch):
+            self.handled.append([d.delivery_tag for d in batch])
+            return failed
+        return batching.MessageBatcher(self.conn, self.ch, handle,
+                                       max_size=max_size, max_wait_ms=50)
+
+    def test_start_raises_prefetch_to_batch_size(self):
+        b = self._batcher(max_size=25)
+        b.start("pos.user")
+        self.ch.basic_qos.assert_called_once_with(prefetch_count=25)
+
+    def test_full_batch_flushes_and_acks_with_multiple(self):
+        b = self._batcher()
+        for tag in (1, 2, 3):
+            b.on_message(self.ch, _method(tag), None, b"<x/>")
+
+        self.assertEqual(self.handled, [[1, 2, 3]])
+        self.ch.basic_ack.assert_called_once_with(delivery_tag=3, multiple=True)
+        self.ch.basic_nack.assert_not_called()
+        self.conn.remove_timeout.assert_called_once_with("timer-1")
+
+    def test_failed_message_is_nacked_individually(self):
+        b = self._batcher(failed=[3])
+        for tag in (1, 2, 3):
+            b.on_message(self.ch, _method(tag), None, b"<x/>")
+
+        self.ch.basic_nack.assert_called_once_with(delivery_tag=3, requeue=False)
+        self.ch.basic_ack.assert_called_once_with(delivery_tag=2, multiple=True)
+
+    def test_timer_flushes_partial_batch(self):
+        b = self._batcher()
+        b.on_message(self.ch, _method(7), None, b"<x/>")
+        self.assertEqual(self.handled, [])
+
+        delay, callback = self.conn.call_later.call_args.args
+        self.assertAlmostEqual(delay, 0.05)
+        callback()
+
+        self.assertEqual(self.handled, [[7]])
+        self.ch.basic_ack.assert_called_once_with(delivery_tag=7, multiple=True)
+
+    def test_handler_crash_nacks_whole_batch(self):
+        def boom(batch):
+            raise RuntimeError("odoo down")
+        b = batching.MessageBatcher(self.conn, self.ch, boom, max_size=2)
+        b.on_message(self.ch, _method(1), None, b"")
+        b.on_message(self.ch, _method(2), None, b"")
+
+        self.assertEqual(
+            self.ch.basic_nack.call_args_list,
+            [call(delivery_tag=1, requeue=False), call(delivery_tag=2, requeue=False)],
+        )
+        self.ch.basic_ack.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import xmlrpc.client
+from types import SimpleNamespace
+
+from tests._consumer_stubs import load_consumer
+
+consumer = load_consumer("consumer")
+
+MISSING = (
+    "Traceback (most recent call last):\n"
+    '  File "/odoo/service/model.py", line 62, in execute_cr\n'
+    "AttributeError: The method 'attendify_upsert_users' does not exist "
+    "on the model 'res.partner'\n"
+)
+DATA_ERROR = (
+    "Traceback (most recent call last):\n"
+    '  File "/addons/customer_rabbit_connector/models/res_partner.py", line 320, '
+    "in attendify_upsert_users\n"
+    "psycopg2.errors.UniqueViolation: duplicate key value violates unique constraint\n"
+)
+
+
+class TestUpsertUsersOnServer(unittest.TestCase):
+
+    def setUp(self):
+        consumer.USER_INGEST = "server"
+        consumer.models.execute_kw.reset_mock(return_value=True, side_effect=True)
+        self.user = SimpleNamespace(extra={}, to_dict=lambda: {"uid": "OD1"})
+
+    def test_server_result(self):
+        consumer.models.execute_kw.return_value = {"created": 1, "updated": 0, "skipped": 0}
+        self.assertTrue(consumer.upsert_users_on_server([self.user], "create"))
+        self.assertEqual(consumer.USER_INGEST, "server")
+
+    def test_missing_method_falls_back_to_client(self):
+        consumer.models.execute_kw.side_effect = xmlrpc.client.Fault(1, MISSING)
+        self.assertFalse(consumer.upsert_users_on_server([self.user], "create"))
+        self.assertEqual(consumer.USER_INGEST, "client")
+
+        # client mode sticks: no second server round trip
+        consumer.models.execute_kw.reset_mock()
+        self.assertFalse(consumer.upsert_users_on_server([self.user], "update"))
+        consumer.models.execute_kw.assert_not_called()
+
+    def test_server_error_is_raised(self):
+        consumer.models.execute_kw.side_effect = xmlrpc.client.Fault(1, DATA_ERROR)
+        with self.assertRaises(xmlrpc.client.Fault):
+            consumer.upsert_users_on_server([self.user], "create")
+        self.assertEqual(consumer.USER_INGEST, "server")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import tempfile
+import unittest
+import importlib.util
+from types import SimpleNamespace
+
+TEST_DIR = os.path.dirname(__file__)
+MODULE_PATH = os.path.abspath(
+    os.path.join(TEST_DIR, os.pardir, "consumers", "dedup.py")
+)
+
+spec = importlib.util.spec_from_file_location("dedup", MODULE_PATH)
+dedup = importlib.util.module_from_spec(spec)
+sys.modules["dedup"] = dedup
+spec.loader.exec_module(dedup)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMessageKey(unittest.TestCase):
+
+    def test_message_id_wins(self):
+        props = SimpleNamespace(message_id="abc")
+        self.assertEqual(dedup.message_key(props, b"<x/>"), "id:abc")
+
+    def test_body_hash_without_message_id(self):
+        key = dedup.message_key(SimpleNamespace(message_id=None), b"<x/>")
+        self.assertTrue(key.startswith("sha256:"))
+        self.assertEqual(key, dedup.message_key(None, "<x/>"))
+
+
+class TestDedupStore(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.store = dedup.DedupStore(
+            ":memory:", capacity=2, retention=100, hash_window=10, clock=self.clock
+        )
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_seen_only_after_mark(self):
+        self.assertFalse(self.store.seen("id:1"))
+        self.store.mark("id:1")
+        self.assertTrue(self.store.seen("id:1"))
+        self.assertEqual(self.store.stats()["hits"], 1)
+        self.assertEqual(self.store.stats()["misses"], 1)
+
+    def test_hash_keys_expire_sooner(self):
+        self.store.mark("id:1")
+        self.store.mark("sha256:ff")
+        self.clock.now += 50
+        self.assertTrue(self.store.seen("id:1"))
+        self.assertFalse(self.store.seen("sha256:ff"))
+
+    def test_a_b_a_without_message_id_is_processed_again(self):
+        store = dedup.DedupStore(":memory:", clock=self.clock)
+        a = dedup.message_key(None, b"<register/>")
+        b = dedup.message_key(None, b"<unregister/>")
+
+        store.mark(a)
+        self.assertTrue(store.seen(a))          # immediate redelivery
+        self.clock.now += 60
+        store.mark(b)
+        self.clock.now += 60
+        self.assertFalse(store.seen(a))         # register again, minutes later
+        store.close()
+
+    def test_evicted_keys_come_back_from_sqlite(self):
+        for key in ("id:1", "id:2", "id:3"):
+            self.store.mark(key)
+        self.assertNotIn("id:1", self.store._recent)
+        self.assertTrue(self.store.seen("id:1"))
+
+    def test_history_survives_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state", "dedup.sqlite3")
+            store = dedup.DedupStore(path, clock=self.clock)
+            store.mark("id:42")
+            store.close()
+
+            reopened = dedup.DedupStore(path, clock=self.clock)
+            self.assertTrue(reopened.seen("id:42"))
+            reopened.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
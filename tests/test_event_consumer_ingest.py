@@ -0,0 +1,90 @@
+import unittest
+import xmlrpc.client
+from unittest.mock import patch
+
+from tests._consumer_stubs import load_consumer
+
+consumer_event = load_consumer("consumer_event")
+attendify = consumer_event.attendify
+
+
+class TestEventPatch(unittest.TestCase):
+
+    def setUp(self):
+        consumer_event.models.execute_kw.reset_mock(return_value=True, side_effect=True)
+        consumer_event.SCHEMA.has.return_value = True
+        consumer_event.IDS.partner_id.return_value = 5
+        consumer_event.IDS.event_id.return_value = 1
+
+    def test_patch_vals_only_present_fields(self):
+        self.assertEqual(consumer_event._event_patch_vals(attendify.Event(uid="GC1", title="New")),
+                         {"name": "New"})
+
+    def test_patch_vals_empty_values_clear(self):
+        ev = attendify.Event(uid="GC1", organizer_uid="", location="", gcid="", description="")
+        self.assertEqual(consumer_event._event_patch_vals(ev), {
+            "organizer_id": False, "address_id": False, "gcid": False, "description": "",
+        })
+
+    def test_patch_vals_lookups(self):
+        ev = attendify.Event(uid="GC1", organizer_uid="OD5", location="Main hall",
+                             entrance_fee="7.50")
+        with patch.object(consumer_event, "find_or_create_venue_partner", return_value=6):
+            vals = consumer_event._event_patch_vals(ev)
+        self.assertEqual(vals, {"organizer_id": 5, "address_id": 6, "entrance_fee": 7.5})
+
+    def test_patch_updates_the_ticket_product(self):
+        execute_kw = consumer_event.models.execute_kw
+        execute_kw.side_effect = lambda *args: [3] if args[3:5] == ("product.template", "search") else True
+        consumer_event.patch_event(attendify.Event(uid="GC1", title="New", entrance_fee="15.00"))
+
+        calls = [c.args[3:] for c in execute_kw.call_args_list]
+        self.assertEqual(calls[0][:3], ("event.event", "write", [[1], {"name": "New", "entrance_fee": 15.0}]))
+        self.assertEqual(calls[1][:3], ("product.template", "search", [[("default_code", "=", "GC1")]]))
+        self.assertEqual(calls[2], ("product.template", "write",
+                                    [[3], {"name": "Ticket: New", "list_price": 15.0}]))
+
+    def test_patch_without_product_fields_leaves_the_product(self):
+        consumer_event.patch_event(attendify.Event(uid="GC1", start_date="2025-05-01"))
+        models = [c.args[3] for c in consumer_event.models.execute_kw.call_args_list]
+        self.assertEqual(models, ["event.event"])
+
+
+class TestServerIngestFallback(unittest.TestCase):
+
+    def setUp(self):
+        consumer_event.EVENT_INGEST = "server"
+        consumer_event.models.execute_kw.reset_mock(return_value=True, side_effect=True)
+        self.msg = attendify.Message("create", "odoo", attendify.Event(uid="GC1", title="Gig"))
+
+    def test_server_ingest(self):
+        consumer_event.models.execute_kw.return_value = {"status": "created", "id": 1}
+        with patch.object(consumer_event, "handle_event") as handle_event:
+            consumer_event._dispatch(self.msg)
+        handle_event.assert_not_called()
+        consumer_event.IDS.events.put.assert_called_with("GC1", 1)
+        self.assertEqual(consumer_event.EVENT_INGEST, "server")
+
+    def test_missing_ingest_model_falls_back_to_client(self):
+        consumer_event.models.execute_kw.side_effect = xmlrpc.client.Fault(
+            2, "Object attendify.ingest doesn't exist"
+        )
+        with patch.object(consumer_event, "handle_event") as handle_event:
+            consumer_event._dispatch(self.msg)
+        handle_event.assert_called_once_with(self.msg.payload, "create")
+        self.assertEqual(consumer_event.EVENT_INGEST, "client")
+
+    def test_other_faults_are_raised(self):
+        consumer_event.models.execute_kw.side_effect = xmlrpc.client.Fault(
+            1, "Traceback (most recent call last):\n  File \"attendify_ingest.py\", in ingest\n"
+               "odoo.exceptions.UserError: POS category 'Drinks/Tickets' not found"
+        )
+        with patch.object(consumer_event, "handle_event") as handle_event, \
+             self.assertRaises(xmlrpc.client.Fault):
+            consumer_event._dispatch(self.msg)
+        handle_event.assert_not_called()
+        self.assertEqual(consumer_event.EVENT_INGEST, "server")
+
+
+if __name__ == "__main__":
+    unittest.main()
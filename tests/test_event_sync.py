@@ -0,0 +1,95 @@
+import datetime
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from tests._odoo_fakes import import_addon
+
+event_sync = import_addon("event_sync/models/event_sync.py", {"event_deltas": True})
+attendify = event_sync.attendify
+
+
+class _NoUser:
+    """An empty res.users recordset."""
+    name = ref = False
+
+    def __bool__(self):
+        return False
+
+
+def _event(**overrides):
+    rec = SimpleNamespace(
+        id=7,
+        external_uid="GC1",
+        gcid="g-1",
+        name="Jazz night",
+        address_id=SimpleNamespace(display_name="Main hall"),
+        date_begin=datetime.datetime(2025, 5, 1, 20, 0),
+        date_end=datetime.datetime(2025, 5, 1, 23, 30),
+        user_id=SimpleNamespace(name="Org", ref="OD9"),
+        event_ticket_ids=[],
+        description="Live",
+    )
+    rec.__dict__.update(overrides)
+    return rec
+
+
+class TestBuildEventDelta(unittest.TestCase):
+
+    def setUp(self):
+        self.sync = event_sync.EventSync()
+
+    def _delta(self, written, rec=None):
+        body = self.sync._build_event_delta(rec or _event(), written, fee=12.5)
+        return None if body is None else attendify.parse(body)
+
+    def test_only_the_fed_message_fields(self):
+        msg = self._delta({"name", "date_begin"})
+        self.assertEqual(msg.operation, "patch")
+        self.assertEqual(msg.payload.to_dict(), {
+            "uid": "GC1", "title": "Jazz night", "start_date": "2025-05-01", "start_time": "20:00",
+        })
+
+    def test_ticket_change_sends_the_fee(self):
+        self.assertEqual(self._delta({"event_ticket_ids"}).payload.to_dict(),
+                         {"uid": "GC1", "entrance_fee": "12.50"})
+
+    def test_description_and_location_travel_together(self):
+        expected = {"uid": "GC1", "description": "Live", "location": "Main hall"}
+        self.assertEqual(self._delta({"description"}).payload.to_dict(), expected)
+        self.assertEqual(self._delta({"address_id"}).payload.to_dict(), expected)
+
+    def test_cleared_organizer_is_sent_empty(self):
+        msg = self._delta({"user_id"}, _event(user_id=_NoUser()))
+        self.assertEqual(msg.payload.organizer_uid, "")
+        self.assertEqual(msg.payload.organizer_name, "")
+
+    def test_unsynced_fields_send_nothing(self):
+        self.assertIsNone(self._delta({"message_follower_ids", "seats_max"}))
+        self.assertIsNone(self._delta(set()))
+
+
+class TestEventDeltasSetting(unittest.TestCase):
+
+    def setUp(self):
+        self.sync = event_sync.EventSync()
+        self.sync._send_event_deltas = MagicMock()
+        self.sync._send_event_to_rabbitmq = MagicMock()
+
+    def test_read_through_load_config(self):
+        with patch.object(event_sync, "_EVENT_DELTAS", None), \
+             patch.object(event_sync.rabbit, "load_config", return_value={"event_deltas": False}):
+            self.sync._attendify_send("update", {7: {"name"}})
+        self.sync._send_event_to_rabbitmq.assert_called_once_with("update")
+        self.sync._send_event_deltas.assert_not_called()
+
+    def test_updates_go_out_as_patches(self):
+        with patch.object(event_sync, "_EVENT_DELTAS", None):
+            self.sync._attendify_send("update", {7: {"name"}})
+            self.sync._attendify_send("create", {7: set()})
+        self.sync._send_event_deltas.assert_called_once_with({7: {"name"}})
+        self.sync._send_event_to_rabbitmq.assert_called_once_with("create")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import sys
+import unittest
+import importlib.util
+from types import ModuleType
+from unittest.mock import MagicMock, patch
+
+TEST_DIR = os.path.dirname(__file__)
+MODULE_PATH = os.path.abspath(os.path.join(TEST_DIR, os.pardir, "heartbeat", "heartbeat.py"))
+
+# docker is only installed in the heartbeat image
+stubs = {} if importlib.util.find_spec("docker") else {"docker": ModuleType("docker")}
+with patch.dict(sys.modules, stubs):
+    spec = importlib.util.spec_from_file_location("heartbeat", MODULE_PATH)
+    heartbeat = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(heartbeat)
+
+
+def event(name, action):
+    return {"Action": action, "Actor": {"Attributes": {"name": name}}}
+
+
+def client_reporting(status):
+    client = MagicMock()
+    client.containers.get.return_value.attrs = {"State": {"Health": {"Status": status}}}
+    return client
+
+
+class TestParseTargets(unittest.TestCase):
+
+    def test_plain_and_named_entries(self):
+        self.assertEqual(
+            heartbeat.parse_targets("odoo-db, web=odoo-web ,,consumer_user"),
+            {"odoo-db": "odoo-db", "odoo-web": "web", "consumer_user": "consumer_user"},
+        )
+
+    def test_empty_spec(self):
+        self.assertEqual(heartbeat.parse_targets(None), {})
+        self.assertEqual(heartbeat.parse_targets(" , "), {})
+
+    def test_single_target_fallback(self):
+        env = {"TARGET_CONTAINER": "odoo-web", "CONTAINER_NAME": "pos"}
+        with patch.dict(os.environ, env, clear=True):
+            self.assertEqual(heartbeat.load_targets(), {"odoo-web": "pos"})
+        with patch.dict(os.environ, dict(env, HEARTBEAT_TARGETS="db=odoo-db"), clear=True):
+            self.assertEqual(heartbeat.load_targets(), {"odoo-db": "db"})
+
+
+class TestHealthTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = heartbeat.HealthTable(["odoo-web", "odoo-db"])
+        self.client = client_reporting("healthy")
+
+    def test_health_status(self):
+        self.assertTrue(self.table.apply(self.client, event("odoo-web", "health_status: healthy")))
+        self.assertEqual(self.table.healthy(), ["odoo-web"])
+        self.table.apply(self.client, event("odoo-web", "health_status: unhealthy"))
+        self.assertEqual(self.table.healthy(), [])
+        self.client.containers.get.assert_not_called()
+
+    def test_start_asks_docker_once(self):
+        self.table.apply(self.client, event("odoo-db", "start"))
+        self.client.containers.get.assert_called_once_with("odoo-db")
+        self.assertEqual(self.table.healthy(), ["odoo-db"])
+
+        self.table.apply(client_reporting("starting"), event("odoo-web", "start"))
+        self.assertEqual(self.table.healthy(), ["odoo-db"])
+
+    def test_down_actions(self):
+        for action in ("die", "stop", "oom"):
+            self.table.set("odoo-web", True)
+            self.assertTrue(self.table.apply(self.client, event("odoo-web", action)))
+            self.assertEqual(self.table.healthy(), [], action)
+
+    def test_foreign_container_is_ignored(self):
+        self.assertFalse(self.table.apply(self.client, event("adminer", "health_status: healthy")))
+        self.assertFalse(self.table.apply(self.client, {"Action": "start"}))
+        self.assertEqual(self.table.healthy(), [])
+        self.client.containers.get.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
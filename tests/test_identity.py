@@ -0,0 +1,91 @@
+import os
+import sys
+import unittest
+import importlib.util
+from unittest.mock import MagicMock
+
+TEST_DIR = os.path.dirname(__file__)
+MODULE_PATH = os.path.abspath(
+    os.path.join(TEST_DIR, os.pardir, "consumers", "identity.py")
+)
+
+spec = importlib.util.spec_from_file_location("identity", MODULE_PATH)
+identity = importlib.util.module_from_spec(spec)
+sys.modules["identity"] = identity
+spec.loader.exec_module(identity)
+
+
+class FakeOdoo:
+    """search_read over a few in-memory tables, honouring limit/offset."""
+
+    def __init__(self):
+        self.rows = {
+            "res.partner": [{"id": i, "ref": f"GC{i}"} for i in range(1, 6)],
+            "event.event": [{"id": 10, "external_uid": "EV10"},
+                            {"id": 11, "external_uid": "EV11"}],
+            "event.event.ticket": [{"id": 100, "event_id": [10, "EV10"]},
+                                   {"id": 101, "event_id": [10, "EV10"]}],
+        }
+        self.calls = MagicMock()
+
+    def __call__(self, model, method, args, kw):
+        self.calls(model, method, args, kw)
+        rows = self.rows[model]
+        domain = args[0]
+        if domain and domain[0][1] == "=":
+            field, _, value = domain[0]
+            rows = [r for r in rows if (r[field][0] if field == "event_id" else r[field]) == value]
+        elif domain and domain[0][1] == "in":
+            rows = [r for r in rows if r["event_id"][0] in domain[0][2]]
+        if kw.get("order") == "id desc":
+            rows = sorted(rows, key=lambda r: -r["id"])
+        offset = kw.get("offset", 0)
+        limit = kw.get("limit")
+        return rows[offset:offset + limit] if limit else rows[offset:]
+
+
+class TestIdentityMap(unittest.TestCase):
+
+    def setUp(self):
+        self.odoo = FakeOdoo()
+        self.ids = identity.IdentityMap(self.odoo, capacity=3)
+
+    def test_warm_is_bounded_and_keeps_newest(self):
+        self.ids.warm(page_size=2)
+        self.assertEqual(len(self.ids.partners), 3)
+        self.assertIn("GC5", self.ids.partners)
+        self.assertNotIn("GC1", self.ids.partners)
+        self.assertEqual(self.ids.tickets.get(10), 100)
+        self.assertIs(self.ids.tickets.get(11), False)
+
+    def test_lookups_after_warm_cost_no_rpc(self):
+        self.ids.warm()
+        self.odoo.calls.reset_mock()
+        self.assertEqual(self.ids.partner_id("GC5"), 5)
+        self.assertEqual(self.ids.event_id("EV10"), 10)
+        self.assertEqual(self.ids.first_ticket_id(10), 100)
+        self.odoo.calls.assert_not_called()
+
+    def test_misses_are_not_cached(self):
+        self.assertFalse(self.ids.partner_id("GC99"))
+        self.odoo.rows["res.partner"].append({"id": 99, "ref": "GC99"})
+        self.assertEqual(self.ids.partner_id("GC99"), 99)
+
+    def test_lru_eviction(self):
+        for ref in ("GC1", "GC2", "GC3"):
+            self.ids.partner_id(ref)
+        self.ids.partner_id("GC1")          # touch: GC2 is now the oldest
+        self.ids.partner_id("GC4")
+        self.assertIn("GC1", self.ids.partners)
+        self.assertNotIn("GC2", self.ids.partners)
+
+    def test_forget_event_drops_ticket(self):
+        self.ids.event_created("EV12", 12, 120)
+        self.assertEqual(self.ids.first_ticket_id(12), 120)
+        self.ids.forget_event("EV12")
+        self.assertNotIn("EV12", self.ids.events)
+        self.assertNotIn(12, self.ids.tickets)
+
+
+if __name__ == "__main__":
+    unittest.main()
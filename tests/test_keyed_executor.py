@@ -0,0 +1,63 @@
+import os
+import threading
+import time
+import unittest
+import importlib.util
+
+TEST_DIR = os.path.dirname(__file__)
+MODULE_PATH = os.path.abspath(
+    os.path.join(TEST_DIR, os.pardir, "consumers", "keyed_executor.py")
+)
+
+spec = importlib.util.spec_from_file_location("keyed_executor", MODULE_PATH)
+keyed_executor = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(keyed_executor)
+KeyedExecutor = keyed_executor.KeyedExecutor
+
+
+class TestKeyedExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.ex = KeyedExecutor(4)
+
+    def tearDown(self):
+        self.ex.shutdown()
+
+    def test_same_key_runs_in_submission_order(self):
+        seen = []
+
+        def step(name):
+            time.sleep(0.001)
+            seen.append(name)
+
+        futs = [self.ex.submit("GC1", step, op) for op in ("create", "update", "register")]
+        for f in futs:
+            f.result(timeout=5)
+        self.assertEqual(seen, ["create", "update", "register"])
+
+    def test_lane_is_stable_for_a_key(self):
+        self.assertEqual(self.ex.lane_for("GC42"), self.ex.lane_for("GC42"))
+        self.assertIn(self.ex.lane_for(None), range(4))
+
+    def test_different_lanes_run_concurrently(self):
+        keys = {}
+        for i in range(100):
+            keys.setdefault(self.ex.lane_for(f"GC{i}"), f"GC{i}")
+        a, b = list(keys.values())[:2]
+
+        release = threading.Event()
+        blocked = self.ex.submit(a, release.wait, 5)
+        other = self.ex.submit(b, lambda: "done")
+
+        self.assertEqual(other.result(timeout=2), "done")
+        self.assertFalse(blocked.done())
+        release.set()
+        self.assertTrue(blocked.result(timeout=5))
+
+    def test_exception_is_reported_on_future(self):
+        fut = self.ex.submit("x", lambda: 1 / 0)
+        self.assertIsInstance(fut.exception(timeout=5), ZeroDivisionError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+import asyncio
+import http.client
+import os
+import threading
+import unittest
+import importlib.util
+from socketserver import ThreadingMixIn
+from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+
+TEST_DIR = os.path.dirname(__file__)
+MODULE_PATH = os.path.abspath(
+    os.path.join(TEST_DIR, os.pardir, "consumers", "odoo_rpc.py")
+)
+
+spec = importlib.util.spec_from_file_location("odoo_rpc", MODULE_PATH)
+odoo_rpc = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(odoo_rpc)
+
+
+class _ThreadedServer(ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+
+
+class _KeepAliveHandler(SimpleXMLRPCRequestHandler):
+    protocol_version = "HTTP/1.1"
+    rpc_paths = ("/xmlrpc/2/common", "/xmlrpc/2/object")
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPooledTransport(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = _ThreadedServer(
+            ("127.0.0.1", 0), requestHandler=_KeepAliveHandler,
+            logRequests=False,
+        )
+        cls.server.register_function(lambda a, b: a + b, "add")
+
+        def boom():
+            raise ValueError("nope")
+        cls.server.register_function(boom, "boom")
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        host, port = cls.server.server_address
+        cls.url = f"http://{host}:{port}/xmlrpc/2/"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_sequential_calls_reuse_one_socket(self):
+        transport = odoo_rpc.PooledTransport(max_connections=2)
+        common = odoo_rpc.xmlrpc.client.ServerProxy(self.url + "common", transport=transport)
+        objects = odoo_rpc.xmlrpc.client.ServerProxy(self.url + "object", transport=transport)
+
+        for i in range(5):
+            self.assertEqual(common.add(i, 1), i + 1)
+            self.assertEqual(objects.add(i, 2), i + 2)
+
+        stats = transport.stats()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]["requests"], 10)
+        self.assertEqual(stats[0]["reuses"], 9)
+        transport.close()
+
+    def test_pool_is_bounded_under_concurrency(self):
+        transport = odoo_rpc.PooledTransport(max_connections=3)
+        proxy = odoo_rpc.xmlrpc.client.ServerProxy(self.url + "object", transport=transport)
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(20):
+                    proxy.add(1, 1)
+            except Exception as e:  # pragma: no cover - surfaced below
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertFalse(errors)
+        stats = transport.stats()
+        self.assertLessEqual(len(stats), 3)
+        self.assertEqual(sum(s["requests"] for s in stats), 160)
+        transport.close()
+
+    def test_server_proxy_uses_shared_transport(self):
+        p1 = odoo_rpc.server_proxy(self.url + "common")
+        p2 = odoo_rpc.server_proxy(self.url + "object")
+        self.assertIs(p1._ServerProxy__transport, p2._ServerProxy__transport)
+
+
+    def test_fault_keeps_the_socket(self):
+        transport = odoo_rpc.PooledTransport(max_connections=1)
+        proxy = odoo_rpc.xmlrpc.client.ServerProxy(self.url + "object", transport=transport)
+        with self.assertRaises(odoo_rpc.xmlrpc.client.Fault):
+            proxy.boom()
+        self.assertEqual(proxy.add(1, 1), 2)
+        self.assertEqual([(s["requests"], s["open"]) for s in transport.stats()], [(2, True)])
+        transport.close()
+
+    def _failing_post(self, transport, failures):
+        """Make `_post` raise RemoteDisconnected `failures` times, then go through."""
+        real_post, posted = transport._post, []
+
+        def post(conn, *args):
+            posted.append(conn.id)
+            if len(posted) <= failures:
+                conn.requests += 1
+                raise http.client.RemoteDisconnected("closed")
+            return real_post(conn, *args)
+        transport._post = post
+        return posted
+
+    def test_stale_keep_alive_socket_is_retried_once(self):
+        transport = odoo_rpc.PooledTransport(max_connections=1)
+        proxy = odoo_rpc.xmlrpc.client.ServerProxy(self.url + "object", transport=transport)
+        proxy.add(1, 1)
+        posted = self._failing_post(transport, failures=1)
+        self.assertEqual(proxy.add(2, 2), 4)
+        self.assertEqual(posted, [1, 2])
+        transport.close()
+
+    def test_failure_on_a_fresh_socket_is_not_retried(self):
+        transport = odoo_rpc.PooledTransport(max_connections=1)
+        proxy = odoo_rpc.xmlrpc.client.ServerProxy(self.url + "object", transport=transport)
+        posted = self._failing_post(transport, failures=1)
+        with self.assertRaises(http.client.RemoteDisconnected):
+            proxy.add(1, 1)
+        self.assertEqual(posted, [1])
+        transport.close()
+
+    def test_closed_history_is_bounded(self):
+        transport = odoo_rpc.PooledTransport(max_connections=1)
+        host = self.url.split("/")[2]
+        for _ in range(odoo_rpc.CLOSED_HISTORY + 10):
+            transport._release(transport._acquire(host), reusable=False)
+        self.assertEqual(len(transport.stats()), odoo_rpc.CLOSED_HISTORY)
+
+
+class TestAsyncOdooClient(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        TestPooledTransport.setUpClass.__func__(cls)
+
+    @classmethod
+    def tearDownClass(cls):
+        TestPooledTransport.tearDownClass.__func__(cls)
+
+    def test_concurrent_calls_share_bounded_streams(self):
+        async def scenario():
+            client = odoo_rpc.AsyncOdooClient(self.url, max_connections=4)
+            results = await asyncio.gather(
+                *(client.call("object", "add", i, 1) for i in range(40))
+            )
+            await client.close()
+            return results, client.stats()
+
+        results, stats = asyncio.run(scenario())
+        self.assertEqual(results, [i + 1 for i in range(40)])
+        self.assertEqual(stats["requests"], 40)
+        self.assertLessEqual(stats["connections"], 4)
+        self.assertEqual(stats["peak_in_flight"], 4)
+
+    def test_fault_is_raised(self):
+        async def scenario():
+            client = odoo_rpc.AsyncOdooClient(self.url)
+            try:
+                await client.call("common", "boom")
+            finally:
+                await client.close()
+
+        with self.assertRaises(odoo_rpc.xmlrpc.client.Fault):
+            asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
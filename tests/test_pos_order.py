@@ -20,6 +20,8 @@ import unittest
 import datetime
 from unittest.mock import MagicMock
 
+from tests._odoo_fakes import Env
+
 # 2) Locate and attempt to load the real pos_order.py
 TEST_DIR = os.path.dirname(__file__)
 MODULE_PATH = os.path.abspath(
@@ -29,6 +31,23 @@ MODULE_PATH = os.path.abspath(
     )
 )
 
+ATTENDIFY_MODULE = "odoo.addons.customer_rabbit_connector.tools.attendify"
+ATTENDIFY_PATH = os.path.abspath(
+    os.path.join(
+        TEST_DIR, os.pardir,
+        "odoo", "addons", "pos_custom", "customer_rabbit_connector", "tools", "attendify.py"
+    )
+)
+
+def _register_attendify():
+    """The shared message model is plain Python; expose it under odoo.addons."""
+    spec = importlib.util.spec_from_file_location(ATTENDIFY_MODULE, ATTENDIFY_PATH)
+    mod  = importlib.util.module_from_spec(spec)
+    sys.modules[ATTENDIFY_MODULE] = mod
+    spec.loader.exec_module(mod)
+    package = ATTENDIFY_MODULE.rpartition(".")[0]
+    sys.modules.setdefault(package, ModuleType(package)).attendify = mod
+
 def _load_real_module():
     """Return a module object for pos_order, patching _is_settled if malformed."""
     spec = importlib.util.spec_from_file_location("pos_order", MODULE_PATH)
@@ -55,6 +74,7 @@ def _load_real_module():
     return mod
 
 try:
+    _register_attendify()
     pos_order = _load_real_module()
 except Exception:
     # 3) Fallback minimal stub (only what tests need)
@@ -132,32 +152,39 @@ class DummyOrder:
     def ensure_one(self):
         return True
 
-# 5) Test-case
-class TestPosOrder(unittest.TestCase):
-    GOOD_ENV = {
-        "RABBITMQ_HOST": "localhost",
-        "RABBITMQ_USERNAME": "guest",
-        "RABBITMQ_PASSWORD": "guest",
-        "RABBITMQ_PORT": "5672",
-        "RABBITMQ_VHOST": "/",
-    }
+class _PosOrderBase:
+    """Odoo 17's create_from_ui: `_process_order` pays each order on its own."""
 
-    def setUp(self):
-        # Patch os.getenv
-        self._orig_getenv = pos_order.os.getenv
-        pos_order.os.getenv = lambda k, d=None: self.GOOD_ENV.get(k, d)
+    def action_pos_order_paid(self):
+        return True
+
+    def create_from_ui(self, orders, draft=False):
+        order_ids = []
+        for order in orders:
+            paid = self.browse([order["id"]])
+            paid.action_pos_order_paid()
+            order_ids += paid.ids
+        return [{"id": order_id} for order_id in order_ids]
 
-        # Patch pika.BlockingConnection
-        self._orig_conn = pos_order.pika.BlockingConnection
-        self.fake_chan  = MagicMock()
-        fake_conn = MagicMock()
-        fake_conn.channel.return_value = self.fake_chan
-        pos_order.pika.BlockingConnection = lambda params: fake_conn
 
-    def tearDown(self):
-        pos_order.os.getenv = self._orig_getenv
-        pos_order.pika.BlockingConnection = self._orig_conn
+class _Orders(PosOrder, _PosOrderBase):
 
+    def __init__(self, env, ids=()):
+        self.env = env
+        self.ids = list(ids)
+
+    def browse(self, ids):
+        return _Orders(self.env, ids)
+
+    def exists(self):
+        return self
+
+    def _send_sales_to_rabbitmq(self):
+        self.env.sent.append(self.ids)
+
+
+# 5) Test-case
+class TestPosOrder(unittest.TestCase):
     def test_is_settled_true(self):
         o = DummyOrder()
         o.payment_ids = [
@@ -192,14 +219,36 @@ class TestPosOrder(unittest.TestCase):
         self.assertTrue(pretty.startswith("<?xml"))
         self.assertIn("  <child>x</child>", pretty)
 
-    def test_send_publishes(self):
-        PosOrder._send_to_rabbitmq("<xml>data</xml>")
-        self.assertTrue(self.fake_chan.basic_publish.called)
+    def test_send_queues_in_outbox(self):
+        o = DummyOrder()
+        outbox = MagicMock()
+        o.env = {"attendify.outbox": outbox}
+        PosOrder._send_to_rabbitmq(o, b"<xml>data</xml>")
+        outbox.enqueue.assert_called_once_with(
+            "sale", "sale.performed", b"<xml>data</xml>", content_type="application/xml"
+        )
+
+
+class TestPaidOrdersBatch(unittest.TestCase):
 
-    def test_send_skips_when_host_missing(self):
-        pos_order.os.getenv = lambda k, d=None: None
-        PosOrder._send_to_rabbitmq("<xml/>")
-        self.assertFalse(self.fake_chan.basic_publish.called)
+    def setUp(self):
+        self.env = Env()
+        self.env.sent = []
+        self.orders = _Orders(self.env)
+
+    def test_create_from_ui_queues_one_batch(self):
+        self.orders.create_from_ui([{"id": 1}, {"id": 2}, {"id": 3}])
+        self.assertEqual(self.env.sent, [])          # nothing before the commit
+
+        self.env.cr.precommit.run()
+        self.assertEqual(self.env.sent, [[1, 2, 3]])
+        self.assertEqual(self.env.flushes, 1)
+
+    def test_order_paid_twice_is_sent_once(self):
+        self.orders.browse([1]).action_pos_order_paid()
+        self.orders.browse([1, 2]).action_pos_order_paid()
+        self.env.cr.precommit.run()
+        self.assertEqual(self.env.sent, [[1, 2]])
 
 # ----------------------------------------------------------------------
 if __name__ == "__main__":
@@ -0,0 +1,126 @@
+import os
+import sys
+import unittest
+import importlib.util
+from concurrent.futures import Future
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from pika import exceptions as pika_exc
+
+TEST_DIR = os.path.dirname(__file__)
+MODULE_PATH = os.path.abspath(
+    os.path.join(
+        TEST_DIR, os.pardir, "odoo", "addons", "pos_custom",
+        "customer_rabbit_connector", "tools", "rabbit.py",
+    )
+)
+
+with patch.dict(sys.modules, {"dotenv": SimpleNamespace(dotenv_values=lambda *_, **__: {})}):
+    spec = importlib.util.spec_from_file_location("rabbit", MODULE_PATH)
+    rabbit = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(rabbit)
+
+CFG = {"host": "rabbit", "port": "5672", "user": "u", "pw": "p", "vhost": "/"}
+
+
+def _frame(method_cls, tag, multiple=False):
+    return SimpleNamespace(method=method_cls(delivery_tag=tag, multiple=multiple))
+
+
+class TestConfirmTracker(unittest.TestCase):
+
+    def test_multiple_ack_resolves_everything_up_to_tag(self):
+        tracker = rabbit.ConfirmTracker()
+        futures = [Future() for _ in range(4)]
+        self.assertEqual([tracker.add(f) for f in futures], [1, 2, 3, 4])
+        self.assertEqual(tracker.ack(3, multiple=True), 3)
+        self.assertTrue(all(f.result() for f in futures[:3]))
+        self.assertFalse(futures[3].done())
+
+    def test_nack_is_per_record(self):
+        tracker = rabbit.ConfirmTracker()
+        futures = [Future() for _ in range(3)]
+        for f in futures:
+            tracker.add(f)
+        tracker.nack(2)
+        tracker.ack(3, multiple=True)
+        self.assertTrue(futures[0].result())
+        self.assertIsInstance(futures[1].exception(), pika_exc.NackError)
+        self.assertTrue(futures[2].result())
+
+    def test_fail_all_resets_tags(self):
+        tracker = rabbit.ConfirmTracker()
+        f = Future()
+        tracker.add(f)
+        tracker.fail_all(ConnectionError("gone"))
+        self.assertIsInstance(f.exception(), ConnectionError)
+        self.assertEqual(tracker.add(Future()), 1)
+
+
+class TestConfirmingPublisher(unittest.TestCase):
+
+    def setUp(self):
+        self.pub = rabbit.ConfirmingPublisher(config_loader=lambda: CFG, max_inflight=2)
+        self.pub._ensure_thread = lambda: None            # drive the IO side by hand
+        self.channel = MagicMock()
+
+    def test_window_and_confirms(self):
+        futures = [self.pub.publish_async("event", "event.create", b"x", queue="pos.event")
+                   for _ in range(3)]
+        self.pub._ready(self.channel)
+        self.assertEqual(self.channel.basic_publish.call_count, 2)     # window full
+        self.channel.queue_bind.assert_called_once()
+
+        self.pub._on_confirm(_frame(rabbit.Basic.Ack, 2, multiple=True))
+        self.assertTrue(futures[0].result() and futures[1].result())
+        self.assertEqual(self.channel.basic_publish.call_count, 3)     # window refilled
+
+        self.pub._on_confirm(_frame(rabbit.Basic.Nack, 3))
+        self.assertIsInstance(futures[2].exception(), pika_exc.NackError)
+        self.assertEqual(self.pub.stats()["nacked"], 1)
+
+    def test_lost_connection_fails_in_flight(self):
+        future = self.pub.publish_async("sale", "sale.performed", b"x")
+        self.pub._ready(self.channel)
+        self.pub._lost("reset")
+        self.assertIsInstance(future.exception(), ConnectionError)
+
+
+class TestReconnect(unittest.TestCase):
+    """The IO thread's loop ends when the connection fails (broker down)."""
+
+    def setUp(self):
+        self.pub = rabbit.ConfirmingPublisher(
+            config_loader=lambda: CFG, connection_factory=MagicMock(),
+        )
+        self.pub._ensure_thread = lambda: None
+        self.timers = []
+        patcher = patch.object(rabbit.threading, "Timer",
+                               side_effect=lambda delay, fn: self.timers.append(delay)
+                               or MagicMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cancelled_requests_do_not_reconnect(self):
+        future = self.pub.publish_async("sale", "sale.performed", b"x")
+        future.cancel()                      # publish_rows gave up on it
+        self.pub._run()
+        self.assertEqual(self.timers, [])
+        self.assertTrue(self.pub._requests.empty())
+
+    def test_backoff_doubles_until_the_pipeline_is_ready(self):
+        self.pub.publish_async("sale", "sale.performed", b"x")
+        for _ in range(8):
+            self.pub._run()
+        self.assertEqual(self.timers, [1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 60.0, 60.0])
+
+        self.pub._ready(MagicMock())         # connected: publishes "x"
+        self.pub.publish_async("sale", "sale.performed", b"y")
+        self.pub._channel = None
+        self.pub._run()
+        self.assertEqual(self.timers[-1], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import sys
+import unittest
+import importlib.util
+from unittest.mock import MagicMock
+
+TEST_DIR = os.path.dirname(__file__)
+MODULE_PATH = os.path.abspath(
+    os.path.join(TEST_DIR, os.pardir, "consumers", "refdata.py")
+)
+
+spec = importlib.util.spec_from_file_location("refdata", MODULE_PATH)
+refdata = importlib.util.module_from_spec(spec)
+sys.modules["refdata"] = refdata          # dataclasses resolve types via sys.modules
+spec.loader.exec_module(refdata)
+
+
+ROWS = {
+    "res.country": [
+        {"id": 21, "code": "BE", "name": "Belgium"},
+        {"id": 75, "code": "FR", "name": "France"},
+    ],
+    "res.partner.title": [
+        {"id": 3, "shortcut": "Dr", "name": "Doctor"},
+        {"id": 4, "shortcut": False, "name": "Madam"},
+    ],
+    "pos.category": [{"id": 9, "name": "Drinks/Tickets"}],
+    "uom.uom": [
+        {"id": 1, "name": "Units", "category_id": [1, "Unit"]},
+        {"id": 2, "name": "Dozens", "category_id": [1, "Unit"]},
+    ],
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestReferenceCache(unittest.TestCase):
+
+    def setUp(self):
+        self.rpc = MagicMock(side_effect=lambda model, method, args, kw: ROWS[model])
+        self.clock = FakeClock()
+        self.cache = refdata.ReferenceCache(self.rpc, ttl=60, clock=self.clock)
+
+    def test_warm_reads_each_model_once(self):
+        self.cache.warm()
+        models = [c.args[0] for c in self.rpc.call_args_list]
+        self.assertEqual(
+            sorted(models),
+            ["pos.category", "res.country", "res.partner.title", "uom.uom"],
+        )
+
+    def test_lookups_after_warm_cost_no_rpc(self):
+        self.cache.warm()
+        self.rpc.reset_mock()
+
+        self.assertEqual(self.cache.country_id("be"), 21)
+        self.assertEqual(self.cache.title_id("Dr"), 3)
+        self.assertEqual(self.cache.pos_category_id("Drinks/Tickets"), 9)
+        self.assertEqual(self.cache.uom_id_for_category("Unit"), 1)
+        self.assertFalse(self.cache.country_id("XX"))
+        self.assertFalse(self.cache.title_id(""))
+
+        self.rpc.assert_not_called()
+        self.assertEqual(self.cache.stats()["hits"], 6)
+        self.assertEqual(self.cache.stats()["misses"], 0)
+
+    def test_expired_table_is_reloaded_on_read(self):
+        self.cache.warm()
+        self.rpc.reset_mock()
+
+        self.clock.now = 61
+        self.assertEqual(self.cache.country_id("FR"), 75)
+        self.assertEqual(self.rpc.call_count, 1)
+        self.assertEqual(self.rpc.call_args.args[0], "res.country")
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+        self.assertEqual(self.cache.country_id("BE"), 21)
+        self.assertEqual(self.rpc.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,7 @@ import os
 import sys
 import unittest
 import importlib.util
-from types import SimpleNamespace
+from types import ModuleType, SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 #  Locate repo root and make sure it's import‑able
@@ -11,6 +11,8 @@ PROJECT_ROOT = os.path.abspath(os.path.join(TEST_DIR, os.pardir))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
+from tests._odoo_fakes import Env, import_outbox
+
 
 #  Helper to find + import res_partner.py with stubs in place
 def _find_res_partner_file():
@@ -31,10 +33,27 @@ def _find_res_partner_file():
     raise FileNotFoundError("res_partner.py not found")
 
 
+#  Shared Attendify message model (plain Python, imported via odoo.addons)
+ATTENDIFY_MODULE = "odoo.addons.customer_rabbit_connector.tools.attendify"
+
+
+def _register_attendify():
+    path = os.path.join(
+        PROJECT_ROOT, "odoo", "addons", "pos_custom",
+        "customer_rabbit_connector", "tools", "attendify.py",
+    )
+    spec = importlib.util.spec_from_file_location(ATTENDIFY_MODULE, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[ATTENDIFY_MODULE] = module
+    spec.loader.exec_module(module)
+    package = ATTENDIFY_MODULE.rpartition(".")[0]
+    sys.modules.setdefault(package, ModuleType(package)).attendify = module
+
+
 def _import_res_partner(env):
     # ---- stub Odoo framework pieces ------------------------------------
     fake_fields = SimpleNamespace(Char=lambda **kw: None)
-    fake_api = SimpleNamespace(model_create_multi=lambda fn: fn)
+    fake_api = SimpleNamespace(model_create_multi=lambda fn: fn, model=lambda fn: fn)
 
     class _ModelMeta(type):
         def __new__(mcls, n, b, d):
@@ -59,6 +78,7 @@ def _import_res_partner(env):
         "odoo.fields": fake_fields,
         "odoo.api": fake_api,
     })
+    _register_attendify()
 
     # ---- stub dotenv (load_dotenv *and* dotenv_values) -----------------
     sys.modules["dotenv"] = SimpleNamespace(
@@ -98,14 +118,18 @@ def _partner(module, *, email="john@example.com"):
     p.ref = ""                   
     p.integration_pw_hash = None
     p.title = SimpleNamespace(name="")   
-    p.env = SimpleNamespace(context={})
+    p.env = _FakeEnv()
     return p
 
 
-def _fake_blocking_connection():
-    """Return an object that mimics pika.BlockingConnection."""
-    ch = MagicMock()
-    return SimpleNamespace(channel=lambda: ch, close=lambda: None)
+class _FakeEnv(dict):
+    """`env["attendify.outbox"]` / `["attendify.uid"]` plus the context dict."""
+
+    def __init__(self):
+        uids = MagicMock()
+        uids.allocate_one.return_value = "OD1000"
+        super().__init__({"attendify.outbox": MagicMock(), "attendify.uid": uids})
+        self.context = {}
 
 
 #  Test‑case
@@ -118,36 +142,135 @@ class TestProducerRouting(unittest.TestCase):
         self.module.bcrypt.gensalt = MagicMock(return_value=b"salt")
         self.module.bcrypt.hashpw = MagicMock(return_value=b"fakehash")
 
-        self.fake_conn = _fake_blocking_connection()
-        self.module.pika.PlainCredentials     = MagicMock()
-        self.module.pika.ConnectionParameters = MagicMock()
-        self.module.pika.BlockingConnection   = MagicMock(return_value=self.fake_conn)
+    def _queued(self, p):
+        outbox = p.env["attendify.outbox"]
+        self.assertEqual(outbox.enqueue.call_args.args[0], "user-management")
+        return outbox.enqueue.call_args.args[1]
 
     def test_create_routing_key(self):
         p = _partner(self.module)
         p._send_to_rabbitmq("create")
-        ch = self.fake_conn.channel()
-        self.assertEqual(ch.basic_publish.call_args.kwargs["routing_key"], "user.register")
+        self.assertEqual(self._queued(p), "user.register")
 
     def test_update_routing_key(self):
         p = _partner(self.module)
         p._send_to_rabbitmq("create")             
-        self.fake_conn.channel().basic_publish.reset_mock()
+        p.env["attendify.outbox"].reset_mock()
 
+        p.name = "John Smith"
         p._send_to_rabbitmq("update")
-        self.assertEqual(self.fake_conn.channel().basic_publish.call_args.kwargs["routing_key"],
-                         "user.update")
+        self.assertEqual(self._queued(p), "user.update")
 
     def test_delete_routing_key(self):
         p = _partner(self.module)
         p._send_to_rabbitmq("delete")
-        self.assertEqual(self.fake_conn.channel().basic_publish.call_args.kwargs["routing_key"],
-                         "user.delete")
+        self.assertEqual(self._queued(p), "user.delete")
+
+    def test_unchanged_update_is_skipped(self):
+        p = _partner(self.module)
+        p._send_to_rabbitmq("create")
+        self.assertTrue(p.attendify_sync_hash)
+        p.env["attendify.outbox"].reset_mock()
+
+        p._send_to_rabbitmq("update")
+        p.env["attendify.outbox"].enqueue.assert_not_called()
+
+        p.email = "new@example.com"
+        p._send_to_rabbitmq("update")
+        self.assertEqual(self._queued(p), "user.update")
 
     def test_no_email_skips_publish(self):
         p = _partner(self.module, email="")
         p._send_to_rabbitmq("create")
-        self.fake_conn.channel().basic_publish.assert_not_called()
+        p.env["attendify.outbox"].enqueue.assert_not_called()
+
+
+class TestSyncHashSurvivesCommit(unittest.TestCase):
+    """Coalesced update → precommit → flush → re-read from the DB."""
+
+    def setUp(self):
+        self.module = _import_res_partner(GOOD_ENV)
+        P = self.module.ResPartner
+        P._name = "res.partner"
+        P.ids = property(lambda self: [self.id])
+        P.__iter__ = lambda self: iter([self])
+        P.exists = lambda self: self
+        P.write = lambda self, vals: (
+            self.__dict__.update(vals)
+            or self.env.cache.setdefault(self.id, {}).update(vals)
+            or True
+        )
+
+        self.env = Env()
+        self.outbox = import_outbox().AttendifyOutbox()
+        self.outbox.env = self.env
+        self.outbox.enqueue = MagicMock()
+        self.env.update({
+            "attendify.outbox": self.outbox,
+            "attendify.uid": MagicMock(**{"allocate_one.return_value": "OD1000"}),
+            "res.partner": SimpleNamespace(browse=lambda ids: self._load(ids[0])),
+        })
+
+    def _load(self, pid):
+        p = _partner(self.module)
+        p.env = self.env
+        p.__dict__.update(self.env.db.get(pid, {}))
+        return p
+
+    def _update_and_commit(self):
+        self.outbox.defer_changes(self._load(1), "update")
+        self.env.cr.precommit.run()
+
+    def test_identical_second_write_publishes_nothing(self):
+        self._update_and_commit()
+        self.assertEqual(self.outbox.enqueue.call_count, 1)
+        stored = dict(self.env.db[1])
+        self.assertTrue(stored["attendify_sync_hash"])
+        self.assertTrue(stored["integration_pw_hash"])
+
+        self.outbox.enqueue.reset_mock()
+        self._update_and_commit()
+        self.outbox.enqueue.assert_not_called()
+        self.assertEqual(self.env.db[1], stored)      # hash not regenerated
+
+
+class TestAttendifyUserVals(unittest.TestCase):
+    """Pure helpers behind res.partner.attendify_upsert_users."""
+
+    COUNTRIES = {"BE": 20, "belgium": 20, "NL": 21, "netherlands": 21}
+    TITLES = {"Mr.": 3}
+
+    def setUp(self):
+        self.module = _import_res_partner(GOOD_ENV)
+
+    def test_partner_vals_resolve_country_and_title(self):
+        vals = self.module._user_partner_vals({
+            "uid": "GC1", "first_name": " Jane ", "last_name": "Doe",
+            "email": "jane@example.com", "title": "Mr.", "country": "Belgium",
+            "address/street": "Main St", "address/number": "5",
+            "address/bus_number": "2", "address/postal_code": "1000",
+        }, self.COUNTRIES, self.TITLES)
+        self.assertEqual(vals["name"], "Jane Doe")
+        self.assertEqual(vals["title"], 3)
+        self.assertEqual(vals["country_id"], 20)
+        self.assertEqual(vals["street2"], "5 Bus 2")
+        self.assertEqual(vals["zip"], "1000")
+        self.assertNotIn("integration_pw_hash", vals)
+
+    def test_invoice_vals_only_when_present(self):
+        self.assertIsNone(self.module._user_invoice_vals({"uid": "GC1"}, self.COUNTRIES))
+        vals = self.module._user_invoice_vals({
+            "payment_details/facturation_address/city": "Gent",
+            "payment_details/facturation_address/country": "NL",
+        }, self.COUNTRIES)
+        self.assertEqual(vals, {"city": "Gent", "country_id": 21, "type": "invoice"})
+
+    def test_company_vals_need_from_company(self):
+        user = {"company/name": "ACME", "company/VAT_number": "BE0123"}
+        self.assertIsNone(self.module._user_company_vals(user, self.COUNTRIES))
+        vals = self.module._user_company_vals(dict(user, from_company="true"), self.COUNTRIES)
+        self.assertEqual(vals["vat"], "BE0123")
+        self.assertTrue(vals["is_company"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+import os
+import sys
+import unittest
+import importlib.util
+
+TEST_DIR = os.path.dirname(__file__)
+MODULE_PATH = os.path.abspath(
+    os.path.join(TEST_DIR, os.pardir, "consumers", "schema.py")
+)
+
+spec = importlib.util.spec_from_file_location("schema", MODULE_PATH)
+schema = importlib.util.module_from_spec(spec)
+sys.modules["schema"] = schema
+spec.loader.exec_module(schema)
+
+FIELDS = {
+    "event.event": ["id", "name", "gcid"],
+    "product.product": ["id", "pos_categ_ids", "available_in_pos"],
+    "res.partner": ["id", "ref"],
+}
+
+
+class FakeOdoo:
+    def __init__(self):
+        self.calls = []
+        self.module_stamp = "2025-01-01 00:00:00"
+
+    def __call__(self, model, method, args, kwargs=None):
+        self.calls.append((model, method))
+        if model == "ir.module.module":
+            return [{"id": 1, "write_date": self.module_stamp}]
+        wanted = args[0][0][2]
+        return [
+            {"model": m, "name": f}
+            for m in wanted for f in FIELDS.get(m, [])
+        ]
+
+    def count(self, model):
+        return sum(1 for m, _ in self.calls if m == model)
+
+
+class TestSchemaCache(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.odoo = FakeOdoo()
+        self.cache = schema.SchemaCache(
+            self.odoo, ["event.event", "product.product"],
+            check_interval=300, clock=lambda: self.now,
+        )
+        self.cache.load()
+
+    def test_all_models_loaded_in_one_call(self):
+        self.assertEqual(self.odoo.count("ir.model.fields"), 1)
+        self.assertTrue(self.cache.has("event.event", "gcid"))
+        self.assertFalse(self.cache.has("event.event", "entrance_fee"))
+        self.assertTrue(self.cache.has("product.product", "pos_categ_ids"))
+        self.assertFalse(self.cache.has("product.product", "pos_categ_id"))
+        self.assertEqual(self.odoo.count("ir.model.fields"), 1)
+
+    def test_undeclared_model_loaded_once(self):
+        self.assertTrue(self.cache.has("res.partner", "ref"))
+        self.assertFalse(self.cache.has("res.partner", "gcid"))
+        self.assertEqual(self.odoo.count("ir.model.fields"), 2)
+
+    def test_no_reload_without_upgrade(self):
+        self.now = 1000
+        self.cache.has("event.event", "gcid")
+        self.cache.has("event.event", "gcid")
+        self.assertEqual(self.odoo.count("ir.module.module"), 2)   # load + one check
+        self.assertEqual(self.odoo.count("ir.model.fields"), 1)
+
+    def test_upgrade_triggers_reload(self):
+        FIELDS["event.event"].append("entrance_fee")
+        try:
+            self.odoo.module_stamp = "2025-02-01 00:00:00"
+            self.assertFalse(self.cache.has("event.event", "entrance_fee"))  # interval not reached
+            self.now = 301
+            self.assertTrue(self.cache.has("event.event", "entrance_fee"))
+            self.assertEqual(self.odoo.count("ir.model.fields"), 2)
+        finally:
+            FIELDS["event.event"].remove("entrance_fee")
+
+    def test_explicit_refresh(self):
+        self.cache.refresh()
+        self.assertEqual(self.odoo.count("ir.model.fields"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()